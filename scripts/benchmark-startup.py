@@ -0,0 +1,208 @@
+"""Measures how long each payne command takes to run
+
+For each command, the following is measured:
+  * Cold start: wall-clock time with an empty bytecode cache (all modules,
+    including dependencies, have to be compiled)
+  * Warm start: median wall-clock time with a populated bytecode cache
+  * Import time: total time spent importing modules (from `-X importtime`),
+    with the modules that take longest
+
+The commands run against temporary apps, bin and cache directories. The test
+data must have been built (see `doc/testing.md`) because an app is installed
+for `install` (which then fails fast because the app version is already
+installed) and `list`.
+
+Results can be saved as a baseline and compared against it later; regressions
+are reported and make the script fail.
+"""
+
+from dataclasses import dataclass
+import json
+from pathlib import Path
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from cyclopts import App
+
+import payne
+
+
+payne_project = Path(payne.__file__).parent.parent.parent
+test_data_index = payne_project / "run" / "payne_test_data"
+default_baseline = payne_project / "run" / "startup-baseline.json"
+
+commands = {
+    "status": ["status"],
+    "list": ["list"],
+    # Already installed, so this only measures getting ready to install
+    "install": ["install", "foo", "1.3.1"],
+    # Not installed
+    "uninstall": ["uninstall", "foo", "1.3.0"],
+}
+
+
+@dataclass(frozen=True)
+class Result:
+    cold: float
+    warm: float
+    import_time: float
+    slowest_imports: list[tuple[str, float]]
+
+    def metrics(self) -> dict[str, float]:
+        return {"cold": self.cold, "warm": self.warm, "import_time": self.import_time}
+
+
+class Environment:
+    def __init__(self, root: Path):
+        self._root = root
+
+    def args(self, command: list[str]) -> list[str]:
+        return [
+            "--apps-dir", str(self._root / "apps"),
+            "--bin-dir", str(self._root / "bin"),
+            "--cache-dir", str(self._root / "cache"),
+            "--index", f"payne_test_data={test_data_index.as_uri()}",
+            *command,
+        ]
+
+    def run(self, command: list[str], *, python_args: list[str] = ()) -> tuple[float, str]:
+        """Returns the wall-clock time and stderr"""
+        args = [sys.executable, *python_args, "-m", "payne.cli", *self.args(command)]
+
+        start = time.perf_counter()
+        result = subprocess.run(args, capture_output=True, text=True)
+        duration = time.perf_counter() - start
+
+        return duration, result.stderr
+
+
+def parse_import_time(stderr: str) -> tuple[float, list[tuple[str, float]]]:
+    """Total import time and the modules with the longest self time"""
+    total = 0
+    self_times = []
+
+    for line in stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if match := re.fullmatch(r"import time:\s*(\d+) \|\s*(\d+) \| ( *)(\S+)", line):
+            self_time, cumulative, indent, module = match.groups()
+            self_times.append((module, int(self_time) / 1e6))
+            if not indent:
+                total += int(cumulative)
+
+    return total / 1e6, sorted(self_times, key=lambda item: item[1], reverse=True)[:5]
+
+
+def measure(environment: Environment, command: list[str], runs: int) -> Result:
+    with tempfile.TemporaryDirectory() as pycache:
+        cold, _ = environment.run(command, python_args=["-X", f"pycache_prefix={pycache}"])
+
+    # Make sure that the bytecode cache is populated
+    environment.run(command)
+    warm = statistics.median(environment.run(command)[0] for _ in range(runs))
+
+    _, stderr = environment.run(command, python_args=["-X", "importtime"])
+    import_time, slowest_imports = parse_import_time(stderr)
+
+    return Result(cold, warm, import_time, slowest_imports)
+
+
+def ms(seconds: float) -> str:
+    return f"{seconds * 1000:7.1f} ms"
+
+
+def report(results: dict[str, Result], baseline: dict[str, dict[str, float]] | None,
+           threshold: float, min_difference: float) -> bool:
+    """Prints the results and returns whether there are regressions"""
+    regressions = False
+
+    for name, result in results.items():
+        print(f"{name}")
+
+        for metric, value in result.metrics().items():
+            line = f"  {metric:12} {ms(value)}"
+
+            if baseline is not None and (reference := baseline.get(name, {}).get(metric)) is not None:
+                line += f"  (baseline {ms(reference)}, {(value - reference) / reference:+6.1%})"
+                if value > reference * (1 + threshold) and value - reference > min_difference:
+                    line += "  REGRESSION"
+                    regressions = True
+
+            print(line)
+
+        print("  slowest imports:")
+        for module, self_time in result.slowest_imports:
+            print(f"    {ms(self_time)}  {module}")
+
+    return regressions
+
+
+app = App()
+
+
+@app.default
+def benchmark_startup(
+        *names: str,
+        runs: int = 10,
+        baseline: Path = default_baseline,
+        save_baseline: bool = False,
+        threshold: float = 0.2,
+        min_difference: float = 0.01,
+):
+    """Benchmark the startup of payne commands
+
+    Parameters
+    ----------
+    names
+        Commands to benchmark (default: all)
+    runs
+        Number of runs for the warm start
+    baseline
+        Baseline file
+    save_baseline
+        Save the results as the new baseline instead of comparing against it
+    threshold
+        Relative slowdown that is considered a regression
+    min_difference
+        Minimum absolute slowdown (in seconds) that is considered a regression
+    """
+    if unknown := set(names) - set(commands):
+        print(f"Unknown commands: {', '.join(sorted(unknown))}")
+        return 1
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        environment = Environment(Path(temp_dir))
+
+        print("Installing foo 1.3.1")
+        subprocess.run([sys.executable, "-m", "payne.cli", *environment.args(["install", "foo", "1.3.1"])],
+                       capture_output=True, check=True)
+
+        results = {name: measure(environment, command, runs)
+                   for name, command in commands.items() if not names or name in names}
+
+    if save_baseline:
+        report(results, None, threshold, min_difference)
+        # Keep the baseline of commands that were not benchmarked
+        baseline_data = json.loads(baseline.read_text()) if baseline.exists() else {}
+        baseline_data.update({name: result.metrics() for name, result in results.items()})
+        baseline.parent.mkdir(parents=True, exist_ok=True)
+        baseline.write_text(json.dumps(baseline_data, indent=2))
+        print(f"Baseline saved to {baseline}")
+        return 0
+
+    baseline_data = json.loads(baseline.read_text()) if baseline.exists() else None
+    if baseline_data is None:
+        print(f"No baseline found at {baseline}")
+
+    if report(results, baseline_data, threshold, min_difference):
+        print("Regressions found")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(app())
@@ -1,3 +1,7 @@
 from .app_version_metadata import AppVersionMetadata
+from .trash import Trash
+from .verification import Problem
 from .app_version import AppVersion
+from .content_store import ContentStore, DedupeResult
 from .apps_dir import AppsDir
+from .apps_index import AppsIndex, IndexEntry
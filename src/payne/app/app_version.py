@@ -7,8 +7,11 @@ import shutil
 
 from payne.app import AppVersionMetadata
 from payne.app import app_version_metadata
+from payne.app.trash import Trash
+from payne.app.verification import Problem, update_records, verify_records, verify_scripts
 from payne.installer import Installer, InstallSource
-from payne.util.file_system import TemporaryDirectory, safe_create
+from payne.util.file_system import TemporaryDirectory, atomic_write_bytes, atomic_write_text, safe_create
+from payne.util.profiling import span
 
 
 class AppVersion:
@@ -36,16 +39,16 @@ class AppVersion:
         return original.with_stem(stem_with_version).name
 
     def _install_scripts(self, source_dir: Path, bin_dir: Path) -> Iterator[app_version_metadata.Script]:
-        bin_dir.mkdir(parents=True, exist_ok=True)
-
         for source_script in source_dir.iterdir():
             script = bin_dir / self._script_file_name(source_script)
             print(f"Installing script {source_script.name} to {script}")
-            shutil.move(source_script, script)
+            # The source directory is on the same file system, so this is a
+            # rename rather than a copy
+            os.replace(source_script, script)
             yield app_version_metadata.Script(
                 script,
                 source_script.name,
-                app_version_metadata.create_hash(script.read_bytes()))
+                app_version_metadata.create_file_hash(script))
 
         # TODO factor out
         search_path = os.environ["PATH"].split(os.pathsep)
@@ -56,35 +59,137 @@ class AppVersion:
     # Installation #############################################################
 
     def is_installed(self) -> bool:
-        return self.root.exists()
+        # The metadata is written last, so a directory without metadata is a
+        # partial installation (e.g., if the process was killed)
+        return self.metadata_file.is_file()
+
+    def is_partial(self) -> bool:
+        return self.root.exists() and not self.is_installed()
+
+    def _remove_root(self, trash: Trash | None):
+        if trash is not None:
+            trash.put(self.root)
+        else:
+            shutil.rmtree(self.root)
+
+    def remove_partial(self, trash: Trash | None = None):
+        # Scripts that were already moved into place are overwritten by the
+        # next installation
+        print(f"Removing partial installation of {self.name} {self.version}")
+        self._remove_root(trash)
+
+    def _clone(self, base: "AppVersion"):
+        """Copies the environment of another version of the app
+
+        Files are hard-linked if possible; this is safe because installers
+        replace files rather than modifying them. Absolute paths of the base
+        version in the scripts of the environment are rewritten (and updated
+        in the RECORD files).
+        """
+        def copy(source: str, target: str):
+            try:
+                os.link(source, target)
+            except OSError:
+                shutil.copy2(source, target)
+
+        print(f"Cloning {base.name} {base.version}")
+        shutil.copytree(base.root, self.root, symlinks=True, copy_function=copy, dirs_exist_ok=True,
+                        ignore=lambda directory, names: [base.metadata_file.name] if Path(directory) == base.root else [])
+
+        old_root = str(base.root).encode()
+        new_root = str(self.root).encode()
+        rewritten = set()
+        for file in self.root.glob("*/bin/*"):
+            if file.is_symlink() or not file.is_file():
+                continue
+
+            data = file.read_bytes()
+            if old_root in data:
+                # Replace rather than modify, the file may be hard-linked
+                atomic_write_bytes(file, data.replace(old_root, new_root))
+                shutil.copymode(base.root / file.relative_to(self.root), file)
+                rewritten.add(file)
+
+        for environment in self.root.iterdir():
+            if environment.is_dir():
+                update_records(environment, rewritten)
+
+    def install(self, installer: Installer, source: InstallSource, bin_dir: Path, constraints_file: Path,
+                base: "AppVersion | None" = None):
+        """Installs the app version
+
+        If `base` is specified, the environment of that (installed) version is
+        cloned and only the differences are installed.
+
+        The scripts are staged in a hidden directory in the bin directory and
+        then moved into place, which is cheap because it's on the same file
+        system. The environment can't be moved after installation, so it's
+        installed in place. Writing the metadata commits the installation;
+        until then, the app version is not considered installed. A partial
+        installation must have been removed before.
+        """
+        bin_dir.mkdir(parents=True, exist_ok=True)
 
-    def install(self, installer: Installer, source: InstallSource, bin_dir: Path, constraints_file: Path):
         with safe_create(self.root) as root:
-            with TemporaryDirectory() as temp_dir:
-                temp_bin_dir = temp_dir / "bin"
-                installer.install(source, root, temp_bin_dir, constraints=constraints_file)
+            if base is not None:
+                with span("clone", base=base.version):
+                    self._clone(base)
+
+            with TemporaryDirectory(dir=bin_dir, prefix=".payne-staging-") as staging_dir:
+                staging_bin_dir = staging_dir / "bin"
+                installer.install(source, root, staging_bin_dir, constraints=constraints_file,
+                                  incremental=base is not None)
 
-                scripts = list(self._install_scripts(temp_bin_dir, bin_dir))
-                metadata = AppVersionMetadata(scripts)
-                self.write_metadata(metadata)
+                with span("move scripts"):
+                    scripts = list(self._install_scripts(staging_bin_dir, bin_dir))
 
-    def uninstall(self):
+                with span("write metadata"):
+                    metadata = AppVersionMetadata(scripts)
+                    self.write_metadata(metadata)
+
+    def uninstall(self, trash: Trash | None = None):
+        """Uninstalls the app version
+
+        If `trash` is specified, the app version directory is moved there
+        instead of being removed.
+        """
         # TODO handle: script not found (others must still be deleted)
         # TODO handle: metadata could not be read
         try:
             metadata = self.read_metadata()
+            # From here on, the app version is not considered installed
+            self.metadata_file.unlink()
 
-            for script in metadata.scripts:
-                print(f"Uninstall script {script}")
-                # TODO verify the hash
-                script.file.unlink(missing_ok=True)
+            with span("remove scripts"):
+                for script in metadata.scripts:
+                    print(f"Uninstall script {script}")
+                    # TODO verify the hash (see `verify`)
+                    script.file.unlink(missing_ok=True)
 
         except BaseException:
             # TODO better
             print("Error while uninstalling, uninstall may be incomplete")
 
         finally:
-            shutil.rmtree(self.root)
+            with span("remove environment"):
+                self._remove_root(trash)
+
+    # Verification #############################################################
+
+    def verify(self, record: bool = False) -> list[Problem]:
+        """Checks that the scripts haven't been modified or removed
+
+        If `record` is set, the files of the installed distributions are also
+        checked against their RECORD files.
+        """
+        problems = list(verify_scripts(self.read_metadata()))
+
+        if record:
+            for environment in self.root.iterdir():
+                if environment.is_dir():
+                    problems.extend(verify_records(environment))
+
+        return problems
 
     # Metadata #################################################################
 
@@ -93,7 +198,7 @@ class AppVersion:
         return self.root / "payne_app-version.json"
 
     def write_metadata(self, metadata: AppVersionMetadata):
-        self.metadata_file.write_text(json.dumps(metadata.dump()))
+        atomic_write_text(self.metadata_file, json.dumps(metadata.dump()))
 
     def read_metadata(self) -> AppVersionMetadata:
         data = json.loads(self.metadata_file.read_text())
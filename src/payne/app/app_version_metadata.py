@@ -1,21 +1,34 @@
+from dataclasses import dataclass, field
 import hashlib
 from pathlib import Path
-from typing import Literal
-
-from attrs import define, field
-import attrs.validators
-from cattrs import structure, unstructure
 
 schema = {
     "name": "payne.app-version-metadata",
-    "version": "1.0",
+    "version": "1.1",
 }
 
+# Older schema versions that can still be read. 1.0 used SHA-1 for the
+# script hashes, but the hashes include the algorithm, so the format is the
+# same.
+readable_schemas = [
+    {"name": "payne.app-version-metadata", "version": "1.0"},
+    schema,
+]
+
+hash_algorithm = "blake2b"
+
 
 def create_hash(data: bytes) -> str:
-    name = "sha1"
-    hash_ = hashlib.new(name, data).hexdigest()
-    return f"{name}:{hash_}"
+    hash_ = hashlib.new(hash_algorithm, data).hexdigest()
+    return f"{hash_algorithm}:{hash_}"
+
+
+def create_file_hash(file: Path) -> str:
+    """Same as `create_hash`, but reads the file in chunks rather than all at
+    once"""
+    with file.open("rb") as f:
+        hash_ = hashlib.file_digest(f, hash_algorithm).hexdigest()
+    return f"{hash_algorithm}:{hash_}"
 
 
 def hash_matches(data: bytes, hash_: str) -> bool:
@@ -23,6 +36,13 @@ def hash_matches(data: bytes, hash_: str) -> bool:
     data_hash = hashlib.new(name, data).hexdigest()
     return data_hash == hash_
 
+
+def file_hash_matches(file: Path, hash_: str) -> bool:
+    name, hash_ = hash_.split(":", maxsplit=1)
+    with file.open("rb") as f:
+        file_hash = hashlib.file_digest(f, name).hexdigest()
+    return file_hash == hash_
+
 # @define
 # class ProjectSource:
 #     path: Path
@@ -33,7 +53,7 @@ def hash_matches(data: bytes, hash_: str) -> bool:
 #     version: str
 
 
-@define
+@dataclass
 class Script:
     file: Path
     script_name: str
@@ -41,23 +61,28 @@ class Script:
 
 
 # TODO cf. uv-receipt.toml
-@define
+@dataclass
 class AppVersionMetadata:
     # source: ProjectSource | PackageSource
-    scripts: list[Script] = field(factory=list)
+    scripts: list[Script] = field(default_factory=list)
 
 
 
     def dump(self):
+        # cattrs takes a while to import and is only needed here
+        from cattrs import unstructure
+
         data = unstructure(self)
         data = {"_schema": schema, **data}
         return data
 
     @classmethod
     def load(cls, data: dict):
+        from cattrs import structure
+
         data = dict(data)
 
-        if data["_schema"] != schema:
+        if data["_schema"] not in readable_schemas:
             raise ValueError("Schema doesn't match")
         del data["_schema"]
 
@@ -2,11 +2,18 @@ from collections.abc import Iterator
 from contextlib import contextmanager, suppress
 
 from pathlib import Path
+import re
 
-from payne.app import AppVersion
+from payne.app import AppVersion, ContentStore, Trash
+from payne.util.locking import KeyedLock, file_lock
 from payne.util.path import is_empty
 
 
+# Shared by all instances so that it doesn't matter which instance is used to
+# lock an app
+_app_locks = KeyedLock()
+
+
 class AppsDir:
     def __init__(self, root: Path):
         self._root = root
@@ -15,28 +22,98 @@ class AppsDir:
     def root(self) -> Path:
         return self._root
 
+    @property
+    def content_store(self) -> ContentStore:
+        # Hidden, so it's not mistaken for an app. It has to be on the same
+        # file system as the apps.
+        return ContentStore(self.root / ".store")
+
+    @property
+    def trash(self) -> Trash:
+        # Hidden, so it's not mistaken for an app. It has to be on the same
+        # file system as the apps.
+        return Trash(self.root / ".trash")
+
     def installed_apps(self) -> Iterator[AppVersion]:
         if self.root.exists():
             for app_dir in self.root.iterdir():
+                if app_dir.name.startswith("."):
+                    continue
+
                 for app_version_dir in app_dir.iterdir():
-                    yield AppVersion(app_version_dir, app_dir.name, app_version_dir.name)
+                    app_version = AppVersion(app_version_dir, app_dir.name, app_version_dir.name)
+                    # Skip partial installations
+                    if app_version.is_installed():
+                        yield app_version
 
     def app_dir(self, name: str) -> Path:
         return self.root / name
 
+    def closest_version(self, name: str, version: str) -> AppVersion | None:
+        """The installed version of an app that is closest to `version`
+
+        This is the highest lower version or, if there is none, the lowest
+        higher version. Versions are compared by their numeric components,
+        which is good enough for finding a similar environment.
+        """
+        def key(v: str) -> tuple[int, ...]:
+            return tuple(int(part) for part in re.findall(r"\d+", v))
+
+        if not self.app_dir(name).is_dir():
+            return None
+
+        installed = [AppVersion(app_version_dir, name, app_version_dir.name)
+                     for app_version_dir in self.app_dir(name).iterdir() if app_version_dir.name != version]
+        installed = [app_version for app_version in installed if app_version.is_installed()]
+
+        lower = [app_version for app_version in installed if key(app_version.version) <= key(version)]
+        if lower:
+            return max(lower, key=lambda app_version: key(app_version.version))
+
+        return min(installed, key=lambda app_version: key(app_version.version), default=None)
+
+    def _locks_dir(self) -> Path:
+        # Hidden, so it's not mistaken for an app
+        return self.root / ".locks"
+
+    @contextmanager
+    def lock_app(self, name: str) -> Iterator[None]:
+        """Serializes operations on an app (all versions), both within this
+        process and between processes
+
+        Operations on different apps can run concurrently.
+        """
+        # The thread lock keeps threads of this process from piling up on the
+        # file lock
+        with _app_locks(self.app_dir(name)), file_lock(self._locks_dir() / f"{name}.lock"):
+            yield
+
+    @contextmanager
+    def lock_global(self) -> Iterator[None]:
+        """Serializes changes to the structure of the apps directory (e.g.,
+        creating and removing app directories, and changes to the content
+        store) between processes
+
+        Only to be held briefly. If both are needed, the app lock must be
+        acquired first.
+        """
+        with _app_locks(self.root), file_lock(self._locks_dir() / "global.lock"):
+            yield
+
     @contextmanager
     def cleanup_app_dir(self, name: str) -> Iterator[Path]:
         dir_ = self.app_dir(name)
 
         try:
-            dir_.mkdir(parents=True, exist_ok=True)
+            with self.lock_global():
+                dir_.mkdir(parents=True, exist_ok=True)
             yield self.app_dir(name)
         finally:
-            with suppress(BaseException):
+            # The apps directory itself is kept because it contains the lock
+            # files
+            with suppress(BaseException), self.lock_global():
                 if dir_.exists() and is_empty(dir_):
                     dir_.rmdir()
-                if self.root.exists() and is_empty(self.root):
-                    self.root.rmdir()
 
     def app_version_dir(self, name: str, version: str) -> Path:
         return self.app_dir(name) / version
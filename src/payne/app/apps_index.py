@@ -0,0 +1,93 @@
+from collections.abc import Iterable, Iterator
+from contextlib import closing, contextmanager
+from dataclasses import dataclass
+import json
+from pathlib import Path
+import sqlite3
+
+
+def _version_key(version: str) -> tuple:
+    # packaging is only needed if there are entries to sort
+    from packaging.version import InvalidVersion, Version
+
+    # Invalid versions (which uv wouldn't install anyway) go last
+    try:
+        return 0, Version(version)
+    except InvalidVersion:
+        return 1, version
+
+
+@dataclass(frozen=True)
+class IndexEntry:
+    name: str
+    version: str
+    script_names: list[str]
+
+
+class AppsIndex:
+    """Index of the installed app versions of an apps directory
+
+    Listing the installed apps from the index is much faster than reading the
+    metadata of each app version, especially on network file systems. The
+    index is updated whenever an app version is installed or uninstalled, and
+    can be rebuilt from the apps directory if it gets out of sync.
+
+    A single database can hold the indices of multiple apps directories.
+    """
+
+    def __init__(self, file: Path, apps_dir: Path):
+        self._file = file
+        self._apps_dir = str(apps_dir.resolve())
+
+    @property
+    def file(self) -> Path:
+        return self._file
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        self._file.parent.mkdir(parents=True, exist_ok=True)
+
+        with closing(sqlite3.connect(self._file, timeout=30)) as connection:
+            # Commits on success, rolls back on error
+            with connection:
+                connection.execute("CREATE TABLE IF NOT EXISTS apps_dirs (apps_dir TEXT PRIMARY KEY)")
+                connection.execute("CREATE TABLE IF NOT EXISTS app_versions ("
+                                   "apps_dir TEXT, name TEXT, version TEXT, script_names TEXT, "
+                                   "PRIMARY KEY (apps_dir, name, version))")
+                yield connection
+
+    def _add(self, connection: sqlite3.Connection, name: str, version: str, script_names: list[str]):
+        connection.execute("INSERT OR REPLACE INTO app_versions VALUES (?, ?, ?, ?)",
+                           (self._apps_dir, name, version, json.dumps(script_names)))
+
+    def add(self, name: str, version: str, script_names: list[str]):
+        with self._transaction() as connection:
+            self._add(connection, name, version, script_names)
+
+    def remove(self, name: str, version: str):
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM app_versions WHERE apps_dir = ? AND name = ? AND version = ?",
+                               (self._apps_dir, name, version))
+
+    def entries(self) -> list[IndexEntry] | None:
+        """The indexed app versions, or `None` if the index has not been
+        built yet"""
+        with self._transaction() as connection:
+            built = connection.execute("SELECT 1 FROM apps_dirs WHERE apps_dir = ?", (self._apps_dir,)).fetchone()
+            if built is None:
+                return None
+
+            rows = connection.execute("SELECT name, version, script_names FROM app_versions WHERE apps_dir = ?",
+                                      (self._apps_dir,))
+            entries = [IndexEntry(name, version, json.loads(script_names)) for name, version, script_names in rows]
+
+        # SQLite would compare versions as strings (1.10 before 1.9)
+        return sorted(entries, key=lambda entry: (entry.name, _version_key(entry.version)))
+
+    def rebuild(self, entries: Iterable[IndexEntry]):
+        """Replaces the index with the specified entries"""
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM app_versions WHERE apps_dir = ?", (self._apps_dir,))
+            for entry in entries:
+                self._add(connection, entry.name, entry.version, entry.script_names)
+            connection.execute("INSERT OR IGNORE INTO apps_dirs VALUES (?)", (self._apps_dir,))
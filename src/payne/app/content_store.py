@@ -0,0 +1,185 @@
+from dataclasses import dataclass
+import errno
+import hashlib
+import json
+import os
+from pathlib import Path
+import stat
+
+from payne.util.file_system import atomic_write_text, reflink
+
+# Errors from `reflink` that mean that the file system doesn't support it
+_reflink_unsupported = {errno.EOPNOTSUPP, errno.ENOTSUP, errno.ENOTTY, errno.EINVAL}
+
+
+@dataclass(frozen=True)
+class DedupeResult:
+    files: int = 0
+    bytes_saved: int = 0
+
+    def __add__(self, other: "DedupeResult") -> "DedupeResult":
+        return DedupeResult(self.files + other.files, self.bytes_saved + other.bytes_saved)
+
+    def __str__(self):
+        return f"{self.files} files deduplicated, {self.bytes_saved / 1024 ** 2:.1f} MiB saved"
+
+
+class ContentStore:
+    """Content-addressed store for deduplicating files across app versions
+
+    Each distinct file (by content and permissions) is hard-linked into the
+    store. Identical files in app version directories are replaced with a
+    reflink (copy-on-write clone) of the stored file if the file system
+    supports it, or a hard link otherwise.
+
+    Since entries are hard links, an entry whose link count has dropped to 1 is
+    no longer used by any app version and is removed by `prune` (files that
+    were reflinked keep their data). For this to work, files that already
+    have other hard links (for example, to the uv cache) are skipped; they
+    don't take up extra space anyway.
+
+    Reflinked files are independent files (with a link count of 1), so they
+    are recorded by path and identity (device, inode, size and modification
+    time) and skipped by later runs, as long as they are unchanged.
+
+    Hard-linked files share their content, so they must not be modified in
+    place. Installers replace files rather than modifying them, so this is
+    fine for app version directories.
+
+    The store must be on the same file system as the app version directories.
+    Callers must not dedupe or prune concurrently.
+    """
+
+    def __init__(self, root: Path):
+        self._root = root
+        self._reflink_supported = True
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    def _reflinks_file(self) -> Path:
+        return self.root / "reflinks.json"
+
+    def _read_reflinks(self) -> dict[str, list[int]]:
+        try:
+            return json.loads(self._reflinks_file().read_text())
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write_reflinks(self, reflinks: dict[str, list[int]]):
+        if reflinks:
+            atomic_write_text(self._reflinks_file(), json.dumps(reflinks))
+        else:
+            self._reflinks_file().unlink(missing_ok=True)
+
+    @staticmethod
+    def _identity(stat_result: os.stat_result) -> list[int]:
+        return [stat_result.st_dev, stat_result.st_ino, stat_result.st_size, stat_result.st_mtime_ns]
+
+    def _entry(self, file: Path, stat_result: os.stat_result) -> Path:
+        with file.open("rb") as f:
+            hash_ = hashlib.file_digest(f, "sha256").hexdigest()
+
+        # Hard links share permissions, so only files with the same
+        # permissions can share an entry
+        key = f"{hash_}-{stat.S_IMODE(stat_result.st_mode):o}"
+        return self.root / key[:2] / key
+
+    def _link(self, entry: Path, file: Path):
+        """Atomically replaces `file` with a reflink or a hard link to
+        `entry`"""
+        temp_file = file.with_name(f".{file.name}.{os.getpid()}.payne-dedupe")
+
+        try:
+            if self._reflink_supported:
+                try:
+                    reflink(entry, temp_file)
+                except OSError as e:
+                    if e.errno not in _reflink_unsupported:
+                        raise
+                    # Don't try again for every file
+                    self._reflink_supported = False
+
+            if not self._reflink_supported:
+                os.link(entry, temp_file)
+
+            os.replace(temp_file, file)
+        except BaseException:
+            temp_file.unlink(missing_ok=True)
+            raise
+
+    def dedupe(self, directory: Path) -> DedupeResult:
+        result = DedupeResult()
+        reflinks = self._read_reflinks()
+
+        for dir_path, _, file_names in os.walk(directory):
+            for file_name in file_names:
+                file = Path(dir_path) / file_name
+                stat_result = file.lstat()
+
+                # Empty files don't take up space (except for the inode)
+                if not stat.S_ISREG(stat_result.st_mode) or stat_result.st_size == 0:
+                    continue
+
+                # Files that are already hard-linked (to the store, or
+                # elsewhere, e.g. uv links files from its cache) don't take up
+                # extra space. Also, linking them to the store would break the
+                # link count tracking.
+                if stat_result.st_nlink > 1:
+                    continue
+
+                # Already reflinked by an earlier run
+                if reflinks.get(str(file)) == self._identity(stat_result):
+                    continue
+
+                entry = self._entry(file, stat_result)
+                if not entry.exists():
+                    # First occurrence, becomes the stored file (unless another
+                    # process was faster)
+                    entry.parent.mkdir(parents=True, exist_ok=True)
+                    try:
+                        os.link(file, entry)
+                        continue
+                    except FileExistsError:
+                        pass
+
+                self._link(entry, file)
+                result += DedupeResult(1, stat_result.st_size)
+
+                linked_stat = file.lstat()
+                if linked_stat.st_nlink == 1:
+                    reflinks[str(file)] = self._identity(linked_stat)
+
+        self._write_reflinks(reflinks)
+        return result
+
+    def prune(self):
+        """Removes entries that are no longer used"""
+        if not self.root.exists():
+            return
+
+        # Forget reflinked files that have been removed or replaced
+        reflinks = self._read_reflinks()
+        for path, identity in list(reflinks.items()):
+            try:
+                if self._identity(Path(path).lstat()) == identity:
+                    continue
+            except FileNotFoundError:
+                pass
+            del reflinks[path]
+        self._write_reflinks(reflinks)
+
+        for prefix_dir in self.root.iterdir():
+            if not prefix_dir.is_dir():
+                continue
+
+            for entry in prefix_dir.iterdir():
+                if entry.stat().st_nlink == 1:
+                    entry.unlink()
+
+            if not any(prefix_dir.iterdir()):
+                prefix_dir.rmdir()
+
+        if not any(self.root.iterdir()):
+            self.root.rmdir()
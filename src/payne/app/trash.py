@@ -0,0 +1,85 @@
+from contextlib import suppress
+import os
+from pathlib import Path
+import shutil
+import subprocess
+import sys
+import tempfile
+
+
+class Trash:
+    """Directory for removing directory trees without waiting for it
+
+    Putting a directory into the trash is a rename, so it disappears
+    immediately. The trash is emptied later, usually by a detached background
+    process.
+
+    The trash must be on the same file system as the directories that are put
+    into it.
+    """
+
+    def __init__(self, root: Path):
+        self._root = root
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    def _create_entry(self) -> Path | None:
+        # Each entry gets its own directory, so entries with the same name
+        # don't clash. Another process emptying the trash may remove the trash
+        # directory right after we've created it.
+        for _ in range(3):
+            self.root.mkdir(parents=True, exist_ok=True)
+            with suppress(FileNotFoundError):
+                return Path(tempfile.mkdtemp(dir=self.root))
+
+        return None
+
+    def put(self, directory: Path):
+        if (entry := self._create_entry()) is None:
+            shutil.rmtree(directory)
+            return
+
+        try:
+            directory.rename(entry / directory.name)
+        except OSError:
+            # E.g., on Windows, if a file in the directory is in use, or if
+            # the entry has been removed by another process emptying the trash
+            shutil.rmtree(entry, ignore_errors=True)
+            shutil.rmtree(directory)
+
+    def is_empty(self) -> bool:
+        return not self.root.exists() or not any(self.root.iterdir())
+
+    def empty(self):
+        """Removes all entries
+
+        Safe to run concurrently with other processes emptying the trash.
+        """
+        if not self.root.exists():
+            return
+
+        for entry in self.root.iterdir():
+            shutil.rmtree(entry, ignore_errors=True)
+
+        # Fails if another process has put something into the trash in the
+        # meantime
+        with suppress(OSError):
+            self.root.rmdir()
+
+    def empty_in_background(self):
+        """Empties the trash in a detached process, which keeps running after
+        this process exits"""
+        if os.name == "nt":
+            options = {"creationflags": subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP}
+        else:
+            options = {"start_new_session": True}
+
+        subprocess.Popen([sys.executable, "-m", "payne.app.trash", str(self.root)],
+                         stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                         **options)
+
+
+if __name__ == "__main__":
+    Trash(Path(sys.argv[1])).empty()
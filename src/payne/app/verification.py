@@ -0,0 +1,91 @@
+from base64 import urlsafe_b64encode
+from collections.abc import Iterator
+import csv
+from dataclasses import dataclass
+import hashlib
+import io
+import os
+from pathlib import Path
+
+from payne.app.app_version_metadata import AppVersionMetadata, file_hash_matches
+from payne.util.file_system import atomic_write_text
+
+
+@dataclass(frozen=True)
+class Problem:
+    file: Path
+    # "missing" or "modified"
+    problem: str
+
+
+def verify_scripts(metadata: AppVersionMetadata) -> Iterator[Problem]:
+    for script in metadata.scripts:
+        if not script.file.is_file():
+            yield Problem(script.file, "missing")
+        elif not file_hash_matches(script.file, script.hash):
+            yield Problem(script.file, "modified")
+
+
+def _record_hash(file: Path, name: str = "sha256") -> str:
+    # RECORD uses the unpadded urlsafe base64 encoding of the digest
+    with file.open("rb") as f:
+        digest = hashlib.file_digest(f, name).digest()
+    return f"{name}={urlsafe_b64encode(digest).rstrip(b'=').decode()}"
+
+
+def _record_hash_matches(file: Path, hash_: str) -> bool:
+    name, _ = hash_.split("=", maxsplit=1)
+    return _record_hash(file, name) == hash_
+
+
+def _record_files(environment: Path) -> Iterator[Path]:
+    # POSIX and Windows layout
+    yield from environment.glob("lib/python*/site-packages/*.dist-info/RECORD")
+    yield from environment.glob("Lib/site-packages/*.dist-info/RECORD")
+
+
+def update_records(environment: Path, files: set[Path]):
+    """Updates the hashes and sizes of files that have been modified after
+    installation in the RECORD files of an environment"""
+    for record_file in _record_files(environment):
+        site_packages = record_file.parent.parent
+
+        with record_file.open(newline="") as f:
+            rows = list(csv.reader(f))
+
+        changed = False
+        for row in rows:
+            if len(row) >= 3 and row[1] and Path(os.path.normpath(site_packages / row[0])) in files:
+                file = Path(os.path.normpath(site_packages / row[0]))
+                row[1] = _record_hash(file)
+                row[2] = str(file.stat().st_size)
+                changed = True
+
+        if changed:
+            data = io.StringIO()
+            csv.writer(data, lineterminator="\n").writerows(rows)
+            # Replace rather than modify, the file may be hard-linked
+            atomic_write_text(record_file, data.getvalue())
+
+
+def verify_records(environment: Path) -> Iterator[Problem]:
+    """Checks the files of the installed distributions of an environment
+    against their RECORD files
+
+    Files without a hash in the RECORD file (e.g., the RECORD file itself and
+    bytecode files) are not checked.
+    """
+    for record_file in _record_files(environment):
+        # Paths are relative to the site-packages directory
+        site_packages = record_file.parent.parent
+
+        with record_file.open(newline="") as f:
+            for row in csv.reader(f):
+                if len(row) < 2 or not row[1]:
+                    continue
+
+                file = Path(os.path.normpath(site_packages / row[0]))
+                if not file.is_file():
+                    yield Problem(file, "missing")
+                elif not _record_hash_matches(file, row[1]):
+                    yield Problem(file, "modified")
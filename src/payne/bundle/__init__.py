@@ -0,0 +1,2 @@
+from .bundle import Bundle
+from .uv_bundle_builder import UvBundleBuilder
@@ -0,0 +1,93 @@
+from collections.abc import Iterable
+from functools import cached_property
+import io
+import json
+from pathlib import Path
+import tarfile
+from typing import Self
+
+from payne.package import Package
+
+schema = {
+    "name": "payne.bundle",
+    "version": "1.0",
+}
+
+
+class Bundle:
+    """An archive with everything needed to install an app version without
+    access to a package index
+
+    The archive contains:
+      * `bundle.json`: the name and version of the app
+      * `constraints.txt`: the pinned versions of the app and all of its
+        dependencies
+      * `wheels/`: the wheels for all of them
+
+    The wheels are built for the platform and Python version of the machine
+    that created the bundle.
+    """
+
+    def __init__(self, file: Path):
+        self._file = file
+
+    @property
+    def file(self) -> Path:
+        return self._file
+
+    def __str__(self):
+        return str(self._file)
+
+    @classmethod
+    def create(cls, file: Path, package: Package, constraints: str, wheels: Iterable[Path]) -> Self:
+        def add(archive: tarfile.TarFile, name: str, data: bytes):
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+
+        metadata = {"_schema": schema, "name": package.name, "version": package.version}
+
+        file.parent.mkdir(parents=True, exist_ok=True)
+        # Wheels are already compressed
+        with tarfile.open(file, "w") as archive:
+            add(archive, "bundle.json", json.dumps(metadata).encode())
+            add(archive, "constraints.txt", constraints.encode())
+            for wheel in wheels:
+                archive.add(wheel, f"wheels/{wheel.name}")
+
+        return cls(file)
+
+    def _read(self, name: str) -> bytes:
+        with tarfile.open(self._file) as archive:
+            try:
+                member = archive.extractfile(name)
+            except KeyError:
+                member = None
+
+            # Missing or not a regular file
+            if member is None:
+                raise ValueError(f"Unsupported bundle: {self._file}")
+
+            return member.read()
+
+    @cached_property
+    def _metadata(self) -> dict:
+        metadata = json.loads(self._read("bundle.json"))
+        if metadata.get("_schema") != schema:
+            raise ValueError(f"Unsupported bundle: {self._file}")
+        return metadata
+
+    @property
+    def package(self) -> Package:
+        return Package(self._metadata["name"], self._metadata["version"])
+
+    def constraints(self) -> str:
+        return self._read("constraints.txt").decode()
+
+    def extract_wheels(self, target: Path) -> Path:
+        """Extracts the wheels to `target`, which is returned"""
+        with tarfile.open(self._file) as archive:
+            members = [member for member in archive.getmembers() if member.name.startswith("wheels/")]
+            archive.extractall(target, members, filter="data")
+
+        return target / "wheels"
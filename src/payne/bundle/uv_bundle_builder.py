@@ -0,0 +1,101 @@
+import os
+from pathlib import Path
+import shlex
+import shutil
+import subprocess
+
+from payne.bundle import Bundle
+from payne.config import config
+from payne.package import Package
+from payne.util.file_system import TemporaryDirectory
+
+
+class UvBundleBuilder:
+    """Creates bundles, using uv to pin the dependencies and pip (run through
+    uv) to download or build the wheels
+
+    Each wheel is fetched from the index that uv resolved its pin from, so the
+    index priority is the same as uv's (pip would merge all indices).
+    """
+
+    def __init__(self, package_indices: dict[str, str]):
+        self._package_indices = package_indices
+
+    @staticmethod
+    def _run(args: list, **kwargs):
+        env = os.environ.copy()
+        # Avoid picking up local configuration
+        env["UV_INDEX"] = ""
+        env["UV_EXTRA_INDEX_URL"] = ""
+
+        print(f"Calling uv: {shlex.join(map(str, args))}")
+        subprocess.run(args, env=env, check=True, **kwargs)
+
+    def _compile(self, package: Package, constraints_file: Path | None, output_file: Path):
+        """Pins the app and all of its dependencies, annotated with the index
+        they were resolved from"""
+        index_args = []
+        for index_name, url in self._package_indices.items():
+            index_args.append("--index")
+            index_args.append(f"{index_name}={url}")
+
+        constraints_args = ["--constraints", constraints_file] if constraints_file is not None else []
+
+        self._run([
+            shutil.which(config().uv),
+            "pip", "compile",
+            "--no-header", "--no-annotate", "--emit-index-annotation",
+            *index_args,
+            *constraints_args,
+            "--output-file", output_file,
+            "-",
+        ], input=f"{package.requirement_specifier()}\n", text=True)
+
+    @staticmethod
+    def _read_pins(text: str) -> list[tuple[str, str | None]]:
+        """The pinned requirements from the output of `_compile`, with the
+        index they were resolved from (if any)"""
+        pins = []
+        for line in text.splitlines():
+            if line.startswith((" ", "\t")):
+                comment = line.strip()
+                if comment.startswith("# from ") and pins:
+                    pins[-1] = (pins[-1][0], comment.removeprefix("# from ").strip())
+            elif line.strip() and not line.startswith("#"):
+                pins.append((line.strip(), None))
+
+        return pins
+
+    def _wheels(self, pins: list[tuple[str, str | None]], wheel_dir: Path):
+        """Downloads or builds the wheels for pinned requirements"""
+        requirements_by_index: dict[str | None, list[str]] = {}
+        for requirement, index_url in pins:
+            requirements_by_index.setdefault(index_url, []).append(requirement)
+
+        for index_url, requirements in requirements_by_index.items():
+            # Without an annotation, pip's default index is used
+            index_args = ["--index-url", index_url] if index_url is not None else []
+
+            self._run([
+                shutil.which(config().uv),
+                "tool", "run", "--from", "pip", "pip",
+                "wheel",
+                "--no-deps",
+                "--quiet",
+                *index_args,
+                "--wheel-dir", wheel_dir,
+                *requirements,
+            ])
+
+    def build(self, package: Package, file: Path, constraints_file: Path | None) -> Bundle:
+        with TemporaryDirectory() as temp_dir:
+            pins_file = temp_dir / "pins.txt"
+            self._compile(package, constraints_file, pins_file)
+            pins = self._read_pins(pins_file.read_text())
+
+            wheel_dir = temp_dir / "wheels"
+            self._wheels(pins, wheel_dir)
+
+            # The index annotations are not part of the bundle
+            constraints = "".join(f"{requirement}\n" for requirement, _ in pins)
+            return Bundle.create(file, package, constraints, sorted(wheel_dir.iterdir()))
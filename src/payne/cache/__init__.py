@@ -0,0 +1,5 @@
+from .build_env_pool import BuildEnvPool
+from .constraints_cache import ConstraintsCache
+from .download_cache import DownloadCache
+from .http_cache import HttpCache, HttpCacheEntry
+from .metadata_cache import MetadataCache
@@ -0,0 +1,162 @@
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+import hashlib
+import json
+import os
+from pathlib import Path
+import shutil
+import subprocess
+import sys
+import time
+
+from payne.util.file_system import atomic_write_text
+from payne.util.locking import file_lock, remove_lock_file, try_file_lock
+from payne.util.profiling import span
+
+
+def normalize_requirements(requirements: Iterable[str]) -> list[str]:
+    """Normalizes build requirements, so that equivalent requirements (e.g.,
+    `Hatchling` and `hatchling`) share the same build environment"""
+    # packaging is only needed if we actually prepare a project
+    from packaging.requirements import InvalidRequirement, Requirement
+    from packaging.utils import canonicalize_name
+
+    result = set()
+    for requirement in requirements:
+        try:
+            parsed = Requirement(requirement)
+            parsed.name = canonicalize_name(parsed.name)
+            result.add(str(parsed))
+        except InvalidRequirement:
+            result.add(requirement.strip())
+
+    return sorted(result)
+
+
+class PooledBuildEnv:
+    """An isolated build environment from a `BuildEnvPool`
+
+    Implements `build.env.IsolatedEnv`, so it can be used with
+    `build.ProjectBuilder.from_isolated_env`.
+    """
+
+    def __init__(self, path: Path, uv: str):
+        self._path = path
+        self._uv = uv
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def _scripts_dir(self) -> Path:
+        return self._path / ("Scripts" if os.name == "nt" else "bin")
+
+    @property
+    def python_executable(self) -> str:
+        return str(self._scripts_dir() / ("python.exe" if os.name == "nt" else "python"))
+
+    def make_extra_environ(self) -> dict[str, str]:
+        return {
+            "PATH": os.pathsep.join([str(self._scripts_dir()), os.environ.get("PATH", "")]),
+            "PYTHONPATH": "",
+        }
+
+    def create(self):
+        subprocess.run([self._uv, "venv", "--quiet", "--python", sys.executable, self._path], check=True)
+
+    def install(self, requirements: Iterable[str]):
+        """Only used for creating the environment
+
+        Environments are shared by all projects with the same requirements,
+        so nothing must be installed into them afterwards. Additional
+        requirements (e.g., from `get_requires_for_build`) need an environment
+        of their own (with all of the requirements).
+        """
+        if requirements := list(requirements):
+            subprocess.run([self._uv, "pip", "install", "--quiet", "--python", self.python_executable,
+                            *requirements], check=True)
+
+
+class BuildEnvPool:
+    """Persistent build environments for preparing projects, keyed by the
+    (normalized) build system requirements
+
+    An environment is created on first use and reused by later projects with
+    the same build system requirements (e.g., `hatchling`), until it is older
+    than `max_age` seconds. Then it is recreated, so that new releases of the
+    build backend are picked up eventually.
+
+    An environment is locked while it is used, so concurrent preparations with
+    the same build system requirements are serialized.
+    """
+
+    def __init__(self, root: Path, max_age: int, uv: str):
+        self._root = root
+        self._max_age = max_age
+        self._uv = uv
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    @staticmethod
+    def key(requirements: Iterable[str]) -> str:
+        # Environments can't be shared between interpreters
+        data = {"python": sys.executable, "requirements": normalize_requirements(requirements)}
+        return hashlib.sha256(json.dumps(data).encode()).hexdigest()[:32]
+
+    def _entry(self, key: str) -> Path:
+        return self.root / key
+
+    def _lock_file(self, key: str) -> Path:
+        return self.root / f"{key}.lock"
+
+    def _is_expired(self, entry: Path) -> bool:
+        # The info file is written when the environment is complete
+        try:
+            info = json.loads((entry / "env.json").read_text())
+            return time.time() - info["created"] >= self._max_age
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            return True
+
+    @contextmanager
+    def env(self, requirements: Iterable[str]) -> Iterator[PooledBuildEnv]:
+        """A build environment with the requirements installed, which is
+        locked until the context exits"""
+        requirements = normalize_requirements(requirements)
+        key = self.key(requirements)
+        entry = self._entry(key)
+
+        with file_lock(self._lock_file(key)):
+            env = PooledBuildEnv(entry / "env", self._uv)
+
+            if self._is_expired(entry):
+                shutil.rmtree(entry, ignore_errors=True)
+                with span("create build environment"):
+                    env.create()
+                    env.install(requirements)
+                info = {"requirements": requirements, "python": sys.executable, "created": time.time()}
+                atomic_write_text(entry / "env.json", json.dumps(info))
+                created = True
+            else:
+                created = False
+
+            yield env
+
+        if created:
+            self.evict()
+
+    def evict(self):
+        """Removes expired environments
+
+        Environments that are being used are skipped.
+        """
+        if not self.root.exists():
+            return
+
+        keys = {path.stem if path.suffix == ".lock" else path.name for path in self.root.iterdir()}
+        for key in keys:
+            with try_file_lock(self._lock_file(key)) as acquired:
+                if acquired and self._is_expired(self._entry(key)):
+                    shutil.rmtree(self._entry(key), ignore_errors=True)
+                    remove_lock_file(self._lock_file(key))
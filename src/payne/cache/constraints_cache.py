@@ -0,0 +1,31 @@
+from pathlib import Path
+
+from payne.util.file_system import atomic_write_text
+
+
+class ConstraintsCache:
+    """Persistent cache for exported constraints
+
+    The constraints are keyed by a hash of the lock file and the export
+    options (see `Frontend.constraints_key`), so the same lock file is only
+    exported once.
+    """
+
+    def __init__(self, root: Path):
+        self._root = root
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    def _file(self, key: str) -> Path:
+        return self.root / f"{key}.txt"
+
+    def get(self, key: str) -> str | None:
+        try:
+            return self._file(key).read_text()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, constraints: str):
+        atomic_write_text(self._file(key), constraints)
@@ -0,0 +1,200 @@
+from collections.abc import Iterator
+from contextlib import contextmanager, suppress
+import hashlib
+import os
+from pathlib import Path
+import re
+import shutil
+from typing import Any
+
+from payne.util.file_system import atomic_write_bytes
+from payne.util.locking import file_lock, remove_lock_file, try_file_lock
+
+
+class DownloadCache:
+    """Content-addressed cache for downloaded package archives
+
+    Each entry is keyed by the hash provided by the package index and can
+    contain the archive (under its original file name) and individual files
+    extracted from it. Entries are evicted in least-recently-used order when
+    the total size exceeds the maximum size.
+
+    Archives are first downloaded to a partial file, so an interrupted
+    download can be resumed.
+
+    Eviction is serialized between all threads and processes using the cache.
+    Entries that are in use (see `in_use`) are not evicted.
+    """
+
+    def __init__(self, root: Path, max_size: int):
+        self._root = root
+        self._max_size = max_size
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    def _entries_dir(self) -> Path:
+        return self.root / "entries"
+
+    def _partial_dir(self) -> Path:
+        return self.root / "partial"
+
+    def _lock_file(self, entry: Path) -> Path:
+        return self.root / "locks" / f"{entry.parent.name}-{entry.name}.lock"
+
+    def _entry(self, hash_name: str, hash_value: str) -> Path:
+        # The hash comes from the package index, so make sure that it's safe
+        # to use as a path
+        if hash_name not in hashlib.algorithms_guaranteed or not re.fullmatch(r"[0-9a-f]+", hash_value):
+            raise ValueError(f"Invalid hash: {hash_name}:{hash_value}")
+
+        return self._entries_dir() / hash_name / hash_value
+
+    @staticmethod
+    def _touch(entry: Path):
+        with suppress(FileNotFoundError):
+            os.utime(entry)
+
+    @contextmanager
+    def in_use(self, hash_name: str, hash_value: str) -> Iterator[None]:
+        """Prevents eviction of an entry (e.g., an archive returned by
+        `download`) while the context is active
+
+        Must not be nested for the same entry.
+        """
+        with file_lock(self._lock_file(self._entry(hash_name, hash_value)), shared=True):
+            yield
+
+    # Archives #################################################################
+
+    def archive(self, hash_name: str, hash_value: str, file_name: str) -> Path | None:
+        archive = self._entry(hash_name, hash_value) / file_name
+        if not archive.is_file():
+            return None
+
+        self._touch(archive.parent)
+        return archive
+
+    def download(self, session: Any, url: str, file_name: str, hash_name: str, hash_value: str) -> Path:
+        """Returns the cached archive, downloading it if necessary"""
+        if (archive := self.archive(hash_name, hash_value, file_name)) is not None:
+            return archive
+
+        archive = self._entry(hash_name, hash_value) / file_name
+        partial = self._partial_dir() / f"{hash_name}-{hash_value}"
+
+        # The partial file is shared by all threads and processes downloading
+        # the same archive
+        with file_lock(partial.with_name(f"{partial.name}.lock")):
+            # Downloaded by someone else while we were waiting
+            if (cached := self.archive(hash_name, hash_value, file_name)) is not None:
+                return cached
+
+            # Resume an interrupted download, if any
+            offset = partial.stat().st_size if partial.exists() else 0
+            headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+            with session.get_stream(url, headers=headers) as response:
+                if response.status_code == 416:
+                    # The partial file is already complete (or invalid, in
+                    # which case the hash check will fail)
+                    pass
+                else:
+                    response.raise_for_status()
+                    # The server may not support range requests
+                    mode = "ab" if response.status_code == 206 else "wb"
+                    with partial.open(mode) as f:
+                        for chunk in response.iter_bytes():
+                            f.write(chunk)
+
+            with partial.open("rb") as f:
+                actual_hash = hashlib.file_digest(f, hash_name).hexdigest()
+            if actual_hash != hash_value:
+                partial.unlink()
+                raise ValueError(f"Hash mismatch for {url}: expected {hash_name}:{hash_value}, got {actual_hash}")
+
+            archive.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(partial, archive)
+
+        self.evict(keep=archive.parent)
+        return archive
+
+    # Extracted files ##########################################################
+
+    def files(self, hash_name: str, hash_value: str, names: list[str]) -> dict[str, bytes] | None:
+        """Files extracted from an archive
+
+        Returns `None` unless all of the files have been stored (or recorded as
+        missing from the archive).
+        """
+        files_dir = self._entry(hash_name, hash_value) / "files"
+        result = {}
+
+        for name in names:
+            if (files_dir / name).is_file():
+                result[name] = (files_dir / name).read_bytes()
+            elif not (files_dir / f"{name}.missing").is_file():
+                return None
+
+        self._touch(files_dir.parent)
+        return result
+
+    def put_files(self, hash_name: str, hash_value: str, names: list[str], files: dict[str, bytes]):
+        files_dir = self._entry(hash_name, hash_value) / "files"
+
+        for name in names:
+            if name in files:
+                atomic_write_bytes(files_dir / name, files[name])
+            else:
+                atomic_write_bytes(files_dir / f"{name}.missing", b"")
+
+        self.evict(keep=files_dir.parent)
+
+    # Eviction #################################################################
+
+    def _entry_dirs(self) -> Iterator[Path]:
+        if self._entries_dir().exists():
+            for hash_dir in self._entries_dir().iterdir():
+                yield from hash_dir.iterdir()
+
+    @staticmethod
+    def _size(entry: Path) -> int:
+        size = 0
+        for file in entry.rglob("*"):
+            # Files may be replaced concurrently
+            with suppress(FileNotFoundError):
+                if file.is_file():
+                    size += file.stat().st_size
+        return size
+
+    def evict(self, keep: Path | None = None):
+        """Removes least recently used entries until the cache is small enough
+
+        The entry `keep` (which is about to be used) and entries that are in
+        use are never removed.
+        """
+        with file_lock(self.root / "evict.lock"):
+            # Entries may still be removed by others (e.g., by hand)
+            access_times = {}
+            for entry in self._entry_dirs():
+                with suppress(FileNotFoundError):
+                    access_times[entry] = entry.stat().st_mtime_ns
+
+            entries = sorted(access_times, key=access_times.get)
+            sizes = {entry: self._size(entry) for entry in entries}
+            total = sum(sizes.values())
+
+            for entry in entries:
+                if total <= self._max_size:
+                    break
+                if entry == keep:
+                    continue
+
+                with try_file_lock(self._lock_file(entry)) as acquired:
+                    if not acquired:
+                        continue
+
+                    shutil.rmtree(entry, ignore_errors=True)
+                    remove_lock_file(self._lock_file(entry))
+                    total -= sizes[entry]
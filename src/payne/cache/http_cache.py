@@ -0,0 +1,96 @@
+from dataclasses import dataclass
+import hashlib
+import json
+from pathlib import Path
+import re
+import time
+
+from payne.util.file_system import atomic_write_bytes
+
+
+@dataclass(frozen=True)
+class HttpCacheEntry:
+    # The URL of the response, which may differ from the requested URL after
+    # a redirect
+    url: str
+    headers: dict[str, str]
+    content: bytes
+    # When the entry was stored or last revalidated (seconds since the epoch)
+    stored: float
+
+
+class HttpCache:
+    """Persistent cache for HTTP responses (used for package index pages)
+
+    An entry is fresh for the `max-age` from its `Cache-Control` header, but
+    at most `max_age` seconds. Responses with `no-store` are not stored;
+    responses with `no-cache` are always revalidated. Stale entries can be
+    revalidated with a conditional request (see `conditional_headers`).
+    """
+
+    def __init__(self, root: Path, max_age: int):
+        self._root = root
+        self._max_age = max_age
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    def _file(self, key: str) -> Path:
+        return self.root / f"{hashlib.sha256(key.encode()).hexdigest()}.entry"
+
+    @staticmethod
+    def _cache_control(headers: dict[str, str]) -> dict[str, str | None]:
+        directives = {}
+        for directive in headers.get("cache-control", "").split(","):
+            name, _, value = directive.strip().partition("=")
+            if name:
+                directives[name.lower()] = value.strip('"') or None
+        return directives
+
+    def get(self, key: str) -> HttpCacheEntry | None:
+        # An entry is a line of JSON metadata, followed by the content
+        try:
+            metadata, content = self._file(key).read_bytes().split(b"\n", 1)
+            metadata = json.loads(metadata)
+            return HttpCacheEntry(metadata["url"], metadata["headers"], content, metadata["stored"])
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+
+    def put(self, key: str, url: str, headers: dict[str, str], content: bytes) -> HttpCacheEntry | None:
+        """Stores a response, unless it must not be stored
+
+        The header names must be lower case.
+        """
+        if "no-store" in self._cache_control(headers):
+            return None
+
+        entry = HttpCacheEntry(url, headers, content, time.time())
+        metadata = {"url": entry.url, "headers": entry.headers, "stored": entry.stored}
+        atomic_write_bytes(self._file(key), json.dumps(metadata).encode() + b"\n" + content)
+        return entry
+
+    def revalidated(self, key: str, entry: HttpCacheEntry, headers: dict[str, str]) -> HttpCacheEntry | None:
+        """Updates an entry after the server confirmed that it's still valid
+        (with a 304 response and its headers)"""
+        return self.put(key, entry.url, {**entry.headers, **headers}, entry.content)
+
+    def is_fresh(self, entry: HttpCacheEntry) -> bool:
+        cache_control = self._cache_control(entry.headers)
+        if "no-cache" in cache_control:
+            return False
+
+        max_age = self._max_age
+        if (value := cache_control.get("max-age")) is not None and re.fullmatch(r"\d+", value):
+            max_age = min(max_age, int(value))
+
+        return time.time() - entry.stored < max_age
+
+    @staticmethod
+    def conditional_headers(entry: HttpCacheEntry) -> dict[str, str]:
+        headers = {}
+        if (etag := entry.headers.get("etag")) is not None:
+            headers["If-None-Match"] = etag
+        if (last_modified := entry.headers.get("last-modified")) is not None:
+            headers["If-Modified-Since"] = last_modified
+        return headers
@@ -0,0 +1,35 @@
+import json
+from pathlib import Path
+
+from payne.project import Metadata
+from payne.util.file_system import atomic_write_text
+
+
+class MetadataCache:
+    """Persistent cache for project metadata
+
+    The metadata is keyed by the project fingerprint (see
+    `payne.project.fingerprint`), so an entry is only used as long as the
+    project is unchanged.
+    """
+
+    def __init__(self, root: Path):
+        self._root = root
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    def _file(self, fingerprint: str) -> Path:
+        return self.root / f"{fingerprint}.json"
+
+    def get(self, fingerprint: str) -> Metadata | None:
+        try:
+            data = json.loads(self._file(fingerprint).read_text())
+            return Metadata(data["name"], data["version"])
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            return None
+
+    def put(self, fingerprint: str, metadata: Metadata):
+        data = {"name": metadata.name, "version": metadata.version}
+        atomic_write_text(self._file(fingerprint), json.dumps(data))
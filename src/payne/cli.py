@@ -1,11 +1,14 @@
 from pathlib import Path
 import sys
-from typing import Annotated
+from typing import Annotated, Literal
 
 from cyclopts import App, Parameter
 
 from payne import Payne, Config
-from payne.exceptions import AppVersionAlreadyInstalled
+from payne.bundle import Bundle
+from payne.exceptions import AppVersionAlreadyInstalled, NotAvailableOffline, PackageNotFound
+from payne.package import Package
+from payne.util.profiling import Profile
 
 app = App()
 
@@ -15,25 +18,82 @@ def status():
     Payne().status()
 
 
+def _packages(specs: tuple[str, ...]) -> list[Package]:
+    # Either `NAME VERSION` or any number of `NAME==VERSION`
+    match specs:
+        case (n, v) if "==" not in n and "==" not in v:
+            return [Package.parse(f"{n}=={v}")]
+        case _:
+            return [Package.parse(spec) for spec in specs]
+
+
 @app.command
 def install(
-        name: str | None = None,
-        version: str | None = None,
-        /, *,
-        from_: Path | None = None,
+        *specs: str,
+        from_: list[Path] | None = None,
+        from_bundle: list[Path] | None = None,
         locked: bool = True,
         reinstall: bool = False,
+        jobs: int = 4,
+        dedupe: bool = False,
+        incremental: bool = False,
+):
+    try:
+        packages = _packages(specs)
+    except ValueError as e:
+        print(e)
+        return 1
+
+    payne = Payne()
+    sources = [*packages, *(payne.project(f) for f in from_ or []), *(Bundle(f) for f in from_bundle or [])]
+
+    match sources:
+        case []:
+            print("Either name and version, --from or --from-bundle have to be specified")
+        case [source]:
+            try:
+                payne.install(source, locked=locked, reinstall=reinstall, dedupe=dedupe, incremental=incremental)
+            except AppVersionAlreadyInstalled as e:
+                print(e)
+            except (NotAvailableOffline, PackageNotFound) as e:
+                print(e)
+                return 1
+        case _:
+            results = payne.install_batch(sources, locked=locked, reinstall=reinstall, jobs=jobs, dedupe=dedupe,
+                                          incremental=incremental)
+            if not all(result.success for result in results):
+                return 1
+
+
+@app.command
+def prefetch(
+        *specs: str,
+        from_: list[Path] | None = None,
+        locked: bool = True,
+        jobs: int = 4,
 ):
     try:
-        match name, version, from_:
-            case n, v, None:
-                Payne().install_package(n, v, locked=locked, reinstall=reinstall)
-            case None, None, f:
-                Payne().install_project(f, locked=locked, reinstall=reinstall)
-            case _:
-                print("Either name and version or --from have to be specified")
-    except AppVersionAlreadyInstalled as e:
+        packages = _packages(specs)
+    except ValueError as e:
         print(e)
+        return 1
+
+    payne = Payne()
+    sources = [*packages, *(payne.project(f) for f in from_ or [])]
+
+    if not sources:
+        print("Either name and version or --from have to be specified")
+        return 1
+
+    results = payne.prefetch_batch(sources, locked=locked, jobs=jobs)
+    if not all(result.success for result in results):
+        return 1
+
+
+@app.command
+def bundle(name: str, version: str, *, output: Path | None = None, locked: bool = True):
+    output = output or Path(f"{name}-{version}.payne-bundle.tar")
+    Payne().bundle(name, version, output, locked=locked)
 
 
 @app.command
@@ -42,8 +102,24 @@ def uninstall(package_name: str, version: str):
 
 
 @app.command
-def list_():
-    Payne().list_()
+def dedupe():
+    Payne().dedupe()
+
+
+@app.command
+def verify(*, record: bool = False, jobs: int = 8, json: bool = False):
+    if not Payne().verify(record=record, jobs=jobs, json_=json):
+        return 1
+
+
+@app.command
+def gc(*, trash: bool = False):
+    Payne().gc(trash=trash)
+
+
+@app.command
+def list_(*, rebuild_index: bool = False):
+    Payne().list_(rebuild_index=rebuild_index)
 
 
 @app.meta.default
@@ -53,13 +129,37 @@ def main_meta(
         bin_dir: Path | None = None,
         uv: Path | None = None,
         index: list[str] | None = None,
+        cache_dir: Path | None = None,
+        no_cache: bool = False,
+        download_cache_max_size: int | None = None,
+        index_cache_max_age: int | None = None,
+        build_env_max_age: int | None = None,
+        trusted_build_backend: list[str] | None = None,
+        offline: bool = False,
+        profile: Path | None = None,
+        profile_format: Literal["json", "chrome"] = "json",
         ):
     with Config.create(
             apps_dir=apps_dir,
             bin_dir=bin_dir,
             package_indices=dict(i.split("=", 1) for i in (index or [])),
-            uv=uv):
-        app(tokens)
+            uv=uv,
+            cache_dir=cache_dir,
+            no_cache=no_cache,
+            download_cache_max_size=download_cache_max_size,
+            index_cache_max_age=index_cache_max_age,
+            build_env_max_age=build_env_max_age,
+            trusted_build_backends=tuple(trusted_build_backend) if trusted_build_backend else None,
+            # Not specified: from the environment
+            offline=offline or None):
+        if profile is None:
+            return app(tokens)
+
+        with Profile() as profile_data:
+            try:
+                return app(tokens)
+            finally:
+                profile_data.write(profile, profile_format)
 
 
 def main():
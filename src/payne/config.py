@@ -4,8 +4,6 @@ from typing import Callable
 import os
 import sys
 
-import platformdirs
-
 
 @dataclass
 class Config:
@@ -13,6 +11,12 @@ class Config:
     bin_dir: Path
     package_indices: dict[str, str]
     uv: str
+    cache_dir: Path | None = None  # None disables caching (`--no-cache` or an empty `PAYNE_CACHE_DIR`)
+    download_cache_max_size: int = 2 * 1024 ** 3
+    index_cache_max_age: int = 600  # Seconds
+    build_env_max_age: int = 7 * 24 * 3600  # Seconds
+    trusted_build_backends: tuple[str, ...] = ()  # Top-level module names
+    offline: bool = False
 
     def __enter__(self):
         global _config
@@ -26,8 +30,14 @@ class Config:
 
     @staticmethod
     def _default_apps_dir() -> Path:
+        import platformdirs
         return Path(platformdirs.user_data_dir("payne", False)) /  "apps"
 
+    @staticmethod
+    def _default_cache_dir() -> Path:
+        import platformdirs
+        return Path(platformdirs.user_cache_dir("payne", False))
+
     @staticmethod
     def _default_bin_dir() -> Path:
         # Platformdirs doesn't support this, so we'll have to do it ourselves.
@@ -48,7 +58,10 @@ class Config:
         return Path.home() / ".local" / "bin"
 
     @staticmethod
-    def _value[T](explicit: T | None, environment: tuple[str, Callable[[str], T]] | None, default: T) -> T:
+    def _value[T](explicit: T | None, environment: tuple[str, Callable[[str], T]] | None,
+                  default: Callable[[], T]) -> T:
+        # The default is only determined if needed, since that may be
+        # expensive
         if explicit is not None:
             return explicit
 
@@ -57,7 +70,7 @@ class Config:
             if environment_variable in os.environ:
                 return converter(os.environ[environment_variable])
 
-        return default
+        return default()
 
     @classmethod
     def create(
@@ -66,12 +79,33 @@ class Config:
             bin_dir: Path | None,
             package_indices: dict[str, str],
             uv: str | None,
+            cache_dir: Path | None = None,
+            download_cache_max_size: int | None = None,
+            index_cache_max_age: int | None = None,
+            build_env_max_age: int | None = None,
+            trusted_build_backends: tuple[str, ...] | None = None,
+            offline: bool | None = None,
+            no_cache: bool = False,
     ):
         return Config(
-            apps_dir=cls._value(apps_dir, ("PAYNE_APPS_DIR", Path), cls._default_apps_dir()),
-            bin_dir=cls._value(bin_dir, ("PAYNE_BIN_DIR", Path), cls._default_bin_dir()),
-            package_indices=cls._value(package_indices, None, {}),  # TODO allow environment
-            uv=cls._value(uv, ("PAYNE_UV", str), "uv"),
+            apps_dir=cls._value(apps_dir, ("PAYNE_APPS_DIR", Path), cls._default_apps_dir),
+            bin_dir=cls._value(bin_dir, ("PAYNE_BIN_DIR", Path), cls._default_bin_dir),
+            package_indices=cls._value(package_indices, None, dict),  # TODO allow environment
+            uv=cls._value(uv, ("PAYNE_UV", str), lambda: "uv"),
+            cache_dir=None if no_cache else cls._value(
+                cache_dir, ("PAYNE_CACHE_DIR", lambda value: Path(value) if value else None), cls._default_cache_dir),
+            download_cache_max_size=cls._value(download_cache_max_size, ("PAYNE_DOWNLOAD_CACHE_MAX_SIZE", int),
+                                               lambda: cls.download_cache_max_size),
+            index_cache_max_age=cls._value(index_cache_max_age, ("PAYNE_INDEX_CACHE_MAX_AGE", int),
+                                           lambda: cls.index_cache_max_age),
+            build_env_max_age=cls._value(build_env_max_age, ("PAYNE_BUILD_ENV_MAX_AGE", int),
+                                         lambda: cls.build_env_max_age),
+            trusted_build_backends=cls._value(trusted_build_backends,
+                                              ("PAYNE_TRUSTED_BUILD_BACKENDS",
+                                               lambda value: tuple(v.strip() for v in value.split(",") if v.strip())),
+                                              lambda: cls.trusted_build_backends),
+            offline=cls._value(offline, ("PAYNE_OFFLINE", lambda value: value.lower() in ("1", "true", "yes")),
+                               lambda: cls.offline),
         )
 
 
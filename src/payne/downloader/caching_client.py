@@ -0,0 +1,85 @@
+"""HTTP client that caches package index pages
+
+Only imported when needed, since httpx and unearth take a while to import.
+"""
+
+from typing import Any
+
+import httpx
+from unearth.fetchers.sync import PyPIClient
+
+from payne.cache.http_cache import HttpCache, HttpCacheEntry
+from payne.exceptions import NotAvailableOffline
+
+# Headers that describe the transfer rather than the (decoded) content
+_transfer_headers = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+
+
+class CachingClient(PyPIClient):
+    """Same as `PyPIClient`, but index pages are cached (if `http_cache` is
+    specified)
+
+    Index pages are requested by unearth with the content types of the simple
+    repository API in the `Accept` header, which is also part of the cache
+    key. Other requests (e.g., for archives) are not cached.
+
+    In offline mode, cached index pages are used no matter how old they are.
+    Index pages that are not cached are treated as unavailable (which unearth
+    skips), and other remote requests raise `NotAvailableOffline`.
+    """
+
+    def __init__(self, http_cache: HttpCache | None, *, offline: bool = False, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._http_cache = http_cache
+        self._offline = offline
+
+    @staticmethod
+    def _is_index_request(request: httpx.Request) -> bool:
+        return (request.method == "GET"
+                and request.url.scheme in ("http", "https")
+                and "application/vnd.pypi.simple" in request.headers.get("Accept", "")
+                and "Range" not in request.headers)
+
+    @staticmethod
+    def _response(entry: HttpCacheEntry) -> httpx.Response:
+        return httpx.Response(200, headers=entry.headers, content=entry.content,
+                              request=httpx.Request("GET", entry.url))
+
+    def send(self, request: httpx.Request, *, stream: bool = False, **kwargs: Any) -> httpx.Response:
+        if stream or not self._is_index_request(request):
+            if self._offline and request.url.scheme in ("http", "https"):
+                raise NotAvailableOffline(str(request.url))
+            return super().send(request, stream=stream, **kwargs)
+
+        key = f"{request.headers['Accept']} {request.url}"
+        entry = self._http_cache.get(key) if self._http_cache is not None else None
+
+        if self._offline:
+            # Like a cache that is asked for a response it doesn't have with
+            # `Cache-Control: only-if-cached`
+            return self._response(entry) if entry is not None else httpx.Response(504, request=request)
+
+        if self._http_cache is None:
+            return super().send(request, **kwargs)
+
+        if entry is not None:
+            if self._http_cache.is_fresh(entry):
+                return self._response(entry)
+
+            request.headers.update(self._http_cache.conditional_headers(entry))
+
+        response = super().send(request, **kwargs)
+
+        if response.status_code == 304 and entry is not None:
+            headers = {name.lower(): value for name, value in response.headers.items()
+                       if name.lower() not in _transfer_headers}
+            response.close()
+            self._http_cache.revalidated(key, entry, headers)
+            return self._response(entry)
+
+        if response.status_code == 200:
+            headers = {name.lower(): value for name, value in response.headers.items()
+                       if name.lower() not in _transfer_headers}
+            self._http_cache.put(key, str(response.url), headers, response.content)
+
+        return response
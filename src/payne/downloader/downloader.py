@@ -1,13 +1,121 @@
+import atexit
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+import io
+from itertools import chain
 from pathlib import Path
+import threading
+from typing import TYPE_CHECKING
 
-from unearth import PackageFinder
-
+from payne.downloader.remote_file import RangeFile, StreamFile
+from payne.downloader.sdist_files import is_zip, read_sdist_files
+from payne.exceptions import NotAvailableOffline, PackageNotFound
 from payne.package import Package
 
+if TYPE_CHECKING:
+    from unearth import Link, PackageFinder
+    from unearth.fetchers import Fetcher
+
+    from payne.cache import DownloadCache, HttpCache
+
+# Reads from remote zip archives are buffered, so that headers are read with a
+# single range request
+_range_buffer_size = 64 * 1024
+
 
 class Downloader:
-    @staticmethod
-    def download_and_unpack_sdist(package: Package, target: Path, package_indices: dict[str, str]) -> Path:
+    """Downloads packages from package indices
+
+    The HTTP session is shared by all downloads of a `Downloader` (including
+    from multiple threads), so connections are kept alive between requests.
+    If `http_cache` is specified, index pages are cached there.
+
+    In offline mode, only index pages from the HTTP cache and archives and
+    files from the download cache are used.
+    """
+
+    def __init__(self, cache: "DownloadCache | None" = None, http_cache: "HttpCache | None" = None, *,
+                 offline: bool = False):
+        self._cache = cache
+        self._http_cache = http_cache
+        self._offline = offline
+        self._sessions: dict[tuple[str, ...], "Fetcher"] = {}
+        self._sessions_lock = threading.Lock()
+
+    def _session(self, index_urls: tuple[str, ...]) -> "Fetcher":
+        # The same as unearth would create, but we keep it. The credentials
+        # depend on the indices.
+        from unearth.auth import MultiDomainBasicAuth
+        from unearth.fetchers.sync import PyPIClient
+
+        with self._sessions_lock:
+            if (session := self._sessions.get(index_urls)) is None:
+                if self._http_cache is not None or self._offline:
+                    from payne.downloader.caching_client import CachingClient
+                    session = CachingClient(self._http_cache, offline=self._offline)
+                else:
+                    session = PyPIClient()
+                session.auth = MultiDomainBasicAuth(index_urls=list(index_urls))
+                atexit.register(session.close)
+                self._sessions[index_urls] = session
+
+            return session
+
+    def _find_sdist(self, package: Package, package_indices: dict[str, str]) -> tuple["PackageFinder", "Link"]:
+        """Finds the best match for a package in all indices
+
+        The indices are queried concurrently, with one finder per index. The
+        results are merged by version (with yanked files last), with the
+        earlier index (PyPI first) winning for the same version. Prereleases are only included if the
+        specifier allows them or an index has nothing else, which is decided
+        per index.
+        """
+        # unearth and packaging take a while to import and are only needed for
+        # downloading
+        from packaging.version import Version
+        from unearth import PackageFinder
+
+        index_urls = tuple(package_indices.values())
+        session = self._session(index_urls)
+
+        # A finder without indices uses PyPI, which is always included (like
+        # when adding the indices to a finder)
+        finders = [PackageFinder(session, no_binary=[package.name]),
+                   *(PackageFinder(session, index_urls=[url], no_binary=[package.name]) for url in index_urls)]
+
+        def find_matches(finder: PackageFinder) -> list:
+            return list(finder.find_matches(package.requirement_specifier()))
+
+        with ThreadPoolExecutor(max_workers=len(finders)) as executor:
+            matches = chain.from_iterable(executor.map(find_matches, finders))
+
+        # Best match first. Yanked files are only returned for pinned versions,
+        # and only used if there is nothing else (like a single finder would).
+        # The sort is stable (also in reverse), so for the same version, the
+        # earlier index wins.
+        matches = sorted(matches, key=lambda match: (not match.link.is_yanked, Version(match.version)),
+                         reverse=True)
+
+        if not matches:
+            if self._offline:
+                raise NotAvailableOffline(f"the index page for {package.requirement_specifier()}")
+            raise PackageNotFound(package)
+
+        best_package = matches[0]
+
+        # The finder is only used for downloading from here on, which works the
+        # same for all of them
+        return finders[0], best_package.link
+
+    def _cache_key(self, link: "Link") -> tuple[str, str] | None:
+        # We can only cache remote files for which the index provides a hash.
+        # Local files don't need to be cached.
+        if self._cache is None or link.is_file or link.hash_name is None:
+            return None
+
+        return link.hash_name, link.hash
+
+    def download_and_unpack_sdist(self, package: Package, target: Path, package_indices: dict[str, str]) -> Path:
         """Downloads and unpacks a source distribution package
 
         One might assume that this functionality would be available in pip. But
@@ -20,20 +128,88 @@ class Downloader:
         [1] https://discuss.python.org/t/pip-download-just-the-source-packages-no-building-no-metadata-etc/4651/8
         """
 
-        finder = PackageFinder(no_binary=[package.name])
-
-        for url in package_indices.values():
-            finder.add_index_url(url)
-
         print(f"Downloading {package.requirement_specifier()}")
+        finder, link = self._find_sdist(package, package_indices)
+
+        # If the download cache applies, download (or re-use) the archive there
+        # and unpack the local file (which must not be evicted in the meantime)
+        if (key := self._cache_key(link)) is not None:
+            from unearth import Link
 
-        # TODO handle not found
-        result = finder.find_best_match(package.requirement_specifier())
-        best_package = result.best
+            with self._cache.in_use(*key):
+                archive = self._cache.download(finder.session, link.normalized, link.filename, *key)
+                return finder.download_and_unpack(Link.from_path(archive), target)
 
         # Unearth only has combined downloading and unpacking. Since we will have to
         # unpack it anyway, that's fine.
         # TODO verify that this works with a proxy and a locally installed
         #  certificate. If it doesn't, we may have to download `best_package.link`
         # in another way and unpack it ourselves.
-        return finder.download_and_unpack(best_package.link, target)
+        return finder.download_and_unpack(link, target)
+
+    @staticmethod
+    def _read_sdist_files(finder: "PackageFinder", link: "Link", names: list[str]) -> dict[str, bytes]:
+        if link.is_file:
+            with link.file_path.open("rb") as file:
+                return read_sdist_files(file, link.filename, names)
+
+        elif is_zip(link.filename) and (range_file := RangeFile.open(finder.session, link.normalized)):
+            # zipfile does many small reads (e.g., for each header), which
+            # would be a range request each
+            with io.BufferedReader(range_file, buffer_size=_range_buffer_size) as buffered_file:
+                return read_sdist_files(buffered_file, link.filename, names)
+
+        else:
+            with finder.session.get_stream(link.normalized) as response:
+                response.raise_for_status()
+                stream_file = StreamFile(response.iter_bytes())
+
+                if is_zip(link.filename):
+                    # The index of a zip archive is at the end, so we have to
+                    # read all of it
+                    return read_sdist_files(io.BytesIO(stream_file.read()), link.filename, names)
+                else:
+                    return read_sdist_files(stream_file, link.filename, names)
+
+    def download_sdist_files(self, package: Package, target: Path, package_indices: dict[str, str],
+                             names: Iterable[str]) -> Path:
+        """Downloads only the specified files from the top-level directory of
+        a source distribution package
+
+        For a zip archive, only the index and the requested files are
+        transferred if the server supports range requests. Otherwise, the
+        archive is streamed and the transfer stops as soon as all files have
+        been found (only for tar archives; since the index of a zip archive is
+        at the end, it has to be transferred completely).
+
+        If the download cache applies, the files are taken from the cache (or
+        from the cached archive) if possible, and stored in the cache
+        otherwise.
+
+        The files are written to `target`, which is returned. Files that are
+        not in the archive are skipped.
+        """
+
+        names = list(names)
+        print(f"Downloading {', '.join(names)} from {package.requirement_specifier()}")
+        finder, link = self._find_sdist(package, package_indices)
+
+        if (key := self._cache_key(link)) is None:
+            files = self._read_sdist_files(finder, link, names)
+        else:
+            # The cached archive must not be evicted while it's being read
+            with self._cache.in_use(*key):
+                if (files := self._cache.files(*key, names)) is None:
+                    if (archive := self._cache.archive(*key, link.filename)) is not None:
+                        from unearth import Link
+
+                        files = self._read_sdist_files(finder, Link.from_path(archive), names)
+                    else:
+                        files = self._read_sdist_files(finder, link, names)
+                    self._cache.put_files(*key, names, files)
+
+        target.mkdir(parents=True, exist_ok=True)
+        for name, data in files.items():
+            (target / name).write_bytes(data)
+
+        return target
@@ -0,0 +1,104 @@
+from collections.abc import Iterator
+import io
+import re
+from typing import Any, Self
+
+
+class RangeFile(io.RawIOBase):
+    """A seekable, read-only file that reads a remote file via HTTP range
+    requests
+
+    Only the parts of the file that are actually read are transferred. This is
+    useful for formats with an index, such as zip archives.
+    """
+
+    def __init__(self, session: Any, url: str, size: int):
+        super().__init__()
+        self._session = session
+        self._url = url
+        self._size = size
+        self._position = 0
+        self.bytes_transferred = 0
+
+    @classmethod
+    def open(cls, session: Any, url: str) -> Self | None:
+        """Returns `None` if the server doesn't support range requests"""
+        # A minimal range request tells us whether ranges are supported and the
+        # size of the file
+        with session.get_stream(url, headers={"Range": "bytes=0-0"}) as response:
+            if response.status_code != 206:
+                return None
+
+            match = re.fullmatch(r"bytes 0-0/(\d+)", response.headers.get("Content-Range", ""))
+            if match is None:
+                return None
+
+        return cls(session, url, int(match.group(1)))
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        match whence:
+            case io.SEEK_SET:
+                self._position = offset
+            case io.SEEK_CUR:
+                self._position += offset
+            case io.SEEK_END:
+                self._position = self._size + offset
+            case _:
+                raise ValueError(f"Invalid whence: {whence}")
+
+        return self._position
+
+    def readinto(self, buffer) -> int:
+        end = min(self._position + len(buffer), self._size)
+        if end <= self._position:
+            return 0
+
+        response = self._session.get(self._url, headers={"Range": f"bytes={self._position}-{end - 1}"})
+        response.raise_for_status()
+        if response.status_code != 206:
+            raise OSError(f"Range request not honored for {self._url}")
+
+        data = response.content
+        buffer[:len(data)] = data
+        self._position += len(data)
+        self.bytes_transferred += len(data)
+        return len(data)
+
+
+class StreamFile(io.RawIOBase):
+    """A non-seekable, read-only file that reads from a stream of chunks
+
+    Reading stops (and the rest of the stream is never transferred) as soon as
+    the file is no longer read.
+    """
+
+    def __init__(self, chunks: Iterator[bytes]):
+        super().__init__()
+        self._chunks = chunks
+        self._pending = b""
+        self.bytes_transferred = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._pending = chunk
+            self.bytes_transferred += len(chunk)
+
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
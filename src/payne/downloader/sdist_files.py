@@ -0,0 +1,52 @@
+from collections.abc import Iterable
+import re
+import tarfile
+from typing import BinaryIO
+import zipfile
+
+
+def _top_level_name(member_name: str, names: Iterable[str]) -> str | None:
+    """The name of a file in the top-level directory of an sdist
+
+    All files in an sdist are in a directory `{name}-{version}`.
+    """
+    for name in names:
+        if re.fullmatch(rf"[^/]+/{re.escape(name)}", member_name):
+            return name
+
+    return None
+
+
+def is_zip(file_name: str) -> bool:
+    return file_name.lower().endswith(".zip")
+
+
+def read_sdist_files(file: BinaryIO, file_name: str, names: Iterable[str]) -> dict[str, bytes]:
+    """Reads files from the top-level directory of an sdist archive
+
+    Tar archives are read sequentially (`file` doesn't have to be seekable)
+    and reading stops as soon as all files have been found. Zip archives must
+    be seekable; only the index and the requested files are read.
+
+    Files that are not in the archive are missing from the result.
+    """
+    names = set(names)
+    result = {}
+
+    if is_zip(file_name):
+        with zipfile.ZipFile(file) as archive:
+            for info in archive.infolist():
+                if (name := _top_level_name(info.filename, names)) is not None and not info.is_dir():
+                    result[name] = archive.read(info)
+
+    else:
+        # Streaming mode, so we never seek backwards
+        with tarfile.open(fileobj=file, mode="r|*") as archive:
+            for member in archive:
+                if (name := _top_level_name(member.name, names)) is not None and member.isfile():
+                    result[name] = archive.extractfile(member).read()
+
+                    if result.keys() == names:
+                        break
+
+    return result
@@ -1,2 +1,4 @@
 from .app_version_already_installed import AppVersionAlreadyInstalled
-from .frontend_not_recognized import FrontendNotRecognized
\ No newline at end of file
+from .frontend_not_recognized import FrontendNotRecognized
+from .not_available_offline import NotAvailableOffline
+from .package_not_found import PackageNotFound
\ No newline at end of file
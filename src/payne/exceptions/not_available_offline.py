@@ -0,0 +1,6 @@
+class NotAvailableOffline(Exception):
+    def __init__(self, what: str):
+        self.what = what
+
+    def __str__(self):
+        return f"Offline mode: {self.what} is not available from the local caches"
@@ -0,0 +1,12 @@
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from payne.package import Package
+
+
+class PackageNotFound(Exception):
+    def __init__(self, package: "Package"):
+        self.package = package
+
+    def __str__(self):
+        return f"No source distribution found for {self.package.requirement_specifier()}"
@@ -1,11 +1,12 @@
 from abc import ABC, abstractmethod
 from pathlib import Path
 
+from payne.bundle import Bundle
 from payne.project import Project
 from payne.package import Package
 
 
-InstallSource = Project | Package
+InstallSource = Project | Package | Bundle
 
 
 class Installer(ABC):
@@ -16,19 +17,32 @@ class Installer(ABC):
     def package_indices(self) -> dict[str, str]:
         return self._package_indices
 
+    # If `incremental` is true, `target_dir` contains an environment of another
+    # version of the app that is to be updated
+
+    @abstractmethod
+    def install_project(self, project: Project, target_dir: Path, bin_dir: Path, *, constraints: Path | None,
+                        incremental: bool = False):
+        ...
+
     @abstractmethod
-    def install_project(self, project: Project, target_dir: Path, bin_dir: Path, *, constraints: Path | None):
+    def install_package(self, package: Package, target_dir: Path, bin_dir: Path, *, constraints: Path | None,
+                        incremental: bool = False):
         ...
 
     @abstractmethod
-    def install_package(self, package: Package, target_dir: Path, bin_dir: Path, *, constraints: Path | None):
+    def install_bundle(self, bundle: Bundle, target_dir: Path, bin_dir: Path, *, constraints: Path | None,
+                       incremental: bool = False):
         ...
 
-    def install(self, source: InstallSource, target_dir: Path, bin_dir: Path, *, constraints: Path | None):
+    def install(self, source: InstallSource, target_dir: Path, bin_dir: Path, *, constraints: Path | None,
+                incremental: bool = False):
         match source:
             case Project():
-                self.install_project(source, target_dir, bin_dir, constraints=constraints)
+                self.install_project(source, target_dir, bin_dir, constraints=constraints, incremental=incremental)
             case Package():
-                self.install_package(source, target_dir, bin_dir, constraints=constraints)
+                self.install_package(source, target_dir, bin_dir, constraints=constraints, incremental=incremental)
+            case Bundle():
+                self.install_bundle(source, target_dir, bin_dir, constraints=constraints, incremental=incremental)
             case _:
                 raise TypeError(f"Unknown installation source: {source}")
@@ -4,32 +4,52 @@ import shlex
 import shutil
 import subprocess
 
+from payne.bundle import Bundle
 from payne.config import config
 from payne.project import Project
 from payne.package import Package
 from payne.installer import Installer
+from payne.util.file_system import TemporaryDirectory
+from payne.util.profiling import span
 
 
 class UvInstaller(Installer):
-    def _uv_tool_install(self, source_args: list[str], target_dir: Path, bin_dir: Path, constraints: Path | None):
+    def _uv_tool_install(self, name: str, source_args: list[str], target_dir: Path, bin_dir: Path,
+                         constraints: Path | None, incremental: bool, find_links: Path | None = None):
         if constraints and constraints.exists() and constraints.read_text().strip():
             constraints_args = ["--constraints", constraints]
         else:
             constraints_args = []
 
-        index_args = []
-        for name, url in self.package_indices.items():
-            index_args.append("--index")
-            index_args.append(f"{name}={url}")
+        if find_links is not None:
+            # Only the local packages
+            index_args = ["--no-index", "--find-links", find_links]
+        else:
+            index_args = []
+            for index_name, url in self.package_indices.items():
+                index_args.append("--index")
+                index_args.append(f"{index_name}={url}")
+
+        # uv fails if something is not in its cache
+        offline_args = ["--offline"] if config().offline or find_links is not None else []
+
+        if incremental:
+            # The environment of another version has been cloned. Only
+            # reinstall the app itself (which also installs its scripts) and
+            # let uv sync the dependencies.
+            reinstall_args = ["--reinstall-package", name]
+        else:
+            # Re-install in case it's already installed and we missed it. Should
+            # have raised an exception, but uv doesn't return an error code in
+            # this case.
+            reinstall_args = ["--reinstall"]
 
-        # Re-install in case it's already installed and we missed it. Should
-        # have raised an exception, but uv doesn't return an error code in this
-        # case.
         args = [
             shutil.which(config().uv),
             "tool",
             "install",
-            "--reinstall",
+            *reinstall_args,
+            *offline_args,
             *index_args,
             *constraints_args,
             *source_args,
@@ -45,20 +65,40 @@ class UvInstaller(Installer):
         env["PATH"] = os.pathsep.join([env["PATH"], str(bin_dir)])
 
         print(f"Calling uv: {shlex.join(map(str, args))}")
-        return subprocess.run(args, env=env, check=True)
+        with span("uv tool install", name=name):
+            return subprocess.run(args, env=env, check=True)
 
-    def install_project(self, project: Project, target_dir: Path, bin_dir: Path, constraints: Path | None):
+    def install_project(self, project: Project, target_dir: Path, bin_dir: Path, constraints: Path | None,
+                        incremental: bool = False):
         self._uv_tool_install(
+            project.metadata().name,
             ["--from", project.root, project.metadata().name],
             target_dir,
             bin_dir,
             constraints=constraints,
+            incremental=incremental,
         )
 
-    def install_package(self, package: Package, target_dir: Path, bin_dir: Path, constraints: Path | None):
+    def install_package(self, package: Package, target_dir: Path, bin_dir: Path, constraints: Path | None,
+                        incremental: bool = False):
         self._uv_tool_install(
+            package.name,
             [package.requirement_specifier()],
             target_dir,
             bin_dir,
             constraints=constraints,
+            incremental=incremental,
         )
+
+    def install_bundle(self, bundle: Bundle, target_dir: Path, bin_dir: Path, constraints: Path | None,
+                       incremental: bool = False):
+        with TemporaryDirectory() as temp_dir:
+            self._uv_tool_install(
+                bundle.package.name,
+                [bundle.package.requirement_specifier()],
+                target_dir,
+                bin_dir,
+                constraints=constraints,
+                incremental=incremental,
+                find_links=bundle.extract_wheels(temp_dir),
+            )
@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 import re
+from typing import Self
 
 
 @dataclass(frozen=True)
@@ -10,6 +11,17 @@ class Package:
     def __post_init__(self):
         assert re.fullmatch(r'\d.*', self.version)
 
+    @classmethod
+    def parse(cls, specifier: str) -> Self:
+        """Parses a requirement specifier of the form `name==version`"""
+        name, separator, version = specifier.partition("==")
+        if not (separator and name.strip() and version.strip()):
+            raise ValueError(f"Invalid package specifier: {specifier}")
+        if not re.fullmatch(r'\d.*', version.strip()):
+            raise ValueError(f"Invalid version: {version.strip()}")
+
+        return cls(name.strip(), version.strip())
+
     def __str__(self):
         return f"{self.name} {self.version}"
 
@@ -1,9 +1,14 @@
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from functools import cached_property
+import json
 from pathlib import Path
 import shutil
 
-
-from payne.app import AppVersion, AppsDir
+from payne.app import AppVersion, AppsDir, AppsIndex, DedupeResult, IndexEntry, Problem
+from payne.bundle import Bundle, UvBundleBuilder
+from payne.cache import BuildEnvPool, ConstraintsCache, DownloadCache, HttpCache, MetadataCache
 from payne.config import config
 from payne.downloader import Downloader
 from payne.exceptions import AppVersionAlreadyInstalled, FrontendNotRecognized
@@ -11,6 +16,17 @@ from payne.installer import UvInstaller
 from payne.project import Project
 from payne.package import Package
 from payne.util.file_system import TemporaryDirectory
+from payne.util.profiling import span
+
+
+@dataclass(frozen=True)
+class InstallResult:
+    source: Project | Package
+    error: Exception | None = None
+
+    @property
+    def success(self) -> bool:
+        return self.error is None
 
 
 class Payne:
@@ -21,101 +37,382 @@ class Payne:
     def apps_dir(self) -> AppsDir:
         return AppsDir(config().apps_dir)
 
+    @cached_property
+    def apps_index(self) -> AppsIndex | None:
+        if config().cache_dir is None:
+            return None
+        return AppsIndex(config().cache_dir / "apps_index.sqlite", config().apps_dir)
+
+    def _update_index(self, app_version: AppVersion):
+        if self.apps_index is None:
+            return
+
+        if app_version.is_installed():
+            script_names = [script.file.name for script in app_version.read_metadata().scripts]
+            self.apps_index.add(app_version.name, app_version.version, script_names)
+        else:
+            self.apps_index.remove(app_version.name, app_version.version)
+
+    @cached_property
+    def metadata_cache(self) -> MetadataCache | None:
+        if config().cache_dir is None:
+            return None
+        return MetadataCache(config().cache_dir / "metadata")
+
+    @cached_property
+    def constraints_cache(self) -> ConstraintsCache | None:
+        if config().cache_dir is None:
+            return None
+        return ConstraintsCache(config().cache_dir / "constraints")
+
+    @cached_property
+    def download_cache(self) -> DownloadCache | None:
+        if config().cache_dir is None:
+            return None
+        return DownloadCache(config().cache_dir / "downloads", config().download_cache_max_size)
+
+    @cached_property
+    def http_cache(self) -> HttpCache | None:
+        if config().cache_dir is None:
+            return None
+        return HttpCache(config().cache_dir / "http", config().index_cache_max_age)
+
+    @cached_property
+    def build_env_pool(self) -> BuildEnvPool | None:
+        if config().cache_dir is None:
+            return None
+        return BuildEnvPool(config().cache_dir / "build_envs", config().build_env_max_age, shutil.which(config().uv))
+
+    @cached_property
+    def downloader(self) -> Downloader:
+        # Shared, so that connections to the indices are reused
+        return Downloader(self.download_cache, self.http_cache, offline=config().offline)
+
+    def project(self, root: Path) -> Project:
+        return Project(root, metadata_cache=self.metadata_cache, build_env_pool=self.build_env_pool,
+                       trusted_build_backends=config().trusted_build_backends, offline=config().offline)
+
     @staticmethod
     def status():
         print(f"Apps directory:  {config().apps_dir}")
         print(f"Bin directory:   {config().bin_dir}")
+        print(f"Cache directory: {config().cache_dir or 'disabled'}")
         print(f"Package indices: {config().package_indices}")  # TODO show as list
         print(f"Uv executable:   {config().uv}")  # TODO show resolved value
 
-    def install(self, source: Project | Package, *, locked: bool, reinstall: bool):
-        with TemporaryDirectory() as temp_dir:
+    @staticmethod
+    def _name_and_version(source: Project | Package | Bundle) -> tuple[str, str]:
+        match source:
+            case Project() as project:
+                # This might have to build the project
+                return project.metadata().name, project.metadata().version
+            case Package() as package:
+                return package.name, package.version
+            case Bundle() as bundle:
+                return bundle.package.name, bundle.package.version
+            case _:
+                raise TypeError(f"Unhandled source: {source}")
+
+    def _export_constraints(self, source: Project | Package | Bundle, constraints_file: Path, temp_dir: Path):
+        match source:
+            case Bundle() as bundle:
+                # Already pinned
+                constraints_file.write_text(bundle.constraints())
+                return
+
+            case Project() as project:
+                frontend = project.build_frontend()
+
+            case Package() as package:
+                # We only need the files that define the locked dependencies,
+                # not the whole sdist
+                download_dir = temp_dir / "download"
+                with span("download sdist files"):
+                    sdist = self.downloader.download_sdist_files(
+                        package, download_dir, config().package_indices, ["pyproject.toml", "uv.lock"])
+                temp_project = Project(sdist)
+
+                frontend = temp_project.build_frontend()
+
+            case _:
+                raise TypeError(f"Unhandled source: {source}")
+
+        if frontend is None:
+            raise FrontendNotRecognized(source)
+
+        frontend.export_constraints(constraints_file, self.constraints_cache)
+
+    def install(self, source: Project | Package | Bundle, *, locked: bool, reinstall: bool, dedupe: bool = False,
+                incremental: bool = False):
+        with span("install", source=str(source)), TemporaryDirectory() as temp_dir:
             # First, we need to determine the name and version so we know where
             # to install it (unless overridden, which isn't implemented yet).
-            match source:
-                case Project() as project:
-                    # This might have to build the project
-                    name = project.metadata().name
-                    version = project.metadata().version
-                case Package() as package:
-                    name = package.name
-                    version = package.version
-                case _:
-                    raise TypeError(f"Unhandled source: {source}")
-
-            # Check whether the app version is already installed so we avoid
-            # extra work if we decide to stop
-            app_version = AppVersion(self.apps_dir.app_version_dir(name, version), name, version)
-            if app_version.is_installed():
-                if reinstall:
-                    app_version.uninstall()
-                else:
-                    raise AppVersionAlreadyInstalled(app_version)
+            with span("determine name and version"):
+                name, version = self._name_and_version(source)
 
-            # For a locked install, we have to determine the constraints
-            constraints_file = temp_dir / "constraints.txt"
-            if locked:
+            # Installing multiple versions of the same app at the same time
+            # would race on the app directory
+            with self.apps_dir.lock_app(name):
+                # Check whether the app version is already installed so we avoid
+                # extra work if we decide to stop
+                app_version = AppVersion(self.apps_dir.app_version_dir(name, version), name, version)
+                if app_version.is_installed():
+                    if reinstall:
+                        with span("uninstall previous"):
+                            app_version.uninstall(self.apps_dir.trash)
+                            self._update_index(app_version)
+                            self.apps_dir.trash.empty_in_background()
+                    else:
+                        raise AppVersionAlreadyInstalled(app_version)
+                elif app_version.is_partial():
+                    with span("remove partial"):
+                        app_version.remove_partial(self.apps_dir.trash)
+                        self.apps_dir.trash.empty_in_background()
+
+                # For a locked install, we have to determine the constraints.
+                # Bundles are always installed with their pinned versions.
+                constraints_file = temp_dir / "constraints.txt"
+                if locked or isinstance(source, Bundle):
+                    with span("export constraints"):
+                        self._export_constraints(source, constraints_file, temp_dir)
+
+                # We're now ready to install the app
                 match source:
                     case Project() as project:
-                        frontend = project.build_frontend()
+                        print(f"Install {app_version.name} {app_version.version} from {project.root}")
+                    case Package():
+                        print(f"Install {app_version.name} {app_version.version}")
+                    case Bundle() as bundle:
+                        print(f"Install {app_version.name} {app_version.version} from {bundle.file}")
+                    case _:
+                        raise TypeError(f"Unhandled source: {source}")
 
-                    case Package() as package:
-                        download_dir = temp_dir / "download"
-                        sdist = Downloader().download_and_unpack_sdist(package, download_dir, config().package_indices)
-                        temp_project = Project(sdist)
+                installer = UvInstaller(config().package_indices)
 
-                        frontend = temp_project.build_frontend()
+                with self.apps_dir.cleanup_app_dir(app_version.name):
+                    # Start from the environment of a similar version
+                    base = self.apps_dir.closest_version(name, version) if incremental else None
+                    with span("install app version"):
+                        app_version.install(installer, source, config().bin_dir, constraints_file, base)
 
-                    case _:
-                        raise TypeError(f"Unhandled source: {source}")
+                # The app version is installed, even if deduplicating fails
+                with span("update index"):
+                    self._update_index(app_version)
 
-                if frontend is None:
-                    raise FrontendNotRecognized(source)
+                if dedupe:
+                    print(f"Deduplicating {app_version.name} {app_version.version}")
+                    with span("dedupe"):
+                        print(self._dedupe(app_version))
 
-                frontend.export_constraints(constraints_file)
+    def install_project(self, root: Path, *, locked: bool, reinstall: bool, dedupe: bool = False,
+                        incremental: bool = False):
+        self.install(self.project(root), locked=locked, reinstall=reinstall, dedupe=dedupe, incremental=incremental)
 
-            # We're now ready to install the app
-            match source:
-                case Project() as project:
-                    print(f"Install {app_version.name} {app_version.version} from {project.root}")
-                case Package():
-                    print(f"Install {app_version.name} {app_version.version}")
-                case _:
-                    raise TypeError(f"Unhandled source: {source}")
+    def install_package(self, name: str, version: str, *, locked: bool, reinstall: bool, dedupe: bool = False,
+                        incremental: bool = False):
+        self.install(Package(name, version), locked=locked, reinstall=reinstall, dedupe=dedupe,
+                     incremental=incremental)
 
+    def install_bundle(self, file: Path, *, reinstall: bool, dedupe: bool = False, incremental: bool = False):
+        self.install(Bundle(file), locked=True, reinstall=reinstall, dedupe=dedupe, incremental=incremental)
+
+    @staticmethod
+    def _run_batch(sources: Iterable[Project | Package], action: Callable[[Project | Package], None], jobs: int,
+                   verb: str, past_participle: str) -> list[InstallResult]:
+        def try_action(source: Project | Package) -> InstallResult:
+            try:
+                action(source)
+            except Exception as e:
+                print(f"Error {verb} {source}: {e}")
+                return InstallResult(source, e)
+            else:
+                return InstallResult(source)
+
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(try_action, sources))
+
+        succeeded = [result for result in results if result.success]
+        failed = [result for result in results if not result.success]
+
+        print(f"{past_participle} {len(succeeded)} of {len(results)} app versions")
+        if failed:
+            print("Failed:")
+            for result in failed:
+                print(f"  - {result.source}: {result.error}")
+
+        return results
+
+    def install_batch(self, sources: Iterable[Project | Package], *, locked: bool, reinstall: bool, jobs: int,
+                      dedupe: bool = False, incremental: bool = False) -> list[InstallResult]:
+        """Installs multiple app versions in parallel
+
+        Versions of the same app are installed one after another. A failure
+        does not abort the other installations; the results are returned in
+        the same order as the sources.
+        """
+        def install(source: Project | Package):
+            self.install(source, locked=locked, reinstall=reinstall, dedupe=dedupe, incremental=incremental)
+
+        return self._run_batch(sources, install, jobs, "installing", "Installed")
+
+    def prefetch(self, source: Project | Package, *, locked: bool):
+        """Does everything that installing the app version would, except for
+        actually installing it
+
+        This fills the caches (including the uv cache), so that installing the
+        app version later is fast and works offline.
+        """
+        with TemporaryDirectory() as temp_dir:
+            name, version = self._name_and_version(source)
+
+            constraints_file = temp_dir / "constraints.txt"
+            if locked:
+                self._export_constraints(source, constraints_file, temp_dir)
+
+            # Installing to a temporary directory makes uv download (and
+            # build) the same packages as the actual installation
+            print(f"Prefetch {name} {version}")
             installer = UvInstaller(config().package_indices)
+            installer.install(source, temp_dir / "apps", temp_dir / "bin", constraints=constraints_file)
 
-            with self.apps_dir.cleanup_app_dir(app_version.name):
-                app_version.install(installer, source, config().bin_dir, constraints_file)
+    def prefetch_batch(self, sources: Iterable[Project | Package], *, locked: bool,
+                       jobs: int) -> list[InstallResult]:
+        """Prefetches multiple app versions in parallel (see `install_batch`)"""
+        def prefetch(source: Project | Package):
+            self.prefetch(source, locked=locked)
 
-    def install_project(self, root: Path, *, locked: bool, reinstall: bool):
-        self.install(Project(root), locked=locked, reinstall=reinstall)
+        return self._run_batch(sources, prefetch, jobs, "prefetching", "Prefetched")
 
-    def install_package(self, name: str, version: str, *, locked: bool, reinstall: bool):
-        self.install(Package(name, version), locked=locked, reinstall=reinstall)
+    def bundle(self, name: str, version: str, file: Path, *, locked: bool):
+        """Creates a bundle for installing an app version without access to a
+        package index (see `Bundle`)"""
+        package = Package(name, version)
+
+        with TemporaryDirectory() as temp_dir:
+            constraints_file = None
+            if locked:
+                constraints_file = temp_dir / "constraints.txt"
+                self._export_constraints(package, constraints_file, temp_dir)
+
+            print(f"Bundle {package} to {file}")
+            UvBundleBuilder(config().package_indices).build(package, file, constraints_file)
 
     def uninstall(self, name: str, version: str):
         app_version = AppVersion(self.apps_dir.app_version_dir(name, version), name, version)
 
-        if app_version.is_installed():
-            print(f"Uninstall {name} {version}")
+        with span("uninstall", name=name, version=version), self.apps_dir.lock_app(name):
+            if app_version.is_installed():
+                print(f"Uninstall {name} {version}")
+
+                with self.apps_dir.cleanup_app_dir(name):
+                    # Stored files that were only used by this app version are
+                    # still used by the trash, so they are pruned by the next
+                    # `gc` or `dedupe` (after the trash has been emptied)
+                    app_version.uninstall(self.apps_dir.trash)
+
+                with span("update index"):
+                    self._update_index(app_version)
+                self.apps_dir.trash.empty_in_background()
+
+            elif app_version.is_partial():
+                with self.apps_dir.cleanup_app_dir(name):
+                    app_version.remove_partial(self.apps_dir.trash)
+                self.apps_dir.trash.empty_in_background()
+
+            else:
+                print(f"{name} {version} is not installed")
+
+    def _dedupe(self, app_version: AppVersion) -> DedupeResult:
+        # The app must be locked. Store entries may be pruned concurrently by
+        # other app versions being uninstalled.
+        with self.apps_dir.lock_global():
+            return self.apps_dir.content_store.dedupe(app_version.root)
 
-            with self.apps_dir.cleanup_app_dir(name):
-                app_version.uninstall()
+    def dedupe(self):
+        total = DedupeResult()
+
+        for app_version in self.apps_dir.installed_apps():
+            with self.apps_dir.lock_app(app_version.name):
+                if app_version.is_installed():
+                    result = self._dedupe(app_version)
+                    print(f"{app_version.name} {app_version.version}: {result}")
+                    total += result
+
+        with self.apps_dir.lock_global():
+            self.apps_dir.content_store.prune()
+
+        print(f"Total: {total}")
+
+    @staticmethod
+    def _verify(app_version: AppVersion, record: bool) -> list[Problem]:
+        try:
+            return app_version.verify(record)
+        except Exception as e:
+            # E.g., unreadable metadata, or uninstalled in the meantime
+            return [Problem(app_version.root, f"error: {e}")]
 
+    def verify(self, *, record: bool = False, jobs: int = 8, json_: bool = False) -> bool:
+        """Checks the integrity of all installed app versions in parallel
+
+        Returns whether no problems were found.
+        """
+        app_versions = list(self.apps_dir.installed_apps())
+
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(lambda app_version: self._verify(app_version, record), app_versions))
+
+        if json_:
+            print(json.dumps([
+                {"name": app_version.name, "version": app_version.version, "file": str(problem.file),
+                 "problem": problem.problem}
+                for app_version, problems in zip(app_versions, results)
+                for problem in problems
+            ], indent=2))
         else:
-            print(f"{name} {version} is not installed")
+            for app_version, problems in zip(app_versions, results):
+                print(f"{app_version.name} {app_version.version}: {'OK' if not problems else 'problems found'}")
+                for problem in problems:
+                    print(f"  - {problem.file}: {problem.problem}")
+
+        return not any(results)
+
+    def gc(self, *, trash: bool = False):
+        """Removes files that are no longer used
 
-    def list_(self):
-        any_apps = False
+        Uninstalled app versions are removed in the background. With `trash`,
+        any that are left (e.g., if the background process was killed, or to
+        wait for the removal) are removed now.
+        """
+        if trash:
+            print("Emptying the trash")
+            self.apps_dir.trash.empty()
 
+        with self.apps_dir.lock_global():
+            self.apps_dir.content_store.prune()
+
+        if self.build_env_pool is not None:
+            self.build_env_pool.evict()
+
+    def _scan_apps_dir(self) -> Iterator[IndexEntry]:
         for app in self.apps_dir.installed_apps():
-            any_apps = True
-            print(f"{app.name} {app.version}")
             app_metadata = app.read_metadata()
+            yield IndexEntry(app.name, app.version, [script.file.name for script in app_metadata.scripts])
+
+    def list_(self, *, rebuild_index: bool = False):
+        if self.apps_index is None:
+            entries = list(self._scan_apps_dir())
+        else:
+            entries = None if rebuild_index else self.apps_index.entries()
+            if entries is None:
+                print("Rebuilding the apps index")
+                self.apps_index.rebuild(self._scan_apps_dir())
+                entries = self.apps_index.entries()
+
+        for entry in entries:
+            print(f"{entry.name} {entry.version}")
 
-            for script in app_metadata.scripts:
-                print(f"  - {script.file.name}")
+            for script_name in entry.script_names:
+                print(f"  - {script_name}")
 
-        if not any_apps:
+        if not entries:
             print("No apps installed")
@@ -1,5 +1,9 @@
 from abc import ABC, abstractmethod
 from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from payne.cache import ConstraintsCache
 
 
 class Frontend(ABC):
@@ -11,9 +15,30 @@ class Frontend(ABC):
         return self._root
 
     @abstractmethod
-    def export_constraints(self, constraints_file: Path) -> None:
+    def constraints_key(self) -> str:
+        """A hash of everything that the exported constraints depend on"""
+        ...
+
+    @abstractmethod
+    def _export_constraints(self, constraints_file: Path) -> None:
         ...
 
+    def export_constraints(self, constraints_file: Path, cache: "ConstraintsCache | None" = None) -> None:
+        constraints_file.parent.mkdir(parents=True, exist_ok=True)
+        assert not constraints_file.exists()
+
+        if cache is None:
+            self._export_constraints(constraints_file)
+            return
+
+        key = self.constraints_key()
+        if (constraints := cache.get(key)) is not None:
+            print("Using cached constraints")
+            constraints_file.write_text(constraints)
+        else:
+            self._export_constraints(constraints_file)
+            cache.put(key, constraints_file.read_text())
+
     @staticmethod
     def create(root: Path) -> "Frontend | None":
         from payne.project.build_frontend import UvFrontend
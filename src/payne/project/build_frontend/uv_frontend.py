@@ -1,30 +1,63 @@
+import hashlib
+import json
 from pathlib import Path
 import shlex
 import shutil
 import subprocess
 
 from payne.config import config
+from payne.project import Pyproject
 from payne.project.build_frontend import Frontend
+from payne.project.build_frontend.uv_lock import UnsupportedLock, UvLock
+from payne.util.profiling import span
 
 
 class UvFrontend(Frontend):
-    def export_constraints(self, constraints_file: Path):
-        constraints_file.parent.mkdir(parents=True, exist_ok=True)
-        assert not constraints_file.exists()
+    _export_options = [
+        "--no-dev",
+        "--no-emit-project",
+        "--frozen",
+        "--no-header",
+        "--no-hashes",
+    ]
 
+    def _default_groups(self) -> list[str] | str:
+        return Pyproject.load(self._root / "pyproject.toml").tool("uv").get("default-groups", ["dev"])
+
+    def constraints_key(self) -> str:
+        # The default groups are the only setting from pyproject.toml that
+        # affects the export
+        options = {"frontend": "uv", "options": self._export_options, "default_groups": self._default_groups()}
+
+        hash_ = hashlib.sha256()
+        hash_.update(json.dumps(options, sort_keys=True).encode())
+        hash_.update(b"\0")
+        hash_.update((self._root / "uv.lock").read_bytes())
+        return hash_.hexdigest()
+
+    def _export_constraints(self, constraints_file: Path):
+        # Reading the lock file ourselves is much faster than calling uv
+        try:
+            with span("read lock file"):
+                constraints_file.write_text(UvLock.load(self._root / "uv.lock").export(self._default_groups()))
+            return
+        except UnsupportedLock as e:
+            print(f"Lock file not supported ({e}), falling back to uv export")
+
+        self._uv_export(constraints_file)
+
+    def _uv_export(self, constraints_file: Path):
         args = [
             shutil.which(config().uv),
             "export",
             "--project", self._root,
-            "--no-dev",
-            "--no-emit-project",
-            "--frozen",
-            "--no-header",
-            "--no-hashes",
+            *self._export_options,
+            *(["--offline"] if config().offline else []),
             "--output-file", constraints_file,
         ]
 
         print(f"Calling uv: {shlex.join(map(str, args))}")
-        subprocess.run(args, check=True)
+        with span("uv export"):
+            subprocess.run(args, check=True)
 
         assert constraints_file.is_file()
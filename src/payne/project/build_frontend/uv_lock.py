@@ -0,0 +1,172 @@
+"""Native reader for `uv.lock` files
+
+Produces the same constraints as
+`uv export --no-dev --no-emit-project --frozen --no-header --no-hashes`, but
+without calling uv. Only the common subset of the lock file format is
+supported: a single project whose dependencies all come from package
+registries. For anything else, `UnsupportedLock` is raised and the caller
+should fall back to `uv export`.
+"""
+
+from collections.abc import Iterable
+from pathlib import Path
+import tomllib
+from typing import Self
+
+
+class UnsupportedLock(Exception):
+    pass
+
+
+# A conjunction of markers (empty: always true)
+type _Conjunction = frozenset[str]
+
+# A node of the dependency graph: a package (index in the lock file) with an
+# optional extra
+type _Node = tuple[int, str | None]
+
+
+def _add_conjunction(disjunction: set[_Conjunction], conjunction: _Conjunction) -> bool:
+    """Adds a conjunction to a disjunction, keeping only minimal conjunctions
+
+    Returns whether the disjunction was changed.
+    """
+    if any(existing <= conjunction for existing in disjunction):
+        return False
+
+    disjunction -= {existing for existing in disjunction if conjunction < existing}
+    disjunction.add(conjunction)
+    return True
+
+
+def _format_marker(disjunction: set[_Conjunction]) -> str | None:
+    def format_conjunction(conjunction: _Conjunction) -> str:
+        if len(conjunction) == 1:
+            return next(iter(conjunction))
+        return " and ".join(f"({marker})" for marker in sorted(conjunction))
+
+    if frozenset() in disjunction:
+        return None
+
+    conjunctions = sorted(format_conjunction(conjunction) for conjunction in disjunction)
+    if len(conjunctions) == 1:
+        return conjunctions[0]
+    return " or ".join(f"({conjunction})" for conjunction in conjunctions)
+
+
+class UvLock:
+    def __init__(self, data: dict):
+        self._data = data
+
+    @classmethod
+    def load(cls, file: Path) -> Self:
+        return cls(tomllib.loads(file.read_text()))
+
+    def _packages(self) -> list[dict]:
+        return self._data.get("package", [])
+
+    def _root(self) -> int:
+        if self._data.get("version") != 1:
+            raise UnsupportedLock(f"Lock file version {self._data.get('version')}")
+
+        if "conflicts" in self._data:
+            raise UnsupportedLock("Conflicting dependencies")
+
+        if len(self._data.get("manifest", {}).get("members", [])) > 1:
+            raise UnsupportedLock("Workspace with multiple members")
+
+        roots = [index for index, package in enumerate(self._packages())
+                 if package.get("source") in ({"editable": "."}, {"virtual": "."})]
+        if len(roots) != 1:
+            raise UnsupportedLock("No unique project")
+
+        return roots[0]
+
+    def _resolve(self, dependency: dict) -> int:
+        """The index of the package that a dependency refers to
+
+        If the lock file contains multiple packages with the same name, the
+        dependency also specifies the version and/or source.
+        """
+        candidates = [index for index, package in enumerate(self._packages())
+                      if package["name"] == dependency["name"]
+                      and dependency.get("version", package.get("version")) == package.get("version")
+                      and dependency.get("source", package.get("source")) == package.get("source")]
+
+        if len(candidates) != 1:
+            raise UnsupportedLock(f"Ambiguous dependency: {dependency['name']}")
+
+        return candidates[0]
+
+    def _dependencies(self, node: _Node) -> list[dict]:
+        index, extra = node
+        package = self._packages()[index]
+
+        if extra is None:
+            return package.get("dependencies", [])
+        else:
+            return package.get("optional-dependencies", {}).get(extra, [])
+
+    def _group_dependencies(self, root: int, default_groups: Iterable[str]) -> list[dict]:
+        groups = self._packages()[root].get("dev-dependencies", {})
+
+        # `--no-dev` only excludes the `dev` group
+        if default_groups == "all":
+            default_groups = list(groups)
+
+        return [dependency
+                for group in default_groups if group != "dev"
+                for dependency in groups.get(group, [])]
+
+    def export(self, default_groups: Iterable[str] = ("dev",)) -> str:
+        """The contents of the constraints file
+
+        `default_groups` is the `tool.uv.default-groups` setting of the
+        project (a list of groups or `"all"`).
+        """
+        root = self._root()
+
+        # Markers (in disjunctive normal form) under which each node is
+        # reachable from the root
+        markers: dict[_Node, set[_Conjunction]] = {(root, None): {frozenset()}}
+
+        def visit(parent: _Node, dependencies: list[dict]):
+            for dependency in dependencies:
+                child = self._resolve(dependency)
+
+                edge_marker = {dependency["marker"]} if "marker" in dependency else set()
+                for child_node in [(child, None), *((child, extra) for extra in dependency.get("extra", []))]:
+                    child_markers = markers.setdefault(child_node, set())
+                    changed = False
+                    for conjunction in list(markers[parent]):
+                        changed |= _add_conjunction(child_markers, conjunction | edge_marker)
+                    if changed:
+                        pending.append(child_node)
+
+        pending: list[_Node] = []
+        visit((root, None), self._group_dependencies(root, default_groups))
+        pending.append((root, None))
+        while pending:
+            node = pending.pop()
+            visit(node, self._dependencies(node))
+
+        included = [index for index, extra in markers if extra is None and index != root]
+
+        # Packages from other sources may not even have a version
+        for index in included:
+            package = self._packages()[index]
+            source = package.get("source", {})
+            if "registry" not in source:
+                raise UnsupportedLock(f"Unsupported source for {package['name']}: {source}")
+
+        lines = []
+        included.sort(key=lambda index: (self._packages()[index]["name"], self._packages()[index]["version"]))
+        for index in included:
+            package = self._packages()[index]
+
+            line = f"{package['name']}=={package['version']}"
+            if (marker := _format_marker(markers[(index, None)])) is not None:
+                line += f" ; {marker}"
+            lines.append(line)
+
+        return "".join(f"{line}\n" for line in lines)
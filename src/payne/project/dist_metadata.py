@@ -10,8 +10,17 @@ class DistMetadata:
     def parse(cls, text: str) -> Self:
         data = {}
         for line in text.splitlines():
-            key, value = line.split(": ", maxsplit=1)  # TODO what if a line doesn't have ": "?
-            data[key] = value
+            # The headers end at the first empty line, the rest is the
+            # description
+            if not line.strip():
+                break
+
+            # Continuation of a multi-line header value
+            if line[0].isspace():
+                continue
+
+            key, _, value = line.partition(":")
+            data[key] = value.strip()
 
         return cls(data)
 
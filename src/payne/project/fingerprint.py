@@ -0,0 +1,114 @@
+from collections.abc import Iterator
+import hashlib
+import os
+from pathlib import Path
+import subprocess
+
+# Files that define the project metadata
+_config_files = ["pyproject.toml", "setup.py", "setup.cfg", "uv.lock", "PKG-INFO"]
+
+# Directories that don't contain project sources
+_ignored_dirs = {"__pycache__", "build", "dist", "node_modules"}
+
+
+def _git(root: Path, *args: str) -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", *args],
+            cwd=root,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    return result.stdout.decode(errors="surrogateescape")
+
+
+def _file_hash(file: Path) -> str:
+    try:
+        with file.open("rb") as f:
+            return hashlib.file_digest(f, "sha256").hexdigest()
+    except (FileNotFoundError, IsADirectoryError):
+        return "-"
+
+
+def _vcs_state(root: Path) -> Iterator[str] | None:
+    """The state of the Git working tree that contains the project, if any
+
+    This consists of the current commit, its description (the version may be
+    derived from tags), and the content of all modified or untracked files.
+    """
+    rev_parse = _git(root, "rev-parse", "--show-toplevel", "HEAD")
+    if rev_parse is None:
+        return None
+
+    top_level, head = rev_parse.splitlines()
+    describe = _git(root, "describe", "--tags", "--long", "--always") or ""
+    status = _git(root, "status", "--porcelain", "-z", "--untracked-files=all", "--", ".") or ""
+
+    def lines() -> Iterator[str]:
+        yield f"head {head}"
+        yield f"describe {describe.strip()}"
+
+        entries = iter(status.split("\0"))
+        for entry in entries:
+            if entry:
+                code, path = entry[:2], entry[3:]
+                line = f"dirty {code} {path} {_file_hash(Path(top_level) / path)}"
+
+                # Renames and copies are followed by the original path
+                if "R" in code or "C" in code:
+                    line += f" from {next(entries, '')}"
+
+                yield line
+
+    return lines()
+
+
+def _tree_state(root: Path) -> Iterator[str]:
+    """The state of all files below the project root
+
+    Uses size and modification time rather than content, which is good enough
+    to detect changes and much faster.
+    """
+    for dir_path, dir_names, file_names in os.walk(root):
+        dir_names[:] = sorted(d for d in dir_names
+                              if not d.startswith(".") and d not in _ignored_dirs and not d.endswith(".egg-info"))
+
+        for file_name in sorted(file_names):
+            file = Path(dir_path) / file_name
+            try:
+                stat = file.stat()
+            except OSError:
+                continue
+            yield f"file {file.relative_to(root).as_posix()} {stat.st_size} {stat.st_mtime_ns}"
+
+
+def project_fingerprint(root: Path) -> str:
+    """A hash that changes whenever the metadata of the project might change
+
+    This includes the build configuration files and the VCS state (or, if the
+    project is not in a Git working tree, the state of all files).
+    """
+    root = root.absolute()
+
+    def lines() -> Iterator[str]:
+        yield "payne.project-fingerprint 1"
+
+        for name in _config_files:
+            yield f"config {name} {_file_hash(root / name)}"
+
+        vcs_state = _vcs_state(root)
+        if vcs_state is not None:
+            yield from vcs_state
+        else:
+            yield from _tree_state(root)
+
+    hash_ = hashlib.sha256()
+    for line in lines():
+        hash_.update(line.encode(errors="surrogateescape"))
+        hash_.update(b"\n")
+
+    return hash_.hexdigest()
@@ -1,21 +1,52 @@
+from collections.abc import Collection, Iterator
+from contextlib import contextmanager
 from functools import cache
+import importlib.util
 from pathlib import Path
 import re
 import tarfile
+from typing import TYPE_CHECKING
 
-import build
-import build.env
-
+from payne.exceptions import NotAvailableOffline
 from payne.project import Pyproject, Metadata, DistMetadata
 from payne.project.build_frontend import Frontend
+from payne.project.fingerprint import project_fingerprint
 from payne.util.file_system import TemporaryDirectory
+from payne.util.profiling import span
+
+# Used by build (and pip) if the project doesn't specify a build backend
+_default_build_backend = "setuptools.build_meta:__legacy__"
+
+if TYPE_CHECKING:
+    import build.env
+    from payne.cache import BuildEnvPool, MetadataCache
 
 
 class Project:
-    """Assumes that the project uses uv"""
+    """Assumes that the project uses uv
+
+    In offline mode, the metadata is not determined by preparing the project
+    (which requires installing the build backend), but only taken from the
+    cache.
+
+    If a `build_env_pool` is specified, the project is prepared in a pooled
+    build environment rather than in a fresh one.
 
-    def __init__(self, root: Path):
+    If the build backend is one of the `trusted_build_backends` (by the name of
+    its top-level module, e.g. `hatchling`) and it is available in payne's own
+    environment, the project is prepared with payne's interpreter, without
+    an isolated environment (which also works in offline mode). If that fails,
+    the project is prepared in an isolated environment.
+    """
+
+    def __init__(self, root: Path, *, metadata_cache: "MetadataCache | None" = None,
+                 build_env_pool: "BuildEnvPool | None" = None, trusted_build_backends: Collection[str] = (),
+                 offline: bool = False):
         self._root = root
+        self._metadata_cache = metadata_cache
+        self._build_env_pool = build_env_pool
+        self._trusted_build_backends = trusted_build_backends
+        self._offline = offline
 
     @property
     def root(self):
@@ -28,35 +59,72 @@ class Project:
     def _pyproject(self) -> Pyproject:
         return Pyproject.load(self._root / "pyproject.toml")
 
+    @contextmanager
+    def _isolated_env(self, extra_requirements: Collection[str] = ()) -> Iterator["build.env.IsolatedEnv"]:
+        """An isolated environment with the build system requirements of the
+        project (and `extra_requirements`) installed"""
+        # build takes a while to import and isn't needed if the metadata can be
+        # determined otherwise
+        import build
+        import build.env
+
+        if self._build_env_pool is not None:
+            # Only reads pyproject.toml
+            requirements = build.ProjectBuilder(self.root).build_system_requires
+            with self._build_env_pool.env([*requirements, *extra_requirements]) as env:
+                yield env
+        else:
+            with build.env.DefaultIsolatedEnv(installer="uv") as env:
+                with span("install build requirements"):
+                    env.install(build.ProjectBuilder.from_isolated_env(env, self.root).build_system_requires)
+                    env.install(extra_requirements)
+                yield env
+
+    @staticmethod
+    def _read_sdist_metadata(builder: "build.ProjectBuilder", temp_dir: Path) -> Metadata:
+        # TOOD consider instead:
+        #   * builder.prepare("wheel", temp_dir) -> path to dist_info dir (as string)
+        #   * dist_info/METADATA
+        #   * dist_info/entry_points.txt -> we get the script names
+        sdist_file = Path(builder.build("sdist", temp_dir, {}))
+        with tarfile.open(sdist_file, 'r:*') as sdist:
+            print(sdist.getnames())
+            pkg_info_names = [name for name in sdist.getnames() if
+                              re.fullmatch(r"[^/]+/PKG-INFO", name, re.IGNORECASE)]
+            print(pkg_info_names)
+            assert len(pkg_info_names) == 1
+            dist_metadata_text = sdist.extractfile(pkg_info_names[0]).read().decode()
+            dist_metadata = DistMetadata.parse(dist_metadata_text)
+            return Metadata(dist_metadata.name(), dist_metadata.version())
+
     def _build_and_read_metadata(self) -> Metadata:
+        import build
+
         # TODO refactor
         with TemporaryDirectory() as temp_dir:
-            with build.env.DefaultIsolatedEnv(installer="uv") as env:
+            with self._isolated_env() as env:
                 builder = build.ProjectBuilder.from_isolated_env(env, self.root)
-                env.install(builder.build_system_requires)
                 # TODO required?
-                env.install(builder.get_requires_for_build("sdist", {}))
-                # TOOD consider instead:
-                #   * builder.prepare("wheel", temp_dir) -> path to dist_info dir (as string)
-                #   * dist_info/METADATA
-                #   * dist_info/entry_points.txt -> we get the script names
-                sdist_file = Path(builder.build("sdist", temp_dir, {}))
-                with tarfile.open(sdist_file, 'r:*') as sdist:
-                    print(sdist.getnames())
-                    pkg_info_names = [name for name in sdist.getnames() if
-                                      re.fullmatch(r"[^/]+/PKG-INFO", name, re.IGNORECASE)]
-                    print(pkg_info_names)
-                    assert len(pkg_info_names) == 1
-                    dist_metadata_text = sdist.extractfile(pkg_info_names[0]).read().decode()
-                    dist_metadata = DistMetadata.parse(dist_metadata_text)
-                    return Metadata(dist_metadata.name(), dist_metadata.version())
+                extra_requirements = builder.get_requires_for_build("sdist", {})
+
+                if extra_requirements and self._build_env_pool is not None:
+                    # Pooled environments are shared by projects with the same
+                    # requirements, so the additional requirements of this
+                    # project get an environment of their own
+                    with self._isolated_env(extra_requirements) as extended_env:
+                        builder = build.ProjectBuilder.from_isolated_env(extended_env, self.root)
+                        return self._read_sdist_metadata(builder, temp_dir)
+
+                env.install(extra_requirements)
+                return self._read_sdist_metadata(builder, temp_dir)
 
     def _prepare_and_read_metadata(self) -> Metadata:
+        import build
+
         # TODO refactor
         with TemporaryDirectory() as temp_dir:
-            with build.env.DefaultIsolatedEnv(installer="uv") as env:
+            with self._isolated_env() as env:
                 builder = build.ProjectBuilder.from_isolated_env(env, self.root)
-                env.install(builder.build_system_requires)
                 # TODO required?
                 # env.install(builder.get_requires_for_build("sdist", {}))
                 dist_info = Path(builder.prepare("wheel", temp_dir))
@@ -64,20 +132,86 @@ class Project:
                 # We also get dist_info/entry_points.txt
                 return Metadata(dist_metadata.name(), dist_metadata.version())
 
+    def _has_trusted_build_backend(self) -> bool:
+        """Whether the build backend is trusted and available in payne's own
+        environment"""
+        import build
+
+        try:
+            pyproject = self._pyproject()
+            backend, has_backend_path = pyproject.build_backend(), pyproject.has_backend_path()
+        except FileNotFoundError:
+            backend, has_backend_path = None, False
+
+        module = (backend or _default_build_backend).split(":")[0].split(".")[0]
+        if module not in self._trusted_build_backends:
+            return False
+
+        # In-tree backends are not installed
+        if not has_backend_path and importlib.util.find_spec(module) is None:
+            return False
+
+        # Only reads pyproject.toml
+        requirements = build.ProjectBuilder(self.root).build_system_requires
+        return not any(next(build.check_dependency(requirement), None) for requirement in requirements)
+
+    def _prepare_with_trusted_build_backend(self) -> Metadata | None:
+        if not self._trusted_build_backends:
+            return None
+
+        import build
+
+        try:
+            if not self._has_trusted_build_backend():
+                return None
+
+            with TemporaryDirectory() as temp_dir, span("prepare with trusted build backend"):
+                # The backend is called in a subprocess with payne's interpreter
+                builder = build.ProjectBuilder(self.root)
+                dist_info = Path(builder.prepare("wheel", temp_dir))
+                dist_metadata = DistMetadata.load(dist_info / "METADATA")
+                return Metadata(dist_metadata.name(), dist_metadata.version())
+        except Exception as e:
+            print(f"Preparing {self} with the trusted build backend failed, using an isolated environment: {e}")
+            return None
+
+    def _prepare_metadata(self) -> Metadata:
+        if (metadata := self._prepare_with_trusted_build_backend()) is not None:
+            return metadata
+
+        if self._offline:
+            raise NotAvailableOffline(f"the metadata of {self}")
+
+        # TODO which one is better? Building an sdist or preparing for a wheel?
+        # return self._build_and_read_metadata()
+        with span("prepare in isolated environment"):
+            return self._prepare_and_read_metadata()
+
     @cache
     def metadata(self) -> Metadata:
         try:
             if not self._pyproject().is_dynamic_version():
                 return Metadata(self._pyproject().name(), self._pyproject().static_version())
+
+            # Some dynamic versions can be determined without building
+            if (version := self._pyproject().dynamic_version(self.root)) is not None:
+                return Metadata(self._pyproject().name(), version)
         except FileNotFoundError:
             pass
 
         # No pyproject.toml or dynamic version. Seems like we have to
-        # prepare/build the project
-        # TODO which one is better? Building an sdist or preparing for a wheel?
+        # prepare/build the project, unless we've already done that for the
+        # same state of the project.
+        if self._metadata_cache is None:
+            return self._prepare_metadata()
 
-        # return self._build_and_read_metadata()
-        return self._prepare_and_read_metadata()
+        fingerprint = project_fingerprint(self.root)
+        if (metadata := self._metadata_cache.get(fingerprint)) is not None:
+            return metadata
+
+        metadata = self._prepare_metadata()
+        self._metadata_cache.put(fingerprint, metadata)
+        return metadata
 
     @cache
     def build_frontend(self) -> Frontend | None:
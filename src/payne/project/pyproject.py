@@ -1,5 +1,6 @@
 import tomllib
 from pathlib import Path
+from typing import Any
 
 
 class Pyproject:
@@ -19,3 +20,34 @@ class Pyproject:
     def static_version(self) -> str:
         assert not self.is_dynamic_version()
         return self._data["project"]["version"]
+
+    def dynamic_version(self, root: Path) -> str | None:
+        """Determines a dynamic version without building the project
+
+        Only works for some well-known ways of specifying the version (see
+        `payne.project.version_resolvers`), returns `None` otherwise.
+        """
+        from payne.project.version_resolvers import resolvers
+
+        assert self.is_dynamic_version()
+        for resolver in resolvers:
+            if (version := resolver(self, root)) is not None:
+                return version
+
+        return None
+
+    def build_backend(self) -> str | None:
+        return self._data.get("build-system", {}).get("build-backend")
+
+    def has_backend_path(self) -> bool:
+        return "backend-path" in self._data.get("build-system", {})
+
+    def has_tool(self, name: str) -> bool:
+        return name in self._data.get("tool", {})
+
+    def tool(self, *keys: str) -> dict[str, Any]:
+        """The configuration of a tool, e.g. `tool("hatch", "version")`"""
+        data = self._data.get("tool", {})
+        for key in keys:
+            data = data.get(key, {})
+        return data
@@ -0,0 +1,209 @@
+"""Resolvers for dynamic versions that don't require building the project
+
+Each resolver handles one well-known way of specifying a dynamic version. It
+returns `None` if it doesn't apply to the project or if it can't determine the
+version with certainty (in which case the project has to be built).
+Resolvers only return versions in normalized form so that the result is the
+same as that of the build backend.
+"""
+
+import ast
+from collections.abc import Callable
+from pathlib import Path
+import re
+import subprocess
+from typing import TYPE_CHECKING
+
+from payne.project.dist_metadata import DistMetadata
+
+if TYPE_CHECKING:
+    from payne.project import Pyproject
+
+# Normalized public version identifiers, cf.
+# https://packaging.python.org/en/latest/specifications/version-specifiers/
+_normalized_version = re.compile(r"(\d+!)?\d+(\.\d+)*((a|b|rc)\d+)?(\.post\d+)?(\.dev\d+)?")
+
+# The default pattern of the hatchling `regex` version source
+_hatch_default_pattern = r"""(?i)^(__version__|VERSION) *= *(['"])v?(?P<version>.+?)\2"""
+
+# The default tag regex of setuptools-scm (also used by hatch-vcs)
+_scm_default_tag_regex = re.compile(r"^(?:[\w-]+-)?(?P<version>[vV]?\d+(?:\.\d+){0,2}[^+]*)(?:\+.*)?$")
+
+# setuptools-scm options that don't affect the version of a tagged commit
+_scm_ignored_options = {"root", "version_file", "version_file_template", "write_to", "write_to_template",
+                        "fallback_version", "relative_to", "dist_name"}
+
+
+def _normalized(version: str | None) -> str | None:
+    if version is not None and _normalized_version.fullmatch(version):
+        return version
+    return None
+
+
+def _canonical_name(name: str) -> str:
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def resolve_pkg_info(pyproject: "Pyproject", root: Path) -> str | None:
+    """Unpacked source distributions contain the metadata in `PKG-INFO`"""
+    try:
+        dist_metadata = DistMetadata.load(root / "PKG-INFO")
+        if _canonical_name(dist_metadata.name()) == _canonical_name(pyproject.name()):
+            return _normalized(dist_metadata.version())
+    except (FileNotFoundError, KeyError):
+        pass
+
+    return None
+
+
+def resolve_hatch_regex(pyproject: "Pyproject", root: Path) -> str | None:
+    """hatchling: `[tool.hatch.version] path = ...`"""
+    options = pyproject.tool("hatch", "version")
+    if options.get("source", "regex") != "regex" or "path" not in options:
+        return None
+
+    pattern = options.get("pattern", True)
+    if pattern is True:
+        pattern = _hatch_default_pattern
+    elif not isinstance(pattern, str):
+        return None
+
+    try:
+        text = (root / options["path"]).read_text()
+    except (FileNotFoundError, IsADirectoryError):
+        return None
+
+    match = re.search(pattern, text, flags=re.MULTILINE)
+    if match is None:
+        return None
+
+    try:
+        return _normalized(match.group("version"))
+    except IndexError:
+        return None
+
+
+def _git_exact_tag(root: Path) -> str | None:
+    """The tag of the current commit, if the working tree is clean"""
+    def git(*args: str) -> str | None:
+        try:
+            result = subprocess.run(["git", *args], cwd=root, capture_output=True, check=True)
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        return result.stdout.decode().strip()
+
+    # The version control tools only look at the project root
+    top_level = git("rev-parse", "--show-toplevel")
+    if top_level is None or Path(top_level).resolve() != root.resolve():
+        return None
+
+    describe = git("describe", "--tags", "--long", "--dirty", "--match", "*[0-9]*")
+    if describe is None or describe.endswith("-dirty"):
+        return None
+
+    tag, distance, _ = describe.rsplit("-", maxsplit=2)
+    if distance != "0":
+        # Untagged commits get a dev version with a hash and date
+        return None
+
+    return tag
+
+
+def _scm_version(root: Path, options: dict) -> str | None:
+    # Non-default options could change the version scheme
+    if not set(options) <= _scm_ignored_options:
+        return None
+
+    tag = _git_exact_tag(root / options.get("root", "."))
+    if tag is None:
+        return None
+
+    match = _scm_default_tag_regex.match(tag)
+    if match is None:
+        return None
+
+    return _normalized(match.group("version").removeprefix("v").removeprefix("V"))
+
+
+def resolve_hatch_vcs(pyproject: "Pyproject", root: Path) -> str | None:
+    """hatch-vcs: `[tool.hatch.version] source = "vcs"`"""
+    options = pyproject.tool("hatch", "version")
+    if options.get("source") != "vcs":
+        return None
+
+    if set(options) - {"source", "raw-options", "fallback-version"}:
+        return None
+
+    return _scm_version(root, options.get("raw-options", {}))
+
+
+def resolve_setuptools_scm(pyproject: "Pyproject", root: Path) -> str | None:
+    """setuptools-scm: `[tool.setuptools_scm]`"""
+    if not pyproject.has_tool("setuptools_scm"):
+        return None
+
+    return _scm_version(root, pyproject.tool("setuptools_scm"))
+
+
+def _literal_assignment(file: Path, name: str) -> str | None:
+    try:
+        module = ast.parse(file.read_text())
+    except (FileNotFoundError, SyntaxError, UnicodeDecodeError):
+        return None
+
+    for statement in module.body:
+        match statement:
+            case ast.Assign(targets=[ast.Name(id=target)], value=ast.Constant(value=str() as value)) \
+                    if target == name:
+                return value
+            case ast.AnnAssign(target=ast.Name(id=target), value=ast.Constant(value=str() as value)) \
+                    if target == name:
+                return value
+
+    return None
+
+
+def resolve_setuptools_dynamic(pyproject: "Pyproject", root: Path) -> str | None:
+    """setuptools: `[tool.setuptools.dynamic] version = {attr = ...}` or `{file = ...}`"""
+    version = pyproject.tool("setuptools", "dynamic").get("version")
+
+    match version:
+        case {"file": str() as file}:
+            try:
+                return _normalized((root / file).read_text().strip())
+            except (FileNotFoundError, IsADirectoryError):
+                return None
+
+        case {"attr": str() as attr}:
+            module, _, name = attr.rpartition(".")
+            if not module:
+                return None
+
+            # Where setuptools would find the module, unless it's configured
+            # explicitly
+            package_dir = pyproject.tool("setuptools").get("package-dir", {})
+            if set(package_dir) - {""}:
+                return None
+            if "" in package_dir:
+                bases = [root / package_dir[""]]
+            else:
+                bases = [root, root / "src"]
+            module_path = Path(*module.split("."))
+
+            for base in bases:
+                for file in [base / module_path.with_suffix(".py"), base / module_path / "__init__.py"]:
+                    if file.is_file():
+                        # Only literal assignments; anything else would have
+                        # to be evaluated by importing the module
+                        return _normalized(_literal_assignment(file, name))
+
+    return None
+
+
+resolvers: list[Callable[["Pyproject", Path], str | None]] = [
+    resolve_pkg_info,
+    resolve_hatch_regex,
+    resolve_hatch_vcs,
+    resolve_setuptools_scm,
+    resolve_setuptools_dynamic,
+]
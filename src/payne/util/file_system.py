@@ -1,4 +1,6 @@
 from contextlib import contextmanager
+import errno
+import os
 from pathlib import Path
 import shutil
 import tempfile
@@ -12,6 +14,28 @@ class TemporaryDirectory(tempfile.TemporaryDirectory):
         return Path(super().__enter__())
 
 
+def atomic_write_bytes(file: Path, data: bytes):
+    """Writes a file such that readers see either the old or the new content
+
+    The data is written to a temporary file in the same directory, which then
+    replaces the target file.
+    """
+    file.parent.mkdir(parents=True, exist_ok=True)
+
+    fd, temp_name = tempfile.mkstemp(dir=file.parent, prefix=f".{file.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temp_name, file)
+    except BaseException:
+        Path(temp_name).unlink(missing_ok=True)
+        raise
+
+
+def atomic_write_text(file: Path, text: str):
+    atomic_write_bytes(file, text.encode())
+
+
 @contextmanager
 def safe_create(directory: Path):
     directory.mkdir()
@@ -51,3 +75,28 @@ def safe_ensure_exists(directory: Path):
                 d.rmdir()
 
         raise
+
+
+def reflink(source: Path, target: Path):
+    """Creates a copy-on-write clone of a file
+
+    The clone shares the data with the source until either of them is
+    modified. Raises `OSError` if the platform or file system doesn't support
+    it (only Linux is supported).
+    """
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError(errno.EOPNOTSUPP, "Reflinks are not supported on this platform")
+
+    # From linux/fs.h
+    ficlone = 0x40049409
+
+    with source.open("rb") as source_file, target.open("xb") as target_file:
+        try:
+            fcntl.ioctl(target_file.fileno(), ficlone, source_file.fileno())
+        except BaseException:
+            target.unlink()
+            raise
+
+    shutil.copymode(source, target)
@@ -0,0 +1,134 @@
+from collections.abc import Hashable, Iterator
+from contextlib import contextmanager, suppress
+import os
+from pathlib import Path
+import threading
+import time
+
+
+class KeyedLock:
+    """A separate (non-reentrant) lock for each key
+
+    Locks are created on first use and never removed, which is fine for the
+    small number of keys (e.g., app names) that we use.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._locks: dict[Hashable, threading.Lock] = {}
+
+    @contextmanager
+    def __call__(self, key: Hashable) -> Iterator[None]:
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+
+        with lock:
+            yield
+
+
+def _lock_file(file, blocking: bool = True, shared: bool = False) -> bool:
+    """Returns whether the lock has been acquired (always if `blocking`)"""
+    if os.name == "nt":
+        import msvcrt
+
+        # There is no blocking lock on Windows (LK_LOCK gives up after 10
+        # seconds), so we poll. There are no shared locks either, so they are
+        # exclusive.
+        file.seek(0)
+        while True:
+            try:
+                msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+                return True
+            except OSError:
+                if not blocking:
+                    return False
+                time.sleep(0.1)
+    else:
+        import fcntl
+
+        operation = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+        if not blocking:
+            operation |= fcntl.LOCK_NB
+
+        try:
+            fcntl.flock(file.fileno(), operation)
+            return True
+        except BlockingIOError:
+            return False
+
+
+def _unlock_file(file) -> None:
+    if os.name == "nt":
+        import msvcrt
+
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+
+def _is_current(file: Path, f) -> bool:
+    """Whether the open file `f` is still the file at the path `file`"""
+    try:
+        return os.stat(file).st_ino == os.fstat(f.fileno()).st_ino
+    except FileNotFoundError:
+        return False
+
+
+@contextmanager
+def _file_lock(file: Path, blocking: bool, shared: bool = False) -> Iterator[bool]:
+    file.parent.mkdir(parents=True, exist_ok=True)
+
+    while True:
+        with file.open("a+b") as f:
+            if not _lock_file(f, blocking, shared):
+                yield False
+                return
+
+            try:
+                # The previous holder may have removed the lock file (see
+                # `remove_lock_file`), in which case we have locked a file that
+                # nobody else will lock. Try again with the current one.
+                if _is_current(file, f):
+                    yield True
+                    return
+            finally:
+                _unlock_file(f)
+
+
+@contextmanager
+def file_lock(file: Path, *, shared: bool = False) -> Iterator[None]:
+    """An exclusive advisory lock on a file, shared by all processes
+
+    The lock is held by the open file, so it's also exclusive between threads
+    of the same process, and it's released automatically if the process
+    dies. The lock file is created if necessary. It can only be removed with
+    `remove_lock_file` while holding the lock.
+
+    With `shared`, the lock can be held by multiple holders at the same time,
+    but not together with an exclusive lock (not supported on Windows, where
+    the lock is exclusive anyway, so shared locks must not be nested).
+    """
+    with _file_lock(file, True, shared):
+        yield
+
+
+@contextmanager
+def try_file_lock(file: Path) -> Iterator[bool]:
+    """Same as `file_lock`, but doesn't wait if the lock is held by someone
+    else; returns whether the lock has been acquired"""
+    with _file_lock(file, False) as acquired:
+        yield acquired
+
+
+def remove_lock_file(file: Path):
+    """Removes a lock file, which must be locked by the caller
+
+    Others waiting for the lock notice that the file has been removed and
+    lock the new file instead.
+    """
+    # Fails on Windows since the file is open, so the file is kept
+    with suppress(OSError):
+        file.unlink()
@@ -0,0 +1,101 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+import json
+import os
+from pathlib import Path
+import threading
+import time
+
+
+@dataclass(frozen=True)
+class Span:
+    name: str
+    # Seconds since the start of the profile
+    start: float
+    duration: float
+    thread: int
+    args: dict[str, str]
+
+
+class Profile:
+    """Timing spans of the phases of an operation (e.g., install)
+
+    While the profile is active (in a `with` block), spans are recorded with
+    `span`. Spans can be nested and may be recorded from multiple threads.
+    """
+
+    def __init__(self):
+        self._start = time.perf_counter()
+        self._spans: list[Span] = []
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        global _profile
+        assert _profile is None
+        _profile = self
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        global _profile
+        _profile = None
+
+    @property
+    def spans(self) -> list[Span]:
+        with self._lock:
+            return list(self._spans)
+
+    def record(self, name: str, start: float, end: float, args: dict[str, str]):
+        """Records a span, with `start` and `end` from `time.perf_counter`"""
+        span_ = Span(name, start - self._start, end - start, threading.get_native_id(), args)
+        with self._lock:
+            self._spans.append(span_)
+
+    def to_json(self) -> dict:
+        return {"spans": [
+            {"name": s.name, "start": s.start, "duration": s.duration, "thread": s.thread, "args": s.args}
+            for s in sorted(self.spans, key=lambda s: s.start)
+        ]}
+
+    def to_chrome_trace(self) -> dict:
+        """The spans in the Trace Event Format, which can be loaded into
+        chrome://tracing or Perfetto"""
+        # Complete events, with timestamps in microseconds
+        return {
+            "traceEvents": [
+                {"name": s.name, "ph": "X", "ts": s.start * 1e6, "dur": s.duration * 1e6,
+                 "pid": os.getpid(), "tid": s.thread, "args": s.args}
+                for s in sorted(self.spans, key=lambda s: s.start)
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+    def write(self, file: Path, format_: str = "json"):
+        match format_:
+            case "json":
+                data = self.to_json()
+            case "chrome":
+                data = self.to_chrome_trace()
+            case _:
+                raise ValueError(f"Unknown profile format: {format_}")
+
+        file.parent.mkdir(parents=True, exist_ok=True)
+        file.write_text(json.dumps(data, indent=2))
+
+
+_profile: Profile | None = None
+
+
+@contextmanager
+def span(name: str, /, **args: str) -> Iterator[None]:
+    """Records the duration of the block in the active profile, if any"""
+    profile = _profile
+    if profile is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.record(name, start, time.perf_counter(), {key: str(value) for key, value in args.items()})
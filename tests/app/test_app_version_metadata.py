@@ -1,6 +1,8 @@
 from payne.app import AppVersionMetadata
 from payne.util.file_system import TemporaryDirectory
-from payne.app.app_version_metadata import create_hash, hash_matches, Script
+from payne.app.app_version_metadata import create_file_hash, create_hash, file_hash_matches, hash_matches, Script
+
+import pytest
 
 
 class TestAppVersionMetadata:
@@ -16,7 +18,7 @@ class TestAppVersionMetadata:
             assert metadata.dump() == {
                 "_schema": {
                     "name": "payne.app-version-metadata",
-                    "version": "1.0",
+                    "version": "1.1",
                 },
                 "scripts": [
                     {"file": str(root / "a-1"), "script_name": "a", "hash": "sha1:asdf"},
@@ -24,12 +26,13 @@ class TestAppVersionMetadata:
                 ],
             }
 
-    def test_parse(self):
+    @pytest.mark.parametrize("version", ["1.0", "1.1"])
+    def test_parse(self, version):
         with TemporaryDirectory() as root:
             metadata = AppVersionMetadata.load({
                 "_schema": {
                     "name": "payne.app-version-metadata",
-                    "version": "1.0",
+                    "version": version,
                 },
                 "scripts": [
                     {"file": str(root / "a-1"), "script_name": "a", "hash": "sha1:asdf"},
@@ -48,3 +51,27 @@ class TestAppVersionMetadata:
         hash_ = create_hash(b"foo")
         assert hash_matches(b"foo", hash_)
         assert not hash_matches(b"bar", hash_)
+
+        # Hashes created with other algorithms (e.g., SHA-1 in schema 1.0)
+        assert hash_matches(b"foo", "sha1:0beec7b5ea3f0fdbc95d0dd47f3c5bc275da8a33")
+
+    def test_file_hash(self):
+        with TemporaryDirectory() as root:
+            # Larger than the chunk size
+            data = bytes(range(256)) * 10000
+            (root / "file").write_bytes(data)
+
+            hash_ = create_file_hash(root / "file")
+            assert hash_.startswith("blake2b:")
+            assert hash_ == create_hash(data)
+            assert file_hash_matches(root / "file", hash_)
+
+            (root / "file").write_bytes(data + b"x")
+            assert not file_hash_matches(root / "file", hash_)
+
+    def test_parse_unknown_schema(self):
+        with pytest.raises(ValueError):
+            AppVersionMetadata.load({
+                "_schema": {"name": "payne.app-version-metadata", "version": "2.0"},
+                "scripts": [],
+            })
@@ -0,0 +1,53 @@
+from payne.app import AppsIndex, IndexEntry
+from payne.util.file_system import TemporaryDirectory
+
+
+class TestAppsIndex:
+    def test_add_remove(self):
+        with TemporaryDirectory() as temp_dir:
+            index = AppsIndex(temp_dir / "index.sqlite", temp_dir / "apps")
+
+            # Not built yet
+            assert index.entries() is None
+
+            index.rebuild([IndexEntry("foo", "1.0", ["foo-1.0"])])
+            assert index.entries() == [IndexEntry("foo", "1.0", ["foo-1.0"])]
+
+            index.add("bar", "2.0", ["bar-2.0", "baz-2.0"])
+            index.add("foo", "1.0", ["foo2-1.0"])
+            assert index.entries() == [
+                IndexEntry("bar", "2.0", ["bar-2.0", "baz-2.0"]),
+                IndexEntry("foo", "1.0", ["foo2-1.0"]),
+            ]
+
+            index.remove("foo", "1.0")
+            index.remove("foo", "3.0")
+            assert index.entries() == [IndexEntry("bar", "2.0", ["bar-2.0", "baz-2.0"])]
+
+            # Persistent
+            assert AppsIndex(temp_dir / "index.sqlite", temp_dir / "apps").entries() == index.entries()
+
+    def test_version_order(self):
+        with TemporaryDirectory() as temp_dir:
+            index = AppsIndex(temp_dir / "index.sqlite", temp_dir / "apps")
+            versions = ["1.10", "1.9", "1.9.post1", "2.0rc1", "invalid", "1.2"]
+            index.rebuild([IndexEntry("foo", version, []) for version in versions])
+            index.add("bar", "1.0", [])
+
+            assert [(entry.name, entry.version) for entry in index.entries()] == [
+                ("bar", "1.0"),
+                ("foo", "1.2"), ("foo", "1.9"), ("foo", "1.9.post1"), ("foo", "1.10"), ("foo", "2.0rc1"),
+                ("foo", "invalid"),
+            ]
+
+    def test_multiple_apps_dirs(self):
+        with TemporaryDirectory() as temp_dir:
+            index_1 = AppsIndex(temp_dir / "index.sqlite", temp_dir / "apps_1")
+            index_2 = AppsIndex(temp_dir / "index.sqlite", temp_dir / "apps_2")
+
+            index_1.rebuild([IndexEntry("foo", "1.0", [])])
+            assert index_2.entries() is None
+
+            index_2.rebuild([])
+            assert index_1.entries() == [IndexEntry("foo", "1.0", [])]
+            assert index_2.entries() == []
@@ -0,0 +1,114 @@
+import errno
+import os
+import shutil
+
+import pytest
+
+from payne.app import ContentStore, DedupeResult
+from payne.app import content_store
+from payne.util.file_system import TemporaryDirectory
+
+
+def create_files(root, files: dict[str, bytes]):
+    for name, data in files.items():
+        (root / name).parent.mkdir(parents=True, exist_ok=True)
+        (root / name).write_bytes(data)
+
+
+class TestContentStore:
+    def test_dedupe(self):
+        with TemporaryDirectory() as temp_dir:
+            store = ContentStore(temp_dir / "store")
+            files = {"a": b"a" * 1000, "sub/b": b"b" * 100, "empty": b""}
+            create_files(temp_dir / "1", {**files, "unique": b"1"})
+            create_files(temp_dir / "2", {**files, "unique": b"2", "c": b"a" * 1000})
+            # Same content, but different permissions
+            create_files(temp_dir / "3", {"a": b"a" * 1000})
+            (temp_dir / "3" / "a").chmod(0o755)
+
+            assert store.dedupe(temp_dir / "1") == DedupeResult(0, 0)
+            assert store.dedupe(temp_dir / "2") == DedupeResult(3, 2100)
+            assert store.dedupe(temp_dir / "3") == DedupeResult(0, 0)
+
+            # Idempotent
+            assert store.dedupe(temp_dir / "2") == DedupeResult(0, 0)
+
+            # Contents and permissions are unchanged
+            for name, data in {**files, "unique": b"2", "c": b"a" * 1000}.items():
+                assert (temp_dir / "2" / name).read_bytes() == data
+            assert (temp_dir / "3" / "a").stat().st_mode & 0o777 == 0o755
+
+    def test_reflink_errors(self, monkeypatch):
+        def reflink(source, target):
+            raise OSError(error, os.strerror(error))
+
+        monkeypatch.setattr(content_store, "reflink", reflink)
+
+        with TemporaryDirectory() as temp_dir:
+            store = ContentStore(temp_dir / "store")
+            create_files(temp_dir / "1", {"a": b"a"})
+            create_files(temp_dir / "2", {"a": b"a"})
+            store.dedupe(temp_dir / "1")
+
+            # A real error is raised, and reflinks are still used afterwards
+            error = errno.ENOSPC
+            with pytest.raises(OSError):
+                store.dedupe(temp_dir / "2")
+            assert store._reflink_supported
+
+            # Not supported: falls back to hard links
+            error = errno.EOPNOTSUPP
+            assert store.dedupe(temp_dir / "2") == DedupeResult(1, 1)
+            assert not store._reflink_supported
+            assert (temp_dir / "2" / "a").stat().st_nlink == 3
+
+    def test_dedupe_reflinks(self, monkeypatch):
+        # Reflinks are separate files, like copies
+        monkeypatch.setattr(content_store, "reflink", shutil.copyfile)
+
+        with TemporaryDirectory() as temp_dir:
+            store = ContentStore(temp_dir / "store")
+            create_files(temp_dir / "1", {"a": b"a" * 1000})
+            create_files(temp_dir / "2", {"a": b"a" * 1000, "b": b"b" * 100})
+            store.dedupe(temp_dir / "1")
+
+            assert store.dedupe(temp_dir / "2") == DedupeResult(1, 1000)
+            assert (temp_dir / "2" / "a").stat().st_nlink == 1
+
+            # Reflinked files are not deduplicated again
+            assert store.dedupe(temp_dir / "2") == DedupeResult(0, 0)
+            assert ContentStore(temp_dir / "store").dedupe(temp_dir / "2") == DedupeResult(0, 0)
+
+            # Unless they have been replaced
+            create_files(temp_dir / "2", {"a": b"a" * 1000})
+            assert store.dedupe(temp_dir / "2") == DedupeResult(1, 1000)
+
+            # Records of removed files are pruned
+            shutil.rmtree(temp_dir / "2")
+            store.prune()
+            assert not (store.root / "reflinks.json").exists()
+
+    def test_prune(self):
+        with TemporaryDirectory() as temp_dir:
+            store = ContentStore(temp_dir / "store")
+            create_files(temp_dir / "1", {"a": b"a", "b": b"b"})
+            create_files(temp_dir / "2", {"a": b"a"})
+            store.dedupe(temp_dir / "1")
+            store.dedupe(temp_dir / "2")
+
+            # Still used
+            store.prune()
+            assert len(list(store.root.rglob("*-*"))) == 2
+
+            # "b" is not used anymore; "a" may still be used by 2
+            (temp_dir / "1" / "a").unlink()
+            (temp_dir / "1" / "b").unlink()
+            store.prune()
+            assert (temp_dir / "2" / "a").read_bytes() == b"a"
+            if os.stat(temp_dir / "2" / "a").st_nlink > 1:
+                assert len(list(store.root.rglob("*-*"))) == 1
+
+            # Nothing used anymore
+            (temp_dir / "2" / "a").unlink()
+            store.prune()
+            assert not store.root.exists()
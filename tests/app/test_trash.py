@@ -0,0 +1,75 @@
+import tempfile
+import time
+from types import SimpleNamespace
+
+from payne.app import Trash
+from payne.app import trash as trash_module
+from payne.util.file_system import TemporaryDirectory
+
+
+class TestTrash:
+    def test_put_empty(self):
+        with TemporaryDirectory() as temp_dir:
+            trash = Trash(temp_dir / "trash")
+            assert trash.is_empty()
+
+            for name in ["1", "2"]:
+                (temp_dir / "a" / name / "sub").mkdir(parents=True)
+                (temp_dir / "a" / name / "sub" / "file").write_text(name)
+                trash.put(temp_dir / "a" / name)
+                assert not (temp_dir / "a" / name).exists()
+
+            # Entries with the same name
+            (temp_dir / "b" / "1").mkdir(parents=True)
+            trash.put(temp_dir / "b" / "1")
+
+            assert not trash.is_empty()
+            trash.empty()
+            assert trash.is_empty()
+            assert not trash.root.exists()
+
+    def test_put_concurrent_empty(self, monkeypatch):
+        mkdtemp = tempfile.mkdtemp
+        races = 0
+
+        def racing_mkdtemp(dir):
+            # The trash is emptied by another process right before
+            nonlocal races
+            if races:
+                races -= 1
+                dir.rmdir()
+            return mkdtemp(dir=dir)
+
+        monkeypatch.setattr(trash_module, "tempfile", SimpleNamespace(mkdtemp=racing_mkdtemp))
+
+        with TemporaryDirectory() as temp_dir:
+            trash = Trash(temp_dir / "trash")
+
+            # Retried
+            races = 1
+            (temp_dir / "a").mkdir()
+            trash.put(temp_dir / "a")
+            assert not (temp_dir / "a").exists()
+            assert not trash.is_empty()
+            trash.empty()
+
+            # Removed directly
+            races = 10
+            (temp_dir / "b").mkdir()
+            trash.put(temp_dir / "b")
+            assert not (temp_dir / "b").exists()
+            assert trash.is_empty()
+
+    def test_empty_in_background(self):
+        with TemporaryDirectory() as temp_dir:
+            trash = Trash(temp_dir / "trash")
+            (temp_dir / "a" / "sub").mkdir(parents=True)
+            (temp_dir / "a" / "sub" / "file").write_text("a")
+            trash.put(temp_dir / "a")
+
+            trash.empty_in_background()
+
+            deadline = time.monotonic() + 30
+            while trash.root.exists():
+                assert time.monotonic() < deadline
+                time.sleep(0.05)
@@ -0,0 +1,44 @@
+from payne.app import Problem
+from payne.app.verification import update_records, verify_records
+from payne.util.file_system import TemporaryDirectory
+
+
+def create_environment(root):
+    site_packages = root / "lib" / "python3.13" / "site-packages"
+    (site_packages / "a").mkdir(parents=True)
+    (site_packages / "a-1.0.dist-info").mkdir()
+    (root / "bin").mkdir()
+
+    (site_packages / "a" / "__init__.py").write_text("a = 1\n")
+    (root / "bin" / "a").write_text("#!/usr/bin/python\n")
+    (site_packages / "a-1.0.dist-info" / "RECORD").write_text(
+        "a/__init__.py,sha256=y3i9ihf3t1H-DUZjNm3LwlcgQDPvfd1ksfKWlXO1suI,6\n"
+        "../../../bin/a,sha256=NitRv1rlYBoXQIqFoD-bnbxRWsQ36UJzjZdNncRaXYM,18\n"
+        "a-1.0.dist-info/RECORD,,\n")
+
+    return site_packages
+
+
+class TestVerification:
+    def test_verify_records(self):
+        with TemporaryDirectory() as root:
+            site_packages = create_environment(root)
+            assert list(verify_records(root)) == []
+
+            (site_packages / "a" / "__init__.py").write_text("a = 2\n")
+            (root / "bin" / "a").unlink()
+            assert set(verify_records(root)) == {
+                Problem(site_packages / "a" / "__init__.py", "modified"),
+                Problem(root / "bin" / "a", "missing"),
+            }
+
+    def test_update_records(self):
+        with TemporaryDirectory() as root:
+            site_packages = create_environment(root)
+
+            (root / "bin" / "a").write_text("#!/other/python\n")
+            assert list(verify_records(root)) == [Problem(root / "bin" / "a", "modified")]
+
+            update_records(root, {root / "bin" / "a"})
+            assert list(verify_records(root)) == []
+            assert "../../../bin/a,sha256=" in (site_packages / "a-1.0.dist-info" / "RECORD").read_text()
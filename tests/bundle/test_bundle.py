@@ -0,0 +1,56 @@
+import json
+import tarfile
+
+import pytest
+
+from payne.bundle import Bundle
+from payne.package import Package
+from payne.util.file_system import TemporaryDirectory
+
+
+class TestBundle:
+    def test_create_read(self):
+        with TemporaryDirectory() as temp_dir:
+            wheel = temp_dir / "foo-1.3.1-py3-none-any.whl"
+            wheel.write_bytes(b"wheel")
+
+            file = temp_dir / "out" / "foo.payne-bundle.tar"
+            Bundle.create(file, Package("foo", "1.3.1"), "foo==1.3.1\nbar==1.0.0\n", [wheel])
+
+            bundle = Bundle(file)
+            assert bundle.package == Package("foo", "1.3.1")
+            assert bundle.constraints() == "foo==1.3.1\nbar==1.0.0\n"
+
+            wheel_dir = bundle.extract_wheels(temp_dir / "extracted")
+            assert [f.name for f in wheel_dir.iterdir()] == [wheel.name]
+            assert (wheel_dir / wheel.name).read_bytes() == b"wheel"
+
+    def test_unsupported(self):
+        with TemporaryDirectory() as temp_dir:
+            file = temp_dir / "foo.payne-bundle.tar"
+            metadata = temp_dir / "bundle.json"
+            metadata.write_text(json.dumps({"_schema": {"name": "payne.bundle", "version": "99.0"}}))
+            with tarfile.open(file, "w") as archive:
+                archive.add(metadata, "bundle.json")
+
+            with pytest.raises(ValueError):
+                _ = Bundle(file).package
+
+    def test_missing_member(self):
+        with TemporaryDirectory() as temp_dir:
+            # No bundle.json
+            file = temp_dir / "empty.payne-bundle.tar"
+            with tarfile.open(file, "w"):
+                pass
+
+            with pytest.raises(ValueError):
+                _ = Bundle(file).package
+
+            # bundle.json is a directory
+            file = temp_dir / "directory.payne-bundle.tar"
+            (temp_dir / "bundle.json").mkdir()
+            with tarfile.open(file, "w") as archive:
+                archive.add(temp_dir / "bundle.json", "bundle.json", recursive=False)
+
+            with pytest.raises(ValueError):
+                _ = Bundle(file).package
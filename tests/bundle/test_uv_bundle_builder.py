@@ -0,0 +1,32 @@
+from payne.bundle.uv_bundle_builder import UvBundleBuilder
+
+
+class TestUvBundleBuilder:
+    def test_read_pins(self):
+        text = ("bar==1.2.0\n"
+                "    # from https://example.com/simple\n"
+                "foo==1.3.1\n"
+                "    # from https://pypi.org/simple\n"
+                "qux==2.0\n")
+
+        assert UvBundleBuilder._read_pins(text) == [
+            ("bar==1.2.0", "https://example.com/simple"),
+            ("foo==1.3.1", "https://pypi.org/simple"),
+            ("qux==2.0", None),
+        ]
+
+    def test_wheels(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(UvBundleBuilder, "_run", staticmethod(lambda args, **kwargs: calls.append(args)))
+        monkeypatch.setattr("payne.bundle.uv_bundle_builder.config", lambda: type("Config", (), {"uv": "uv"}))
+
+        pins = [("bar==1.2.0", "https://example.com/simple"), ("baz==1.1.1", "https://pypi.org/simple"),
+                ("foo==1.3.1", "https://example.com/simple")]
+        UvBundleBuilder({"example": "https://example.com/simple"})._wheels(pins, "wheels")
+
+        # One call per index, each with only that index
+        assert [(args[args.index("--index-url") + 1], args[args.index("wheels") + 1:]) for args in calls] == [
+            ("https://example.com/simple", ["bar==1.2.0", "foo==1.3.1"]),
+            ("https://pypi.org/simple", ["baz==1.1.1"]),
+        ]
+        assert not any("--extra-index-url" in args for args in calls)
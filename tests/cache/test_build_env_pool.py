@@ -0,0 +1,66 @@
+import json
+import shutil
+import subprocess
+import time
+
+import pytest
+
+from payne.cache import BuildEnvPool
+from payne.cache.build_env_pool import normalize_requirements
+from payne.util.file_system import TemporaryDirectory
+from payne.util.locking import file_lock
+
+
+class TestBuildEnvPool:
+    def test_normalize_requirements(self):
+        assert normalize_requirements(["Hatchling", "hatch_vcs>=0.3", "hatchling"]) == ["hatch-vcs>=0.3", "hatchling"]
+        assert BuildEnvPool.key(["Hatchling"]) == BuildEnvPool.key(["hatchling"])
+        assert BuildEnvPool.key(["hatchling"]) != BuildEnvPool.key(["setuptools"])
+
+    @pytest.mark.slow
+    def test_reuse(self):
+        with TemporaryDirectory() as temp_dir:
+            pool = BuildEnvPool(temp_dir / "build_envs", 3600, shutil.which("uv"))
+
+            with pool.env(["hatchling"]) as env:
+                subprocess.run([env.python_executable, "-c", "import hatchling"], check=True)
+                (env.path / "marker").touch()
+
+            # Same environment
+            with pool.env(["Hatchling"]) as env:
+                assert (env.path / "marker").exists()
+
+            # Expired
+            pool = BuildEnvPool(temp_dir / "build_envs", 0, shutil.which("uv"))
+            with pool.env(["hatchling"]) as env:
+                assert not (env.path / "marker").exists()
+                info = json.loads((env.path.parent / "env.json").read_text())
+                assert info["requirements"] == ["hatchling"]
+
+            # Including the lock files
+            pool.evict()
+            assert not any(pool.root.iterdir())
+
+    def test_key_extra_requirements(self):
+        # Additional requirements of a project get an environment of their own
+        assert BuildEnvPool.key(["setuptools"]) != BuildEnvPool.key(["setuptools", "setuptools-scm==8.0"])
+        assert BuildEnvPool.key(["setuptools-scm==8.0"]) != BuildEnvPool.key(["setuptools-scm==7.0"])
+
+    def test_evict(self):
+        with TemporaryDirectory() as temp_dir:
+            pool = BuildEnvPool(temp_dir / "build_envs", 3600, shutil.which("uv"))
+
+            def create_entry(key: str, created: float):
+                (pool.root / key / "env").mkdir(parents=True)
+                (pool.root / key / "env.json").write_text(json.dumps({"requirements": [], "created": created}))
+
+            create_entry("fresh", time.time())
+            create_entry("expired", 0)
+            create_entry("used", 0)
+            # Incomplete
+            (pool.root / "incomplete").mkdir()
+
+            with file_lock(pool.root / "used.lock"):
+                pool.evict()
+
+            assert {path.name for path in pool.root.iterdir()} == {"fresh", "fresh.lock", "used", "used.lock"}
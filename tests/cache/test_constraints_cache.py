@@ -0,0 +1,17 @@
+from payne.cache import ConstraintsCache
+from payne.util.file_system import TemporaryDirectory
+
+
+class TestConstraintsCache:
+    def test_get_put(self):
+        with TemporaryDirectory() as temp_dir:
+            cache = ConstraintsCache(temp_dir / "constraints")
+
+            assert cache.get("a") is None
+
+            cache.put("a", "foo==1.2.3\n")
+            assert cache.get("a") == "foo==1.2.3\n"
+            assert cache.get("b") is None
+
+            # Persistent
+            assert ConstraintsCache(temp_dir / "constraints").get("a") == "foo==1.2.3\n"
@@ -0,0 +1,157 @@
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import os
+
+import pytest
+from unearth.fetchers import PyPIClient
+
+from payne.cache import DownloadCache
+from payne.util.file_system import TemporaryDirectory
+
+from fixtures.file_server import file_server
+
+data = bytes(range(256)) * 16
+sha256 = hashlib.sha256(data).hexdigest()
+
+
+class TestDownloadCache:
+    def test_download(self):
+        with TemporaryDirectory() as temp_dir, file_server({"/foo-1.0.tar.gz": data}) as server, \
+                PyPIClient() as session:
+            cache = DownloadCache(temp_dir, 1024 ** 2)
+            url = f"{server.url}/foo-1.0.tar.gz"
+
+            assert cache.archive("sha256", sha256, "foo-1.0.tar.gz") is None
+
+            archive = cache.download(session, url, "foo-1.0.tar.gz", "sha256", sha256)
+            assert archive.name == "foo-1.0.tar.gz"
+            assert archive.read_bytes() == data
+            assert cache.archive("sha256", sha256, "foo-1.0.tar.gz") == archive
+
+            # Not downloaded again
+            assert cache.download(session, url, "foo-1.0.tar.gz", "sha256", sha256) == archive
+            assert len(server.requests) == 1
+
+    def test_download_resume(self):
+        with TemporaryDirectory() as temp_dir, file_server({"/foo-1.0.tar.gz": data}) as server, \
+                PyPIClient() as session:
+            cache = DownloadCache(temp_dir, 1024 ** 2)
+
+            # An interrupted download
+            partial = temp_dir / "partial" / f"sha256-{sha256}"
+            partial.parent.mkdir(parents=True)
+            partial.write_bytes(data[:1000])
+
+            archive = cache.download(session, f"{server.url}/foo-1.0.tar.gz", "foo-1.0.tar.gz", "sha256", sha256)
+            assert archive.read_bytes() == data
+            assert server.requests == [("/foo-1.0.tar.gz", "bytes=1000-")]
+            assert not partial.exists()
+
+    def test_download_concurrent(self):
+        with TemporaryDirectory() as temp_dir, file_server({"/foo-1.0.tar.gz": data}, delay=0.2) as server, \
+                PyPIClient() as session:
+            cache = DownloadCache(temp_dir, 1024 ** 2)
+
+            def download(_):
+                return cache.download(session, f"{server.url}/foo-1.0.tar.gz", "foo-1.0.tar.gz", "sha256", sha256)
+
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                archives = list(executor.map(download, range(4)))
+
+            # Downloaded once, the others waited for it
+            assert all(archive.read_bytes() == data for archive in archives)
+            assert len(server.requests) == 1
+
+    def test_download_hash_mismatch(self):
+        with TemporaryDirectory() as temp_dir, file_server({"/foo-1.0.tar.gz": data}) as server, \
+                PyPIClient() as session:
+            cache = DownloadCache(temp_dir, 1024 ** 2)
+            wrong_hash = hashlib.sha256(b"other").hexdigest()
+
+            with pytest.raises(ValueError, match="Hash mismatch"):
+                cache.download(session, f"{server.url}/foo-1.0.tar.gz", "foo-1.0.tar.gz", "sha256", wrong_hash)
+
+            assert cache.archive("sha256", wrong_hash, "foo-1.0.tar.gz") is None
+
+    def test_invalid_hash(self):
+        with TemporaryDirectory() as temp_dir:
+            cache = DownloadCache(temp_dir, 1024 ** 2)
+
+            with pytest.raises(ValueError):
+                cache.archive("sha256", "../foo", "foo-1.0.tar.gz")
+            with pytest.raises(ValueError):
+                cache.archive("invalid", sha256, "foo-1.0.tar.gz")
+
+    def test_files(self):
+        with TemporaryDirectory() as temp_dir:
+            cache = DownloadCache(temp_dir, 1024 ** 2)
+
+            assert cache.files("sha256", sha256, ["pyproject.toml", "uv.lock"]) is None
+
+            cache.put_files("sha256", sha256, ["pyproject.toml", "uv.lock"], {"pyproject.toml": b"pyproject"})
+            assert cache.files("sha256", sha256, ["pyproject.toml", "uv.lock"]) == {"pyproject.toml": b"pyproject"}
+
+            # Not all files known
+            assert cache.files("sha256", sha256, ["pyproject.toml", "setup.py"]) is None
+
+    def test_evict(self):
+        with TemporaryDirectory() as temp_dir:
+            cache = DownloadCache(temp_dir, 2500)
+            hashes = [hashlib.sha256(bytes([i])).hexdigest() for i in range(3)]
+
+            for i, hash_value in enumerate(hashes):
+                cache.put_files("sha256", hash_value, ["file"], {"file": bytes(1000)})
+                # Make sure that the access times differ
+                entry = temp_dir / "entries" / "sha256" / hash_value
+                os.utime(entry, ns=(i * 10 ** 9, i * 10 ** 9))
+
+            # All three entries don't fit; the least recently used one was
+            # removed when the last one was added
+            assert cache.files("sha256", hashes[0], ["file"]) is None
+            assert cache.files("sha256", hashes[1], ["file"]) is not None
+            assert cache.files("sha256", hashes[2], ["file"]) is not None
+
+            # Using an entry makes it the most recently used one
+            cache.put_files("sha256", hashes[0], ["file"], {"file": bytes(1000)})
+            assert cache.files("sha256", hashes[0], ["file"]) is not None
+            assert cache.files("sha256", hashes[1], ["file"]) is None
+
+    def test_evict_in_use(self):
+        with TemporaryDirectory() as temp_dir:
+            cache = DownloadCache(temp_dir, 1500)
+            hashes = [hashlib.sha256(bytes([i])).hexdigest() for i in range(3)]
+            entries = [temp_dir / "entries" / "sha256" / hash_value for hash_value in hashes]
+
+            with cache.in_use("sha256", hashes[0]):
+                cache.put_files("sha256", hashes[0], ["file"], {"file": bytes(1000)})
+                os.utime(entries[0], ns=(0, 0))
+
+                # The least recently used entry is in use, so the next one is
+                # removed instead
+                cache.put_files("sha256", hashes[1], ["file"], {"file": bytes(1000)})
+                os.utime(entries[1], ns=(10 ** 9, 10 ** 9))
+                cache.put_files("sha256", hashes[2], ["file"], {"file": bytes(1000)})
+                assert [entry.exists() for entry in entries] == [True, False, True]
+
+            # No longer in use
+            cache.evict()
+            assert [entry.exists() for entry in entries] == [False, False, True]
+            # The lock files of removed entries are removed as well
+            assert list((temp_dir / "locks").iterdir()) == []
+
+    def test_evict_concurrent(self):
+        with TemporaryDirectory() as temp_dir:
+            cache = DownloadCache(temp_dir, 5000)
+
+            def put(i):
+                hash_value = hashlib.sha256(bytes([i])).hexdigest()
+                with cache.in_use("sha256", hash_value):
+                    cache.put_files("sha256", hash_value, ["file"], {"file": bytes(1000)})
+                    # Not evicted while in use
+                    assert cache.files("sha256", hash_value, ["file"]) is not None
+
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                list(executor.map(put, range(64)))
+
+            cache.evict()
+            assert len(list(cache._entry_dirs())) == 5
@@ -0,0 +1,45 @@
+from payne.cache import HttpCache
+from payne.util.file_system import TemporaryDirectory
+
+
+class TestHttpCache:
+    def test_get_put(self):
+        with TemporaryDirectory() as temp_dir:
+            cache = HttpCache(temp_dir / "http", 600)
+            assert cache.get("a") is None
+
+            cache.put("a", "https://example.com/a/", {"etag": '"1"'}, b"a\nb")
+            entry = cache.get("a")
+            assert entry.url == "https://example.com/a/"
+            assert entry.headers == {"etag": '"1"'}
+            assert entry.content == b"a\nb"
+            assert cache.get("b") is None
+
+            # Persistent
+            assert HttpCache(temp_dir / "http", 600).get("a") == entry
+
+    def test_freshness(self):
+        with TemporaryDirectory() as temp_dir:
+            cache = HttpCache(temp_dir / "http", 600)
+
+            assert cache.is_fresh(cache.put("a", "url", {}, b""))
+            assert cache.is_fresh(cache.put("a", "url", {"cache-control": "max-age=60"}, b""))
+            assert not cache.is_fresh(cache.put("a", "url", {"cache-control": "max-age=0"}, b""))
+            assert not cache.is_fresh(cache.put("a", "url", {"cache-control": "no-cache"}, b""))
+            assert cache.put("a", "url", {"cache-control": "no-store"}, b"") is None
+
+            # The configured maximum age limits the one from the server
+            cache = HttpCache(temp_dir / "http", 0)
+            assert not cache.is_fresh(cache.put("a", "url", {"cache-control": "max-age=60"}, b""))
+
+    def test_revalidate(self):
+        with TemporaryDirectory() as temp_dir:
+            cache = HttpCache(temp_dir / "http", 0)
+
+            entry = cache.put("a", "url", {"etag": '"1"', "last-modified": "yesterday"}, b"a")
+            assert cache.conditional_headers(entry) == {"If-None-Match": '"1"', "If-Modified-Since": "yesterday"}
+
+            entry = cache.revalidated("a", entry, {"cache-control": "max-age=60"})
+            assert entry.headers == {"etag": '"1"', "last-modified": "yesterday", "cache-control": "max-age=60"}
+            assert entry.content == b"a"
+            assert cache.get("a") == entry
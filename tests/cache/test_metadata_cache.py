@@ -0,0 +1,24 @@
+from payne.cache import MetadataCache
+from payne.project import Metadata
+from payne.util.file_system import TemporaryDirectory
+
+
+class TestMetadataCache:
+    def test_get_put(self):
+        with TemporaryDirectory() as temp_dir:
+            cache = MetadataCache(temp_dir / "metadata")
+
+            assert cache.get("a") is None
+
+            cache.put("a", Metadata("foo", "1.2.3"))
+            assert cache.get("a") == Metadata("foo", "1.2.3")
+            assert cache.get("b") is None
+
+            # Persistent
+            assert MetadataCache(temp_dir / "metadata").get("a") == Metadata("foo", "1.2.3")
+
+    def test_invalid(self):
+        with TemporaryDirectory() as temp_dir:
+            cache = MetadataCache(temp_dir)
+            (temp_dir / "a.json").write_text("{")
+            assert cache.get("a") is None
@@ -1,11 +1,18 @@
+import hashlib
+import time
 import tomllib
 
 import pytest
 
-from common import test_data_index_url_files
+from common import test_data_index_url_files, test_data_index_url_server
+from fixtures.file_server import file_server
+from fixtures.index_server import index_server
+from payne.cache import DownloadCache, HttpCache
 from payne.downloader import Downloader
+from payne.exceptions import NotAvailableOffline, PackageNotFound
 from payne.package import Package
 from payne.util.file_system import TemporaryDirectory
+from utils import create_tar, create_zip
 
 
 class TestDownload:
@@ -31,3 +38,212 @@ class TestDownload:
             pkg_info = pkg_info_file.read_text().splitlines()
             assert f"Name: {package.name}" in pkg_info
             assert f"Version: {package.version}" in pkg_info
+
+    @pytest.mark.slow
+    @pytest.mark.parametrize("server", [False, True])
+    def test_download_sdist_files(self, server, index_server):
+        package = Package("foo", "1.3.1")
+        index_url = test_data_index_url_server if server else test_data_index_url_files
+
+        with TemporaryDirectory() as temp_dir:
+            downloader = Downloader()
+            target = downloader.download_sdist_files(package, temp_dir / "files", {"payne_test_data": index_url},
+                                                     ["pyproject.toml", "uv.lock", "missing"])
+
+            assert {child.name for child in target.iterdir()} == {"pyproject.toml", "uv.lock"}
+
+            pyproject = tomllib.loads((target / "pyproject.toml").read_text())
+            assert pyproject["project"]["name"] == package.name
+            assert pyproject["project"]["version"] == package.version
+
+            uv_lock = tomllib.loads((target / "uv.lock").read_text())
+            assert {p["name"] for p in uv_lock["package"]} == {"foo", "bar", "baz"}
+
+    def test_download_sdist_files_cached(self):
+        archive = create_tar({"paynetestpkg-1.0/pyproject.toml": b"pyproject", "paynetestpkg-1.0/uv.lock": b"lock"})
+        sha256 = hashlib.sha256(archive).hexdigest()
+        index_page = f'<a href="/files/paynetestpkg-1.0.tar.gz#sha256={sha256}">paynetestpkg-1.0.tar.gz</a>'
+
+        files = {"/simple/paynetestpkg/": index_page.encode(), "/files/paynetestpkg-1.0.tar.gz": archive}
+        with TemporaryDirectory() as temp_dir, file_server(files) as server:
+            downloader = Downloader(DownloadCache(temp_dir / "cache", 1024 ** 2))
+            package = Package("paynetestpkg", "1.0")
+            package_indices = {"test": f"{server.url}/simple"}
+
+            for i in range(2):
+                target = downloader.download_sdist_files(package, temp_dir / f"files{i}", package_indices,
+                                                         ["pyproject.toml", "uv.lock"])
+                assert (target / "pyproject.toml").read_bytes() == b"pyproject"
+                assert (target / "uv.lock").read_bytes() == b"lock"
+
+            # The second time, the files were taken from the cache
+            assert [path for path, _ in server.requests].count("/files/paynetestpkg-1.0.tar.gz") == 1
+
+            # The archive is downloaded to the cache and unpacked from there
+            target = downloader.download_and_unpack_sdist(package, temp_dir / "unpacked", package_indices)
+            assert (target / "pyproject.toml").read_bytes() == b"pyproject"
+            target = downloader.download_and_unpack_sdist(package, temp_dir / "unpacked2", package_indices)
+            assert (target / "uv.lock").read_bytes() == b"lock"
+            assert [path for path, _ in server.requests].count("/files/paynetestpkg-1.0.tar.gz") == 2
+
+    def test_multiple_indices(self):
+        def index_files(content: bytes) -> dict[str, bytes]:
+            archive = create_tar({"paynetestpkg-1.0/pyproject.toml": content})
+            sha256 = hashlib.sha256(archive).hexdigest()
+            index_page = f'<a href="/files/paynetestpkg-1.0.tar.gz#sha256={sha256}">paynetestpkg-1.0.tar.gz</a>'
+            return {"/simple/paynetestpkg/": index_page.encode(), "/files/paynetestpkg-1.0.tar.gz": archive}
+
+        package = Package("paynetestpkg", "1.0")
+
+        with (TemporaryDirectory() as temp_dir,
+              file_server({}, delay=1) as empty,
+              file_server(index_files(b"first"), delay=1) as first,
+              file_server(index_files(b"second"), delay=1) as second):
+            downloader = Downloader()
+
+            # The indices are queried concurrently
+            start = time.monotonic()
+            package_indices = {"empty": f"{empty.url}/simple", "first": f"{first.url}/simple",
+                               "second": f"{second.url}/simple"}
+            target = downloader.download_sdist_files(package, temp_dir / "files", package_indices, ["pyproject.toml"])
+            # Index queries, then the download
+            assert time.monotonic() - start < 2.8
+
+            # If multiple indices have the package, the first one wins
+            assert (target / "pyproject.toml").read_bytes() == b"first"
+            assert [path for path, _ in empty.requests] == ["/simple/paynetestpkg/"]
+            assert [path for path, _ in second.requests] == ["/simple/paynetestpkg/"]
+
+    def test_yanked(self):
+        def index_files(content: bytes, yanked: bool) -> dict[str, bytes]:
+            archive = create_tar({"paynetestpkg-1.0/pyproject.toml": content})
+            sha256 = hashlib.sha256(archive).hexdigest()
+            yanked_attribute = ' data-yanked="broken"' if yanked else ""
+            index_page = (f'<a href="/files/paynetestpkg-1.0.tar.gz#sha256={sha256}"{yanked_attribute}>'
+                          f'paynetestpkg-1.0.tar.gz</a>')
+            return {"/simple/paynetestpkg/": index_page.encode(), "/files/paynetestpkg-1.0.tar.gz": archive}
+
+        package = Package("paynetestpkg", "1.0")
+
+        with (TemporaryDirectory() as temp_dir,
+              file_server(index_files(b"yanked", True)) as first,
+              file_server(index_files(b"second", False)) as second):
+            package_indices = {"first": f"{first.url}/simple", "second": f"{second.url}/simple"}
+
+            # A yanked file is not used if another index has the same version
+            target = Downloader().download_sdist_files(package, temp_dir / "files1", package_indices,
+                                                       ["pyproject.toml"])
+            assert (target / "pyproject.toml").read_bytes() == b"second"
+
+            # But it is used if there is nothing else
+            target = Downloader().download_sdist_files(package, temp_dir / "files2", {"first": f"{first.url}/simple"},
+                                                       ["pyproject.toml"])
+            assert (target / "pyproject.toml").read_bytes() == b"yanked"
+
+    def test_zip_range_requests(self):
+        large_data = bytes(range(256)) * 4096 * 8
+        names = ["pyproject.toml", "setup.cfg", "setup.py", "uv.lock"]
+        archive = create_zip({"paynetestpkg-1.0/large.bin": large_data,
+                              **{f"paynetestpkg-1.0/{name}": name.encode() for name in names}})
+        sha256 = hashlib.sha256(archive).hexdigest()
+        index_page = f'<a href="/files/paynetestpkg-1.0.zip#sha256={sha256}">paynetestpkg-1.0.zip</a>'
+        files = {"/simple/paynetestpkg/": index_page.encode(), "/files/paynetestpkg-1.0.zip": archive}
+        package = Package("paynetestpkg", "1.0")
+
+        with TemporaryDirectory() as temp_dir, file_server(files) as server:
+            target = Downloader().download_sdist_files(package, temp_dir / "files", {"test": f"{server.url}/simple"},
+                                                       names)
+            assert all((target / name).read_bytes() == name.encode() for name in names)
+
+            # Reads are buffered, rather than a range request for each header
+            # and file
+            ranges = [range_ for path, range_ in server.requests if path == "/files/paynetestpkg-1.0.zip"]
+            assert all(ranges)
+            assert len(ranges) <= 6
+
+    def test_not_found(self):
+        archive = create_tar({"paynetestpkg-1.0/pyproject.toml": b"pyproject"})
+        sha256 = hashlib.sha256(archive).hexdigest()
+        index_page = f'<a href="/files/paynetestpkg-1.0.tar.gz#sha256={sha256}">paynetestpkg-1.0.tar.gz</a>'
+        files = {"/simple/paynetestpkg/": index_page.encode(), "/files/paynetestpkg-1.0.tar.gz": archive}
+        package = Package("paynetestpkg", "2.0")
+
+        with TemporaryDirectory() as temp_dir, file_server(files) as server:
+            with pytest.raises(PackageNotFound) as exc_info:
+                Downloader().download_sdist_files(package, temp_dir / "files", {"test": f"{server.url}/simple"},
+                                                  ["pyproject.toml"])
+            assert str(exc_info.value) == "No source distribution found for paynetestpkg==2.0"
+
+    def test_index_cache(self):
+        archive = create_tar({"paynetestpkg-1.0/pyproject.toml": b"pyproject"})
+        sha256 = hashlib.sha256(archive).hexdigest()
+        index_page = f'<a href="/files/paynetestpkg-1.0.tar.gz#sha256={sha256}">paynetestpkg-1.0.tar.gz</a>'
+        files = {"/simple/paynetestpkg/": index_page.encode(), "/files/paynetestpkg-1.0.tar.gz": archive}
+        package = Package("paynetestpkg", "1.0")
+
+        def download(downloader: Downloader, server_url: str, target):
+            target = downloader.download_sdist_files(package, target, {"test": f"{server_url}/simple"},
+                                                     ["pyproject.toml"])
+            assert (target / "pyproject.toml").read_bytes() == b"pyproject"
+
+        def index_statuses(server) -> list[int]:
+            return [status for (path, _), status in zip(server.requests, server.statuses)
+                    if path == "/simple/paynetestpkg/"]
+
+        with TemporaryDirectory() as temp_dir:
+            # Fresh entries are used without a request
+            with file_server(files) as server:
+                downloader = Downloader(http_cache=HttpCache(temp_dir / "http1", 600))
+                download(downloader, server.url, temp_dir / "files1")
+                download(Downloader(http_cache=HttpCache(temp_dir / "http1", 600)), server.url, temp_dir / "files2")
+                assert index_statuses(server) == [200]
+
+            # Stale entries are revalidated
+            with file_server(files) as server:
+                downloader = Downloader(http_cache=HttpCache(temp_dir / "http2", 0))
+                download(downloader, server.url, temp_dir / "files3")
+                download(downloader, server.url, temp_dir / "files4")
+                assert index_statuses(server) == [200, 304]
+
+            # The server can prevent caching
+            with file_server(files, headers={"Cache-Control": "no-store"}) as server:
+                downloader = Downloader(http_cache=HttpCache(temp_dir / "http3", 600))
+                download(downloader, server.url, temp_dir / "files5")
+                download(downloader, server.url, temp_dir / "files6")
+                assert index_statuses(server) == [200, 200]
+
+    def test_offline(self):
+        archive = create_tar({"paynetestpkg-1.0/pyproject.toml": b"pyproject"})
+        sha256 = hashlib.sha256(archive).hexdigest()
+        index_page = f'<a href="/files/paynetestpkg-1.0.tar.gz#sha256={sha256}">paynetestpkg-1.0.tar.gz</a>'
+        files = {"/simple/paynetestpkg/": index_page.encode(), "/files/paynetestpkg-1.0.tar.gz": archive}
+        package = Package("paynetestpkg", "1.0")
+
+        with TemporaryDirectory() as temp_dir, file_server(files) as server:
+            package_indices = {"test": f"{server.url}/simple"}
+
+            def downloader(offline: bool) -> Downloader:
+                # The index pages are stale, but that doesn't matter offline
+                return Downloader(DownloadCache(temp_dir / "downloads", 1024 ** 2),
+                                  HttpCache(temp_dir / "http", 0), offline=offline)
+
+            # Nothing cached
+            with pytest.raises(NotAvailableOffline):
+                downloader(True).download_sdist_files(package, temp_dir / "files1", package_indices,
+                                                      ["pyproject.toml"])
+            with pytest.raises(NotAvailableOffline):
+                downloader(True).download_and_unpack_sdist(package, temp_dir / "unpacked1", package_indices)
+            assert server.requests == []
+
+            # Warm the caches
+            downloader(False).download_sdist_files(package, temp_dir / "files2", package_indices,
+                                                   ["pyproject.toml"])
+            downloader(False).download_and_unpack_sdist(package, temp_dir / "unpacked2", package_indices)
+            request_count = len(server.requests)
+
+            target = downloader(True).download_sdist_files(package, temp_dir / "files3", package_indices,
+                                                           ["pyproject.toml"])
+            assert (target / "pyproject.toml").read_bytes() == b"pyproject"
+            target = downloader(True).download_and_unpack_sdist(package, temp_dir / "unpacked3", package_indices)
+            assert (target / "pyproject.toml").read_bytes() == b"pyproject"
+            assert len(server.requests) == request_count
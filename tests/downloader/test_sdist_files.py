@@ -0,0 +1,57 @@
+import io
+
+from unearth.fetchers import PyPIClient
+
+from payne.downloader.remote_file import RangeFile, StreamFile
+from payne.downloader.sdist_files import read_sdist_files
+
+from fixtures.file_server import file_server
+from utils import create_tar, create_zip
+
+
+# Incompressible, so the size of the archive is dominated by this file
+large_data = bytes(range(256)) * 4096 * 8
+files = {
+    "foo-1.0/pyproject.toml": b"pyproject",
+    "foo-1.0/uv.lock": b"lock",
+    "foo-1.0/large.bin": large_data,
+    "foo-1.0/sub/uv.lock": b"not top level",
+}
+
+
+class TestSdistFiles:
+    def test_tar(self):
+        data = create_tar(files)
+        result = read_sdist_files(io.BytesIO(data), "foo-1.0.tar.gz", ["pyproject.toml", "uv.lock", "missing"])
+        assert result == {"pyproject.toml": b"pyproject", "uv.lock": b"lock"}
+
+    def test_tar_stream_stops(self):
+        data = create_tar(files)
+        chunks = (data[i:i + 1024] for i in range(0, len(data), 1024))
+        stream_file = StreamFile(chunks)
+
+        result = read_sdist_files(stream_file, "foo-1.0.tar.gz", ["pyproject.toml", "uv.lock"])
+        assert result == {"pyproject.toml": b"pyproject", "uv.lock": b"lock"}
+
+        # The large file after the requested files was never transferred
+        assert stream_file.bytes_transferred < len(data) / 10
+
+    def test_zip(self):
+        data = create_zip(files)
+        result = read_sdist_files(io.BytesIO(data), "foo-1.0.zip", ["pyproject.toml", "uv.lock", "missing"])
+        assert result == {"pyproject.toml": b"pyproject", "uv.lock": b"lock"}
+
+    def test_zip_range(self):
+        data = create_zip({"foo-1.0/large.bin": large_data, **files})
+
+        with file_server({"/foo-1.0.zip": data}) as server, PyPIClient() as session:
+            with RangeFile.open(session, f"{server.url}/foo-1.0.zip") as range_file:
+                result = read_sdist_files(range_file, "foo-1.0.zip", ["pyproject.toml", "uv.lock"])
+                assert result == {"pyproject.toml": b"pyproject", "uv.lock": b"lock"}
+
+                # Only the index and the requested files were transferred
+                assert range_file.bytes_transferred < len(data) / 10
+
+    def test_range_not_supported(self):
+        with file_server({"/foo-1.0.zip": b"foo"}, ranges=False) as server, PyPIClient() as session:
+            assert RangeFile.open(session, f"{server.url}/foo-1.0.zip") is None
@@ -0,0 +1,100 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import hashlib
+import http.server
+import mimetypes
+import socket
+from threading import Thread
+import time
+
+
+@dataclass
+class FileServer:
+    url: str
+    files: dict[str, bytes]
+    # Requested paths with the range header (or `None`)
+    requests: list[tuple[str, str | None]] = field(default_factory=list)
+    # Status codes of the responses
+    statuses: list[int] = field(default_factory=list)
+
+
+class _Server(http.server.ThreadingHTTPServer):
+    # The index server fixture changes the address family of the base class
+    address_family = socket.AddressFamily.AF_INET
+
+
+@contextmanager
+def file_server(files: dict[str, bytes], *, ranges: bool = True, delay: float = 0,
+                headers: dict[str, str] | None = None) -> Iterator[FileServer]:
+    """Runs an HTTP server that serves the given files (by path)
+
+    Paths ending with a slash are served as HTML. Range requests are supported
+    unless `ranges` is false. Each response is delayed by `delay` seconds.
+
+    Each file has an ETag (the hash of its content), which is used for
+    conditional requests. `headers` are added to all responses.
+    """
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def send_response(self, code, message=None):
+            file_server_.statuses.append(code)
+            super().send_response(code, message)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+
+        def do_GET(self):
+            range_ = self.headers.get("Range")
+            file_server_.requests.append((self.path, range_))
+            time.sleep(delay)
+
+            if (data := file_server_.files.get(self.path)) is None:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            etag = f'"{hashlib.sha256(data).hexdigest()}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+
+            if ranges and range_:
+                start, end = range_.removeprefix("bytes=").split("-")
+                start, end = int(start), min(int(end or len(data) - 1), len(data) - 1)
+                if start >= len(data):
+                    self.send_response(416)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+                body = data[start:end + 1]
+            else:
+                self.send_response(200)
+                body = data
+
+            if self.path.endswith("/"):
+                content_type = "text/html"
+            else:
+                content_type = mimetypes.guess_type(self.path)[0] or "application/octet-stream"
+
+            self.send_header("Content-Type", content_type)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format_, *args):
+            pass
+
+    server = _Server(("127.0.0.1", 0), Handler)
+    file_server_ = FileServer(f"http://127.0.0.1:{server.server_port}", files)
+    Thread(target=server.serve_forever, daemon=True).start()
+
+    try:
+        yield file_server_
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -30,7 +30,15 @@ def _run_server():
     server.serve_forever()
 
 
+_server_started = False
+
+
 @pytest.fixture(scope="session", autouse=False)
 def index_server():
-    t = Thread(target=_run_server, daemon=True).start()
+    # The fixture is imported by multiple test modules, each of which gets its
+    # own instance, but there can only be one server on the port
+    global _server_started
+    if not _server_started:
+        Thread(target=_run_server, daemon=True).start()
+        _server_started = True
 
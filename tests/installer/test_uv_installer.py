@@ -0,0 +1,27 @@
+import subprocess
+
+from payne import Config
+from payne.installer import UvInstaller
+from payne.package import Package
+from payne.util.file_system import TemporaryDirectory
+
+
+class TestUvInstaller:
+    def test_incremental_with_index(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(subprocess, "run", lambda args, **kwargs: calls.append(args))
+
+        with TemporaryDirectory() as temp_dir:
+            package_indices = {"first": "https://first.example.com/simple", "second": "https://second.example.com/simple"}
+            with Config(apps_dir=temp_dir / "apps", bin_dir=temp_dir / "bin", package_indices=package_indices, uv="uv"):
+                installer = UvInstaller(package_indices)
+                installer.install_package(Package("foo", "1.3.1"), temp_dir / "target", temp_dir / "bin", None,
+                                          incremental=True)
+
+        [args] = calls
+        # Only the app itself is reinstalled, not an index
+        index = args.index("--reinstall-package")
+        assert args[index + 1] == "foo"
+        assert "--reinstall" not in args
+        assert "first=https://first.example.com/simple" in args
+        assert "second=https://second.example.com/simple" in args
@@ -12,3 +12,11 @@ class TestPackage:
 
     def test_requirement_specifyier(self):
         assert Package("foo", "1.2.3").requirement_specifier() == "foo==1.2.3"
+
+    def test_parse(self):
+        assert Package.parse("foo==1.2.3") == Package("foo", "1.2.3")
+        assert Package.parse(" foo == 1.2.3 ") == Package("foo", "1.2.3")
+
+        for specifier in ["foo", "foo==", "==1.2.3", "foo>=1.2.3", "foo==abc", "foo===1.2.3"]:
+            with pytest.raises(ValueError):
+                Package.parse(specifier)
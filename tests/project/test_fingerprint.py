@@ -0,0 +1,74 @@
+import shutil
+import subprocess
+
+from payne.project.fingerprint import _vcs_state, project_fingerprint
+from payne.util.file_system import TemporaryDirectory
+
+from common import test_data
+
+
+class TestFingerprint:
+    def test_tree(self):
+        with TemporaryDirectory() as temp_dir:
+            root = temp_dir / "dyn"
+            shutil.copytree(test_data / "dyn-3.1.0", root)
+
+            fingerprint = project_fingerprint(root)
+            assert project_fingerprint(root) == fingerprint
+
+            # Build configuration changed
+            pyproject_toml = root / "pyproject.toml"
+            pyproject_toml.write_text(pyproject_toml.read_text() + "\n")
+            assert project_fingerprint(root) != fingerprint
+            fingerprint = project_fingerprint(root)
+
+            # Source file changed
+            (root / "src" / "dyn" / "__init__.py").write_text("__version__ = '3.1.1'\n")
+            assert project_fingerprint(root) != fingerprint
+            fingerprint = project_fingerprint(root)
+
+            # Ignored files changed
+            (root / "__pycache__").mkdir()
+            (root / "__pycache__" / "foo.pyc").write_bytes(b"")
+            assert project_fingerprint(root) == fingerprint
+
+    def test_git(self):
+        def git(*args: str):
+            subprocess.run(["git", "-c", "user.name=payne", "-c", "user.email=payne@example.com", *args],
+                           cwd=root, check=True, capture_output=True)
+
+        with TemporaryDirectory() as temp_dir:
+            root = temp_dir / "dyn"
+            shutil.copytree(test_data / "dyn-3.1.0", root)
+            git("init")
+            git("add", ".")
+            git("commit", "-m", "Initial")
+
+            fingerprint = project_fingerprint(root)
+            assert project_fingerprint(root) == fingerprint
+
+            # Tagged
+            git("tag", "v3.1.0")
+            assert project_fingerprint(root) != fingerprint
+            fingerprint = project_fingerprint(root)
+
+            # Dirty
+            version_file = root / "src" / "dyn" / "__init__.py"
+            version_file.write_text("__version__ = '3.1.1'\n")
+            assert project_fingerprint(root) != fingerprint
+            dirty_fingerprint = project_fingerprint(root)
+
+            # Dirty in a different way
+            version_file.write_text("__version__ = '3.1.2'\n")
+            assert project_fingerprint(root) not in [fingerprint, dirty_fingerprint]
+
+            # New commit
+            git("commit", "-a", "-m", "Update")
+            assert project_fingerprint(root) not in [fingerprint, dirty_fingerprint]
+
+            # Renamed (the original path is not a separate entry)
+            git("mv", "src/dyn/__init__.py", "src/dyn/version.py")
+            dirty = [line for line in _vcs_state(root) if line.startswith("dirty ")]
+            assert len(dirty) == 1
+            assert dirty[0].startswith("dirty R  src/dyn/version.py ")
+            assert dirty[0].endswith(" from src/dyn/__init__.py")
@@ -0,0 +1,47 @@
+import shutil
+
+from payne.cache import ConstraintsCache
+from payne.project.build_frontend import Frontend
+from payne.util.file_system import TemporaryDirectory
+
+from common import test_data
+
+
+class TestFrontend:
+    def test_constraints_key(self):
+        with TemporaryDirectory() as temp_dir:
+            root = temp_dir / "foo"
+            shutil.copytree(test_data / "foo-1.3.1", root)
+            frontend = Frontend.create(root)
+
+            key = frontend.constraints_key()
+            assert frontend.constraints_key() == key
+
+            # Lock file changed
+            (root / "uv.lock").write_text((root / "uv.lock").read_text() + "\n")
+            assert frontend.constraints_key() != key
+            key = frontend.constraints_key()
+
+            # Default groups changed
+            (root / "pyproject.toml").write_text((root / "pyproject.toml").read_text() +
+                                                 '\n[tool.uv]\ndefault-groups = ["lint"]\n')
+            assert frontend.constraints_key() != key
+
+            # Same lock file in another directory
+            shutil.copytree(root, temp_dir / "copy")
+            assert Frontend.create(temp_dir / "copy").constraints_key() == frontend.constraints_key()
+
+    def test_export_constraints_cached(self):
+        with TemporaryDirectory() as temp_dir:
+            cache = ConstraintsCache(temp_dir / "cache")
+            frontend = Frontend.create(test_data / "foo-1.3.1")
+
+            frontend.export_constraints(temp_dir / "constraints1.txt", cache)
+            constraints = (temp_dir / "constraints1.txt").read_text()
+            assert "bar==1.2.0" in constraints
+            assert cache.get(frontend.constraints_key()) == constraints
+
+            # The cached constraints are used
+            cache.put(frontend.constraints_key(), "cached\n")
+            frontend.export_constraints(temp_dir / "constraints2.txt", cache)
+            assert (temp_dir / "constraints2.txt").read_text() == "cached\n"
@@ -1,12 +1,43 @@
 from pathlib import Path
+import shutil
 
-from payne.project import Project
+from payne.cache import BuildEnvPool, MetadataCache
+from payne.exceptions import NotAvailableOffline
+from payne.project import Metadata, Project
+from payne.project.fingerprint import project_fingerprint
+from payne.util.file_system import TemporaryDirectory
 
 import pytest
 
 from common import test_data
 
 
+# A project with an in-tree build backend, which is available without
+# installing anything
+trusted_pyproject = """
+[project]
+name = "trusted"
+dynamic = ["version"]
+
+[build-system]
+requires = []
+build-backend = "trusted_backend"
+backend-path = ["."]
+"""
+
+trusted_backend = """
+import os
+
+def prepare_metadata_for_build_wheel(metadata_directory, config_settings=None):
+    if os.environ.get("TRUSTED_BACKEND_FAIL"):
+        raise RuntimeError("Failed")
+    os.mkdir(os.path.join(metadata_directory, "trusted-1.0.0.dist-info"))
+    with open(os.path.join(metadata_directory, "trusted-1.0.0.dist-info", "METADATA"), "w") as f:
+        f.write("Metadata-Version: 2.1\\nName: trusted\\nVersion: 1.0.0\\n")
+    return "trusted-1.0.0.dist-info"
+"""
+
+
 class TestProject:
     # TODO only sup is slow, the others are fast
     @pytest.mark.slow
@@ -24,3 +55,47 @@ class TestProject:
         project = Project(test_data / directory)
         assert project.metadata().name == name
         assert project.metadata().version == version
+
+    @pytest.mark.slow
+    def test_metadata_cache(self):
+        with TemporaryDirectory() as temp_dir:
+            root = test_data / "sup-2.1.0"
+            cache = MetadataCache(temp_dir)
+
+            # Not cached: metadata is prepared and stored in the cache
+            assert Project(root, metadata_cache=cache).metadata() == Metadata("sup", "2.1.0")
+            assert cache.get(project_fingerprint(root)) == Metadata("sup", "2.1.0")
+
+            # Cached: metadata is taken from the cache
+            cache.put(project_fingerprint(root), Metadata("sup", "0.0.0"))
+            assert Project(root, metadata_cache=cache).metadata() == Metadata("sup", "0.0.0")
+
+    @pytest.mark.slow
+    def test_build_env_pool(self):
+        with TemporaryDirectory() as temp_dir:
+            pool = BuildEnvPool(temp_dir / "build_envs", 3600, shutil.which("uv"))
+
+            # The second project reuses the environment of the first one
+            assert Project(test_data / "sup-2.1.0", build_env_pool=pool).metadata() == Metadata("sup", "2.1.0")
+            assert len([entry for entry in pool.root.iterdir() if entry.is_dir()]) == 1
+            assert Project(test_data / "sup-2.1.0", build_env_pool=pool).metadata() == Metadata("sup", "2.1.0")
+            assert len([entry for entry in pool.root.iterdir() if entry.is_dir()]) == 1
+
+    def test_trusted_build_backend(self, monkeypatch):
+        with TemporaryDirectory() as temp_dir:
+            (temp_dir / "pyproject.toml").write_text(trusted_pyproject)
+            (temp_dir / "trusted_backend.py").write_text(trusted_backend)
+
+            # Offline, so the project can't be prepared in an isolated
+            # environment
+            project = Project(temp_dir, trusted_build_backends=["trusted_backend"], offline=True)
+            assert project.metadata() == Metadata("trusted", "1.0.0")
+
+            # Not trusted
+            with pytest.raises(NotAvailableOffline):
+                Project(temp_dir, offline=True).metadata()
+
+            # Failure: falls back to an isolated environment
+            monkeypatch.setenv("TRUSTED_BACKEND_FAIL", "1")
+            with pytest.raises(NotAvailableOffline):
+                Project(temp_dir, trusted_build_backends=["trusted_backend"], offline=True).metadata()
@@ -0,0 +1,260 @@
+import itertools
+from pathlib import Path
+import re
+
+from packaging.markers import Marker, default_environment
+import pytest
+
+from payne import Config
+from payne.project.build_frontend import UvFrontend
+from payne.project.build_frontend.uv_lock import UnsupportedLock, UvLock
+from payne.util.file_system import TemporaryDirectory
+
+from common import payne_project, test_data
+
+
+synthetic_pyproject_toml = """
+[project]
+name = "app"
+version = "1.0"
+requires-python = ">=3.11"
+dependencies = ["a", "b[x]", "c"]
+
+[dependency-groups]
+dev = ["d"]
+lint = ["e"]
+
+[tool.uv]
+default-groups = ["dev", "lint"]
+"""
+
+# Markers, extras, dependency groups, a cycle, and multiple versions of a
+# package
+synthetic_uv_lock = """
+version = 1
+revision = 1
+requires-python = ">=3.11"
+resolution-markers = [
+    "python_full_version >= '3.12'",
+    "python_full_version < '3.12'",
+]
+
+[[package]]
+name = "a"
+version = "1.0"
+source = { registry = "https://pypi.org/simple" }
+dependencies = [
+    { name = "f", marker = "sys_platform == 'win32'" },
+    { name = "g", version = "1.0", source = { registry = "https://pypi.org/simple" }, marker = "python_full_version < '3.12'" },
+    { name = "g", version = "2.0", source = { registry = "https://pypi.org/simple" }, marker = "python_full_version >= '3.12'" },
+]
+sdist = { url = "https://example.com/a-1.0.tar.gz" }
+
+[[package]]
+name = "app"
+version = "1.0"
+source = { virtual = "." }
+dependencies = [
+    { name = "a" },
+    { name = "b", extra = ["x"] },
+    { name = "c", marker = "os_name == 'nt'" },
+]
+
+[package.dev-dependencies]
+dev = [
+    { name = "d" },
+]
+lint = [
+    { name = "e" },
+]
+
+[package.metadata]
+requires-dist = [
+    { name = "a" },
+    { name = "b", extras = ["x"] },
+    { name = "c", marker = "os_name == 'nt'" },
+]
+
+[package.metadata.requires-dev]
+dev = [{ name = "d" }]
+lint = [{ name = "e" }]
+
+[[package]]
+name = "b"
+version = "1.0"
+source = { registry = "https://pypi.org/simple" }
+sdist = { url = "https://example.com/b-1.0.tar.gz" }
+
+[package.optional-dependencies]
+x = [
+    { name = "f", marker = "platform_machine == 'x86_64'" },
+]
+y = [
+    { name = "h" },
+]
+
+[[package]]
+name = "c"
+version = "1.0"
+source = { registry = "https://pypi.org/simple" }
+dependencies = [
+    { name = "f" },
+    { name = "c2" },
+]
+sdist = { url = "https://example.com/c-1.0.tar.gz" }
+
+[[package]]
+name = "c2"
+version = "1.0"
+source = { registry = "https://pypi.org/simple" }
+dependencies = [
+    { name = "c" },
+]
+sdist = { url = "https://example.com/c2-1.0.tar.gz" }
+
+[[package]]
+name = "d"
+version = "1.0"
+source = { registry = "https://pypi.org/simple" }
+sdist = { url = "https://example.com/d-1.0.tar.gz" }
+
+[[package]]
+name = "e"
+version = "1.0"
+source = { registry = "https://pypi.org/simple" }
+sdist = { url = "https://example.com/e-1.0.tar.gz" }
+
+[[package]]
+name = "f"
+version = "1.0"
+source = { registry = "https://pypi.org/simple" }
+sdist = { url = "https://example.com/f-1.0.tar.gz" }
+
+[[package]]
+name = "g"
+version = "1.0"
+source = { registry = "https://pypi.org/simple" }
+resolution-markers = [
+    "python_full_version < '3.12'",
+]
+sdist = { url = "https://example.com/g-1.0.tar.gz" }
+
+[[package]]
+name = "g"
+version = "2.0"
+source = { registry = "https://pypi.org/simple" }
+resolution-markers = [
+    "python_full_version >= '3.12'",
+]
+sdist = { url = "https://example.com/g-2.0.tar.gz" }
+
+[[package]]
+name = "h"
+version = "1.0"
+source = { registry = "https://pypi.org/simple" }
+sdist = { url = "https://example.com/h-1.0.tar.gz" }
+"""
+
+environments = [
+    {"os_name": os_name, "sys_platform": sys_platform, "platform_machine": platform_machine,
+     "python_full_version": python_version, "python_version": python_version.rpartition(".")[0]}
+    for os_name, sys_platform, platform_machine, python_version in itertools.product(
+        ["posix", "nt"], ["linux", "win32", "darwin"], ["x86_64", "arm64"], ["3.11.0", "3.12.0", "3.13.0"])
+]
+
+
+def parse_export(text: str) -> dict[tuple[str, str], Marker | None]:
+    """(name, version) -> marker
+
+    Comments (e.g., `# via` annotations, depending on the uv version) are
+    ignored.
+    """
+    result = {}
+    for line in text.splitlines():
+        if match := re.fullmatch(r"(\S+)==(\S+)(?: ; (.*))?", line):
+            name, version, marker = match.groups()
+            result[(name, version)] = Marker(marker) if marker else None
+    return result
+
+
+def uv_export(root: Path) -> str:
+    with TemporaryDirectory() as temp_dir, Config(temp_dir, temp_dir, {}, "uv"):
+        UvFrontend(root)._uv_export(temp_dir / "constraints.txt")
+        return (temp_dir / "constraints.txt").read_text()
+
+
+def assert_equivalent(actual: str, expected: str):
+    actual, expected = parse_export(actual), parse_export(expected)
+    assert actual.keys() == expected.keys()
+
+    for key, actual_marker in actual.items():
+        expected_marker = expected[key]
+
+        for environment in environments:
+            environment = default_environment() | environment
+            assert ((actual_marker is None or actual_marker.evaluate(environment)) ==
+                    (expected_marker is None or expected_marker.evaluate(environment))), (key, environment)
+
+
+class TestUvLock:
+    @pytest.mark.parametrize("root", [
+        *sorted(path.parent for path in test_data.glob("*/uv.lock")),
+        payne_project,
+    ], ids=lambda root: root.name)
+    def test_export_same_as_uv(self, root):
+        # uv normalizes markers, so they are compared by evaluating them
+        assert_equivalent(UvLock.load(root / "uv.lock").export(), uv_export(root))
+
+    def test_export_synthetic(self):
+        with TemporaryDirectory() as temp_dir:
+            (temp_dir / "pyproject.toml").write_text(synthetic_pyproject_toml)
+            (temp_dir / "uv.lock").write_text(synthetic_uv_lock)
+
+            actual = UvLock.load(temp_dir / "uv.lock").export(["dev", "lint"])
+            assert_equivalent(actual, uv_export(temp_dir))
+
+            # The dev group is excluded, other default groups are included
+            assert ("d", "1.0") not in parse_export(actual)
+            assert ("e", "1.0") in parse_export(actual)
+            # Optional dependencies are only included for requested extras
+            assert ("h", "1.0") not in parse_export(actual)
+
+    def test_unsupported(self):
+        with TemporaryDirectory() as temp_dir:
+            uv_lock = synthetic_uv_lock.replace('source = { registry = "https://pypi.org/simple" }\nsdist = { url = "https://example.com/h-1.0.tar.gz" }',
+                                                'source = { git = "https://example.com/h.git" }')
+            uv_lock = uv_lock.replace('{ name = "a" },\n    { name = "b"', '{ name = "a" },\n    { name = "h" },\n    { name = "b"', 1)
+            (temp_dir / "uv.lock").write_text(uv_lock)
+
+            with pytest.raises(UnsupportedLock, match="Unsupported source"):
+                UvLock.load(temp_dir / "uv.lock").export()
+
+    def test_unsupported_without_version(self):
+        # A directory dependency with a dynamic version doesn't have a version
+        # in the lock file
+        uv_lock = """
+version = 1
+
+[[package]]
+name = "app"
+version = "1.0"
+source = { editable = "." }
+dependencies = [
+    { name = "a" },
+    { name = "lib" },
+]
+
+[[package]]
+name = "a"
+version = "1.0"
+source = { registry = "https://pypi.org/simple" }
+
+[[package]]
+name = "lib"
+source = { directory = "../lib" }
+"""
+        with TemporaryDirectory() as temp_dir:
+            (temp_dir / "uv.lock").write_text(uv_lock)
+
+            with pytest.raises(UnsupportedLock, match="Unsupported source"):
+                UvLock.load(temp_dir / "uv.lock").export()
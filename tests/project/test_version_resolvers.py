@@ -0,0 +1,184 @@
+from pathlib import Path
+import shutil
+import subprocess
+
+import pytest
+
+from payne.project import Metadata, Project, Pyproject
+from payne.util.file_system import TemporaryDirectory
+
+from common import test_data
+
+
+def git(root: Path, *args: str):
+    subprocess.run(["git", "-c", "user.name=payne", "-c", "user.email=payne@example.com", *args],
+                   cwd=root, check=True, capture_output=True)
+
+
+def create_project(root: Path, pyproject_toml: str, files: dict[str, str], tag: str | None = None):
+    root.mkdir()
+    (root / "pyproject.toml").write_text(pyproject_toml)
+    for name, content in files.items():
+        (root / name).parent.mkdir(parents=True, exist_ok=True)
+        (root / name).write_text(content)
+
+    if tag is not None:
+        git(root, "init")
+        git(root, "add", ".")
+        git(root, "commit", "-m", "Initial")
+        git(root, "tag", tag)
+
+
+hatch_regex_project = ("""
+[project]
+name = "proj"
+dynamic = ["version"]
+
+[build-system]
+requires = ["hatchling"]
+build-backend = "hatchling.build"
+
+[tool.hatch.version]
+path = "src/proj/__about__.py"
+""", {
+    "src/proj/__init__.py": "",
+    "src/proj/__about__.py": "__version__ = '2.3.4'\n",
+})
+
+hatch_vcs_project = ("""
+[project]
+name = "proj"
+dynamic = ["version"]
+
+[build-system]
+requires = ["hatchling", "hatch-vcs"]
+build-backend = "hatchling.build"
+
+[tool.hatch.version]
+source = "vcs"
+""", {
+    "src/proj/__init__.py": "",
+})
+
+setuptools_scm_project = ("""
+[project]
+name = "proj"
+dynamic = ["version"]
+
+[build-system]
+requires = ["setuptools>=64", "setuptools-scm>=8"]
+build-backend = "setuptools.build_meta"
+
+[tool.setuptools_scm]
+""", {
+    "src/proj/__init__.py": "",
+})
+
+setuptools_attr_project = ("""
+[project]
+name = "proj"
+dynamic = ["version"]
+
+[build-system]
+requires = ["setuptools>=64"]
+build-backend = "setuptools.build_meta"
+
+[tool.setuptools.dynamic]
+version = {attr = "proj.__version__"}
+""", {
+    "src/proj/__init__.py": "__version__ = '2.3.4'\n",
+})
+
+setuptools_file_project = ("""
+[project]
+name = "proj"
+dynamic = ["version"]
+
+[build-system]
+requires = ["setuptools>=64"]
+build-backend = "setuptools.build_meta"
+
+[tool.setuptools.dynamic]
+version = {file = "VERSION"}
+""", {
+    "src/proj/__init__.py": "",
+    "VERSION": "2.3.4\n",
+})
+
+
+class TestVersionResolvers:
+    @pytest.mark.parametrize("project, tag", [
+        (hatch_regex_project, None),
+        (hatch_vcs_project, "v2.3.4"),
+        (setuptools_scm_project, "2.3.4"),
+        (setuptools_attr_project, None),
+        (setuptools_file_project, None),
+    ])
+    def test_resolve(self, project, tag):
+        with TemporaryDirectory() as temp_dir:
+            root = temp_dir / "proj"
+            create_project(root, *project, tag=tag)
+
+            assert Pyproject.load(root / "pyproject.toml").dynamic_version(root) == "2.3.4"
+
+    @pytest.mark.parametrize("project", [hatch_vcs_project, setuptools_scm_project])
+    def test_resolve_vcs_not_applicable(self, project):
+        with TemporaryDirectory() as temp_dir:
+            root = temp_dir / "proj"
+            create_project(root, *project, tag="v2.3.4")
+
+            def dynamic_version():
+                return Pyproject.load(root / "pyproject.toml").dynamic_version(root)
+
+            assert dynamic_version() == "2.3.4"
+
+            # Dirty
+            (root / "src" / "proj" / "__init__.py").write_text("# Changed\n")
+            assert dynamic_version() is None
+
+            # Not tagged
+            git(root, "commit", "-a", "-m", "Changed")
+            assert dynamic_version() is None
+
+    def test_resolve_not_normalized(self):
+        with TemporaryDirectory() as temp_dir:
+            root = temp_dir / "proj"
+            pyproject_toml, files = hatch_regex_project
+            create_project(root, pyproject_toml, {**files, "src/proj/__about__.py": "__version__ = '2.3.4-beta'\n"})
+
+            # The build backend would normalize the version
+            assert Pyproject.load(root / "pyproject.toml").dynamic_version(root) is None
+
+    def test_resolve_pkg_info(self):
+        with TemporaryDirectory() as temp_dir:
+            root = temp_dir / "proj"
+            create_project(root, hatch_vcs_project[0], {
+                "PKG-INFO": "Metadata-Version: 2.4\nName: proj\nVersion: 2.3.4\n\nDescription: text\n",
+            })
+
+            assert Pyproject.load(root / "pyproject.toml").dynamic_version(root) == "2.3.4"
+
+    # The build backends are installed from the default index
+    @pytest.mark.slow
+    @pytest.mark.parametrize("project, tag", [
+        (hatch_regex_project, None),
+        (hatch_vcs_project, "v2.3.4"),
+        (setuptools_scm_project, "2.3.4"),
+        (setuptools_attr_project, None),
+        (setuptools_file_project, None),
+    ])
+    def test_parity(self, project, tag):
+        with TemporaryDirectory() as temp_dir:
+            root = temp_dir / "proj"
+            create_project(root, *project, tag=tag)
+
+            assert Project(root).metadata() == Project(root)._prepare_and_read_metadata()
+
+    @pytest.mark.slow
+    def test_parity_test_data(self):
+        with TemporaryDirectory() as temp_dir:
+            root = temp_dir / "dyn"
+            shutil.copytree(test_data / "dyn-3.1.0", root)
+
+            assert Project(root).metadata() == Metadata("dyn", "3.1.0")
+            assert Project(root)._prepare_and_read_metadata() == Metadata("dyn", "3.1.0")
@@ -22,6 +22,19 @@ class TestConfig:
             assert c.package_indices == {}
             assert c.uv == "UV"
 
+    def test_create_cache_dir(self, monkeypatch):
+        def create(**kwargs) -> Config:
+            return Config.create(apps_dir=Path(), bin_dir=Path(), package_indices={}, uv="uv", **kwargs)
+
+        monkeypatch.setenv("PAYNE_CACHE_DIR", "cache")
+        assert create().cache_dir == Path("cache")
+        assert create(cache_dir=Path("explicit")).cache_dir == Path("explicit")
+
+        # Disabled
+        assert create(no_cache=True).cache_dir is None
+        monkeypatch.setenv("PAYNE_CACHE_DIR", "")
+        assert create().cache_dir is None
+
     def test_context(self):
         c = Config(
             apps_dir=Path(),
@@ -1,13 +1,20 @@
+import json
 import os
+import shutil
 from pathlib import Path
 
 from payne import Payne, Config
+from payne.app import ContentStore
 from payne.util.file_system import TemporaryDirectory
-from payne.exceptions import FrontendNotRecognized
+from payne.exceptions import FrontendNotRecognized, NotAvailableOffline
+from payne.package import Package
+from payne.project import Project
+from payne.util.profiling import Profile
 
 import pytest
 
-from common import test_data, test_data_index_url_files
+from common import test_data, test_data_index_url_files, test_data_index_url_server
+from fixtures.index_server import index_server
 from utils import child_names, process_output
 
 from expected_output import expected_output
@@ -24,8 +31,9 @@ class TestPayne:
 
     @staticmethod
     def installed_apps(app_dir: Path) -> dict[str, set[str]]:
+        # Hidden entries are not apps
         return {name: child_names(app_dir / name)
-                for name in child_names(app_dir, missing_ok=True)}
+                for name in child_names(app_dir, missing_ok=True) if not name.startswith(".")}
 
     @staticmethod
     def installed_scripts(bin_dir: Path) -> set[str]:
@@ -185,3 +193,309 @@ class TestPayne:
                             payne.install_package(name, version, locked=locked, reinstall=False)
                         case _:
                             assert False
+
+    @pytest.mark.slow
+    def test_install_batch(self):
+        with TemporaryDirectory() as temp_dir:
+            apps_dir = temp_dir / "apps"
+            bin_dir = temp_dir / "bin"
+
+            with Config(apps_dir=apps_dir, bin_dir=bin_dir, package_indices={"payne_test_data": test_data_index_url_files}, uv="uv"):
+                payne = Payne()
+
+                sources = [
+                    Package("foo", "1.3.0"),
+                    Package("foo", "1.3.1"),
+                    Package("foo", "9.9.9"),  # Does not exist
+                    Project(test_data / "bar-1.2.0"),
+                    Project(test_data / "baz-1.1.0"),
+                ]
+                results = payne.install_batch(sources, locked=False, reinstall=False, jobs=4)
+
+                assert [result.source for result in results] == sources
+                assert [result.success for result in results] == [True, True, False, True, True]
+
+                assert self.installed_apps(apps_dir) == {"foo": {"1.3.0", "1.3.1"}, "bar": {"1.2.0"}, "baz": {"1.1.0"}}
+                assert self.installed_scripts(bin_dir) == {"foo-1.3.0", "foo-1.3.1", "bar-1.2.0", "baz-1.1.0"}
+                self.assert_app_valid(apps_dir, "foo", "1.3.0")
+                self.assert_app_valid(apps_dir, "foo", "1.3.1")
+                self.assert_app_valid(apps_dir, "bar", "1.2.0")
+                self.assert_app_valid(apps_dir, "baz", "1.1.0")
+
+                assert process_output([bin_dir / "foo-1.3.0"]) == (expected_output("foo", "1.3.0", False, "foo"), "")
+                assert process_output([bin_dir / "foo-1.3.1"]) == (expected_output("foo", "1.3.1", False, "foo"), "")
+
+    @pytest.mark.slow
+    def test_list_index(self, capsys):
+        with TemporaryDirectory() as temp_dir:
+            apps_dir = temp_dir / "apps"
+            bin_dir = temp_dir / "bin"
+            cache_dir = temp_dir / "cache"
+
+            with Config(apps_dir=apps_dir, bin_dir=bin_dir, package_indices={"payne_test_data": test_data_index_url_files}, uv="uv", cache_dir=cache_dir):
+                def list_output(**kwargs) -> list[str]:
+                    capsys.readouterr()
+                    Payne().list_(**kwargs)
+                    return [line for line in capsys.readouterr().out.splitlines() if "index" not in line]
+
+                payne = Payne()
+                assert list_output() == ["No apps installed"]
+
+                # The index is maintained by install and uninstall
+                payne.install_package("foo", "1.3.0", locked=True, reinstall=False)
+                payne.install_package("foo", "1.3.1", locked=True, reinstall=False)
+                payne.uninstall("foo", "1.3.0")
+                assert payne.apps_index.entries() is not None
+                assert list_output() == ["foo 1.3.1", "  - foo-1.3.1"]
+
+                # Drift (app version removed behind our back) is fixed by
+                # rebuilding the index
+                shutil.move(apps_dir / "foo" / "1.3.1", temp_dir / "foo-1.3.1")
+                assert list_output() == ["foo 1.3.1", "  - foo-1.3.1"]
+                assert list_output(rebuild_index=True) == ["No apps installed"]
+
+    @pytest.mark.slow
+    def test_dedupe(self, capsys):
+        with TemporaryDirectory() as temp_dir:
+            apps_dir = temp_dir / "apps"
+            bin_dir = temp_dir / "bin"
+
+            with Config(apps_dir=apps_dir, bin_dir=bin_dir, package_indices={"payne_test_data": test_data_index_url_files}, uv="uv"):
+                payne = Payne()
+
+                payne.install_package("foo", "1.3.0", locked=True, reinstall=False, dedupe=True)
+                capsys.readouterr()
+                payne.install_package("foo", "1.3.1", locked=True, reinstall=False, dedupe=True)
+                # Mostly the same dependencies, so there's a lot to dedupe
+                assert "files deduplicated" in capsys.readouterr().out
+                assert child_names(apps_dir) == {"foo", ".store", ".locks"}
+                assert child_names(apps_dir / "foo") == {"1.3.0", "1.3.1"}
+
+                # Nothing left to do
+                payne.dedupe()
+                assert "Total: 0 files deduplicated" in capsys.readouterr().out
+
+                # Uninstalling one version doesn't affect the other one
+                payne.uninstall("foo", "1.3.0")
+                expected = expected_output("foo", "1.3.1", True, "foo")
+                assert process_output([bin_dir / "foo-1.3.1"]) == (expected, "")
+
+                # The store is removed with the last app (once it's no longer
+                # used by the trash)
+                payne.uninstall("foo", "1.3.1")
+                payne.gc(trash=True)
+                assert child_names(apps_dir) == {".locks"}
+
+    @pytest.mark.slow
+    def test_dedupe_failure(self, monkeypatch):
+        def dedupe(self, directory):
+            raise OSError("Failed")
+
+        monkeypatch.setattr(ContentStore, "dedupe", dedupe)
+
+        with TemporaryDirectory() as temp_dir:
+            with Config(apps_dir=temp_dir / "apps", bin_dir=temp_dir / "bin",
+                        package_indices={"payne_test_data": test_data_index_url_files}, uv="uv",
+                        cache_dir=temp_dir / "cache"):
+                payne = Payne()
+                # Build the (empty) index
+                payne.list_()
+                with pytest.raises(OSError):
+                    payne.install_package("foo", "1.3.1", locked=False, reinstall=False, dedupe=True)
+
+                # Installed, and the index is up to date
+                assert self.installed_apps(temp_dir / "apps") == {"foo": {"1.3.1"}}
+                assert [(entry.name, entry.version) for entry in payne.apps_index.entries()] == [("foo", "1.3.1")]
+
+    @pytest.mark.slow
+    def test_verify(self, capsys):
+        with TemporaryDirectory() as temp_dir:
+            apps_dir = temp_dir / "apps"
+            bin_dir = temp_dir / "bin"
+
+            with Config(apps_dir=apps_dir, bin_dir=bin_dir, package_indices={"payne_test_data": test_data_index_url_files}, uv="uv"):
+                payne = Payne()
+                payne.install_package("foo", "1.3.0", locked=False, reinstall=False)
+                payne.install_package("foo", "1.3.1", locked=False, reinstall=False, incremental=True)
+                capsys.readouterr()
+
+                assert payne.verify(record=True, json_=True)
+                assert json.loads(capsys.readouterr().out) == []
+
+                # Replace a script
+                script = bin_dir / "foo-1.3.0"
+                script.unlink()
+                script.write_text("modified")
+                # Modify a file of an installed distribution
+                module = next((apps_dir / "foo" / "1.3.1").rglob("site-packages/foo/__init__.py"))
+                module.unlink()
+                module.write_text("modified")
+
+                # Distributions are only checked with `record`
+                assert not payne.verify(json_=True)
+                assert json.loads(capsys.readouterr().out) == [
+                    {"name": "foo", "version": "1.3.0", "file": str(script), "problem": "modified"},
+                ]
+
+                assert not payne.verify(record=True, json_=True)
+                assert sorted(json.loads(capsys.readouterr().out), key=lambda problem: problem["version"]) == [
+                    {"name": "foo", "version": "1.3.0", "file": str(script), "problem": "modified"},
+                    {"name": "foo", "version": "1.3.1", "file": str(module), "problem": "modified"},
+                ]
+
+    @pytest.mark.slow
+    def test_install_offline(self, index_server):
+        # Offline installs of packages are tested with the downloader (the
+        # test data index doesn't provide hashes, which the download cache
+        # requires)
+        with TemporaryDirectory() as temp_dir:
+            apps_dir = temp_dir / "apps"
+            bin_dir = temp_dir / "bin"
+            package_indices = {"payne_test_data": test_data_index_url_server}
+
+            def install(offline: bool):
+                with Config(apps_dir=apps_dir, bin_dir=bin_dir, package_indices=package_indices, uv="uv",
+                            cache_dir=temp_dir / "cache", offline=offline):
+                    # No pyproject.toml, so the metadata must be cached
+                    Payne().install_project(test_data / "sup-2.1.0", locked=False, reinstall=True)
+
+            # Nothing cached
+            with pytest.raises(NotAvailableOffline):
+                install(offline=True)
+
+            # Warm the caches, then install again from them
+            install(offline=False)
+            install(offline=True)
+
+            assert self.installed_apps(apps_dir) == {"sup": {"2.1.0"}}
+            assert process_output([bin_dir / "sup-2.1.0"]) == (expected_output("sup", "2.1.0", False, "sup"), "")
+
+    @pytest.mark.slow
+    def test_prefetch(self, index_server):
+        with TemporaryDirectory() as temp_dir:
+            apps_dir = temp_dir / "apps"
+            bin_dir = temp_dir / "bin"
+            package_indices = {"payne_test_data": test_data_index_url_server}
+
+            with Config(apps_dir=apps_dir, bin_dir=bin_dir, package_indices=package_indices, uv="uv",
+                        cache_dir=temp_dir / "cache"):
+                payne = Payne()
+                results = payne.prefetch_batch([Package("foo", "1.3.1"), payne.project(test_data / "sup-2.1.0")],
+                                               locked=False, jobs=2)
+                assert all(result.success for result in results)
+
+            # Nothing installed
+            assert self.installed_apps(apps_dir) == {}
+            assert not bin_dir.exists()
+
+            # The caches are warm
+            with Config(apps_dir=apps_dir, bin_dir=bin_dir, package_indices=package_indices, uv="uv",
+                        cache_dir=temp_dir / "cache", offline=True):
+                payne = Payne()
+                payne.install_package("foo", "1.3.1", locked=False, reinstall=False)
+                payne.install_project(test_data / "sup-2.1.0", locked=False, reinstall=False)
+
+            assert self.installed_apps(apps_dir) == {"foo": {"1.3.1"}, "sup": {"2.1.0"}}
+
+    @pytest.mark.slow
+    @pytest.mark.parametrize("locked", [False, True])
+    def test_bundle(self, locked):
+        with TemporaryDirectory() as temp_dir:
+            apps_dir = temp_dir / "apps"
+            bin_dir = temp_dir / "bin"
+            bundle_file = temp_dir / "foo-1.3.1.payne-bundle.tar"
+
+            with Config(apps_dir=apps_dir, bin_dir=bin_dir, package_indices={"payne_test_data": test_data_index_url_files},
+                        uv="uv", cache_dir=temp_dir / "cache"):
+                Payne().bundle("foo", "1.3.1", bundle_file, locked=locked)
+
+            # Nothing installed
+            assert self.installed_apps(apps_dir) == {}
+
+            # Install without an index and with empty caches
+            with Config(apps_dir=apps_dir, bin_dir=bin_dir, package_indices={},
+                        uv="uv", cache_dir=temp_dir / "other_cache", offline=True):
+                Payne().install_bundle(bundle_file, reinstall=False)
+
+            assert self.installed_apps(apps_dir) == {"foo": {"1.3.1"}}
+            assert process_output([bin_dir / "foo-1.3.1"]) == (expected_output("foo", "1.3.1", locked, "foo"), "")
+
+    @pytest.mark.slow
+    def test_profile(self):
+        with TemporaryDirectory() as temp_dir:
+            with Config(apps_dir=temp_dir / "apps", bin_dir=temp_dir / "bin",
+                        package_indices={"payne_test_data": test_data_index_url_files}, uv="uv"):
+                with Profile() as profile:
+                    Payne().install_project(test_data / "foo-1.3.1", locked=True, reinstall=False)
+                    Payne().uninstall("foo", "1.3.1")
+
+            names = {span.name for span in profile.spans}
+            assert {"install", "determine name and version", "export constraints", "install app version",
+                    "uv tool install", "move scripts", "uninstall", "remove scripts"} <= names
+
+    @pytest.mark.slow
+    def test_partial_install(self):
+        with TemporaryDirectory() as temp_dir:
+            apps_dir = temp_dir / "apps"
+            bin_dir = temp_dir / "bin"
+
+            with Config(apps_dir=apps_dir, bin_dir=bin_dir, package_indices={"payne_test_data": test_data_index_url_files}, uv="uv"):
+                payne = Payne()
+
+                # Simulate an installation that was interrupted before it was
+                # committed
+                payne.install_package("foo", "1.3.0", locked=False, reinstall=False)
+                (apps_dir / "foo" / "1.3.0" / "payne_app-version.json").unlink()
+                assert list(payne.apps_dir.installed_apps()) == []
+
+                # The partial installation is replaced
+                payne.install_package("foo", "1.3.0", locked=False, reinstall=False)
+                self.assert_app_valid(apps_dir, "foo", "1.3.0")
+                assert self.installed_scripts(bin_dir) == {"foo-1.3.0"}
+                assert process_output([bin_dir / "foo-1.3.0"]) == (expected_output("foo", "1.3.0", False, "foo"), "")
+
+                # A partial installation can also be uninstalled
+                (apps_dir / "foo" / "1.3.0" / "payne_app-version.json").unlink()
+                payne.uninstall("foo", "1.3.0")
+                assert self.installed_apps(apps_dir) == {}
+
+    @pytest.mark.slow
+    @pytest.mark.parametrize("source", ["package", "project"])
+    def test_install_incremental(self, source):
+        with TemporaryDirectory() as temp_dir:
+            apps_dir = temp_dir / "apps"
+            bin_dir = temp_dir / "bin"
+
+            with Config(apps_dir=apps_dir, bin_dir=bin_dir, package_indices={"payne_test_data": test_data_index_url_files}, uv="uv"):
+                payne = Payne()
+
+                def install_app(version: str, incremental: bool):
+                    match source:
+                        case "project":
+                            payne.install_project(test_data / f"foo-{version}", locked=False, reinstall=False, incremental=incremental)
+                        case "package":
+                            payne.install_package("foo", version, locked=False, reinstall=False, incremental=incremental)
+
+                    expected = expected_output("foo", version, False, "foo")
+                    assert process_output([bin_dir / f"foo-{version}"]) == (expected, "")
+
+                # Nothing to clone
+                install_app("1.3.0", True)
+                # Cloned from 1.3.0, bar downgraded
+                install_app("1.3.1", True)
+                # Cloned from 1.3.1, baz downgraded
+                install_app("1.3.2", True)
+
+                # The clones don't depend on the versions they were cloned from
+                payne.uninstall("foo", "1.3.0")
+                payne.uninstall("foo", "1.3.1")
+
+                assert self.installed_apps(apps_dir) == {"foo": {"1.3.2"}}
+                assert self.installed_scripts(bin_dir) == {"foo-1.3.2"}
+                self.assert_app_valid(apps_dir, "foo", "1.3.2")
+                expected = expected_output("foo", "1.3.2", False, "foo")
+                assert process_output([bin_dir / "foo-1.3.2"]) == (expected, "")
+
+                for file in (apps_dir / "foo" / "1.3.2" / "foo" / "bin").iterdir():
+                    if file.is_file() and not file.is_symlink():
+                        assert b"1.3.1" not in file.read_bytes()
@@ -0,0 +1,51 @@
+import re
+import subprocess
+import sys
+
+import pytest
+
+from payne.util.file_system import TemporaryDirectory
+
+# Dependencies that take a while to import and are only needed by some
+# commands
+heavy_modules = ["build", "cattrs", "unearth", "httpx", "platformdirs"]
+
+# Import time of `payne.cli`, including cyclopts. This is generous to avoid
+# flakiness on slow machines; typical values are well below.
+import_time_budget = 0.5
+
+
+def imported_modules(code: str) -> set[str]:
+    # The CLI exits, so we print the modules on exit
+    code = f"import atexit, sys\natexit.register(lambda: print('\\n'.join(sys.modules), file=sys.stderr))\n{code}"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return set(result.stderr.splitlines())
+
+
+class TestStartup:
+    def test_import_cli(self):
+        modules = imported_modules("import payne.cli")
+        assert "payne.cli" in modules
+        assert not {module for module in heavy_modules if module in modules}
+
+    @pytest.mark.parametrize("command", ["status", "list"])
+    def test_command(self, command):
+        with TemporaryDirectory() as temp_dir:
+            args = ["--apps-dir", str(temp_dir / "apps"), "--bin-dir", str(temp_dir / "bin"),
+                    "--cache-dir", str(temp_dir / "cache"), command]
+            modules = imported_modules(f"sys.argv = ['payne', *{args!r}]\nimport payne.cli\npayne.cli.main()")
+
+        # All directories are specified, so we don't even need platformdirs
+        assert "payne.cli" in modules
+        assert not {module for module in heavy_modules if module in modules}
+
+    def test_import_time(self):
+        def import_time() -> float:
+            result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import payne.cli"],
+                                    capture_output=True, text=True, check=True)
+            # import time: self [us] | cumulative | imported package
+            match = re.search(r"^import time:\s*\d+ \|\s*(\d+) \| payne\.cli$", result.stderr, re.MULTILINE)
+            return int(match.group(1)) / 1e6
+
+        # The first run may have to compile the modules
+        assert min(import_time() for _ in range(3)) < import_time_budget
@@ -1,9 +1,11 @@
-from payne.util.file_system import TemporaryDirectory, safe_create, safe_ensure_exists
+from payne.util.file_system import TemporaryDirectory, atomic_write_text, safe_create, safe_ensure_exists
 
 import pytest
 
 from payne.util.path import is_empty
 
+from utils import child_names
+
 
 class TestFileSystem:
     def test_temporary_directory(self):
@@ -136,3 +138,16 @@ class TestFileSystem:
             assert a.is_dir()  # Already existed
             assert not b.is_dir()  # Created by safe_ensure_exists
             assert not c.is_dir()  # Created by safe_ensure_exists
+
+    def test_atomic_write(self):
+        with TemporaryDirectory() as root:
+            file = root / "a" / "b"
+
+            atomic_write_text(file, "foo")
+            assert file.read_text() == "foo"
+
+            atomic_write_text(file, "bar")
+            assert file.read_text() == "bar"
+
+            # No temporary files left over
+            assert child_names(root / "a") == {"b"}
@@ -0,0 +1,85 @@
+import os
+from pathlib import Path
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from payne.util.locking import file_lock, remove_lock_file, try_file_lock
+
+
+class TestFileLock:
+    def test_file_lock(self, tmp_path: Path):
+        lock_file = tmp_path / "locks" / "app.lock"
+        started_file = tmp_path / "started"
+
+        # Hold the lock in another process for a while
+        holder = subprocess.Popen([sys.executable, "-c", (
+            "import pathlib, sys, time\n"
+            "from payne.util.locking import file_lock\n"
+            "with file_lock(pathlib.Path(sys.argv[1])):\n"
+            "    pathlib.Path(sys.argv[2]).touch()\n"
+            "    time.sleep(1)\n"
+        ), str(lock_file), str(started_file)])
+
+        try:
+            while not started_file.exists():
+                assert holder.poll() is None
+                time.sleep(0.01)
+
+            start = time.monotonic()
+            with file_lock(lock_file):
+                # We only get the lock after the other process released it
+                assert holder.poll() is not None or time.monotonic() - start > 0.5
+        finally:
+            holder.wait()
+
+        assert holder.returncode == 0
+        # The lock file is kept
+        assert lock_file.is_file()
+
+    def test_try_file_lock(self, tmp_path: Path):
+        lock_file = tmp_path / "app.lock"
+
+        with try_file_lock(lock_file) as acquired:
+            assert acquired
+            # Also exclusive within the process
+            with try_file_lock(lock_file) as acquired_again:
+                assert not acquired_again
+
+        with try_file_lock(lock_file) as acquired:
+            assert acquired
+
+    @pytest.mark.skipif(os.name == "nt", reason="No shared locks on Windows")
+    def test_shared_file_lock(self, tmp_path: Path):
+        lock_file = tmp_path / "app.lock"
+
+        with file_lock(lock_file, shared=True), file_lock(lock_file, shared=True):
+            # Shared locks exclude exclusive locks
+            with try_file_lock(lock_file) as acquired:
+                assert not acquired
+
+        with try_file_lock(lock_file) as acquired:
+            assert acquired
+
+    def test_remove_lock_file(self, tmp_path: Path):
+        lock_file = tmp_path / "app.lock"
+        acquired = threading.Event()
+
+        def wait_for_lock():
+            with file_lock(lock_file):
+                # Holding the current lock file, not the removed one
+                assert lock_file.is_file()
+                acquired.set()
+
+        with file_lock(lock_file):
+            thread = threading.Thread(target=wait_for_lock)
+            thread.start()
+            time.sleep(0.1)
+            remove_lock_file(lock_file)
+            assert not lock_file.exists()
+
+        thread.join()
+        assert acquired.is_set()
@@ -0,0 +1,50 @@
+import json
+import threading
+
+from payne.util.file_system import TemporaryDirectory
+from payne.util.profiling import Profile, span
+
+
+class TestProfiling:
+    def test_span(self):
+        # No active profile
+        with span("outside"):
+            pass
+
+        with Profile() as profile:
+            with span("outer", name="foo"):
+                with span("inner"):
+                    pass
+
+            def run():
+                with span("thread"):
+                    pass
+
+            thread = threading.Thread(target=run)
+            thread.start()
+            thread.join()
+
+        with span("after"):
+            pass
+
+        spans = {s.name: s for s in profile.spans}
+        assert set(spans) == {"outer", "inner", "thread"}
+        assert spans["outer"].args == {"name": "foo"}
+        assert spans["outer"].start <= spans["inner"].start
+        assert spans["inner"].start + spans["inner"].duration <= spans["outer"].start + spans["outer"].duration
+        assert spans["thread"].thread != spans["outer"].thread
+
+    def test_write(self):
+        with TemporaryDirectory() as temp_dir:
+            with Profile() as profile:
+                with span("install", name="foo"):
+                    pass
+
+            profile.write(temp_dir / "profile.json", "json")
+            data = json.loads((temp_dir / "profile.json").read_text())
+            assert [s["name"] for s in data["spans"]] == ["install"]
+            assert data["spans"][0]["args"] == {"name": "foo"}
+
+            profile.write(temp_dir / "trace.json", "chrome")
+            data = json.loads((temp_dir / "trace.json").read_text())
+            assert [(e["name"], e["ph"]) for e in data["traceEvents"]] == [("install", "X")]
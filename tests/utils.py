@@ -1,5 +1,8 @@
+import io
 from pathlib import Path
 import subprocess
+import tarfile
+import zipfile
 
 
 def child_names(directory: Path, missing_ok: bool = False) -> set[str]:
@@ -28,3 +31,21 @@ def process_output(args: list) -> tuple[str, str]:
         print(e.stdout)
         print(e.stderr)  # TODO to stderr? (all instances)
         raise
+
+
+def create_tar(files: dict[str, bytes]) -> bytes:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+def create_zip(files: dict[str, bytes]) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, mode="w") as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()